@@ -6,9 +6,26 @@ import raylibpy as rl
 from raylibpy import Vector2, Vector3
 from tkinter import colorchooser, filedialog
 import numpy as np
-import shutil
 import pygame
-import filecmp
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from rayengine.cook import COOKED_DIR, find_cooked_level, load_map_manifest
+from rayengine.enemy_renderer import EnemyRenderer
+from rayengine.history import EditHistory
+from rayengine.level_renderer import LevelRenderer
+from rayengine.mapfile import load_map_file, save_map_file
+from rayengine.media_store import MediaStore
+from rayengine.menu import MenuCache
+from rayengine.profiler import PROFILES_DIR, FrameProfiler
+from rayengine.render_settings import RenderSettings, UniformCache
+from rayengine.replay import LOG_EXTENSION, RECORDINGS_DIR, InputLog, InputRecorder, print_replay_report
+from rayengine.resources import ResourceRegistry
+from rayengine.simulation import TICK, FrameInput, World
+from rayengine.streaming import STREAM_CHUNK_SIZE, STREAM_MIN_CELLS, ChunkStreamer, grid_region_reader
+from rayengine.thumbnails import ThumbnailCache
+from rayengine.visibility import VisibilityPass
 
 # Initialize pygame mixer
 pygame.mixer.init()
@@ -24,8 +41,7 @@ except ImportError:
 # Portable Media Directory System
 # ------------------------------------------------------------------------------
 MEDIA_DIR = "media"
-if not os.path.exists(MEDIA_DIR):
-    os.makedirs(MEDIA_DIR)
+media_store = MediaStore(MEDIA_DIR)
 
 def get_media_path(filename):
     """Returns the proper media path, ensuring it's in the media directory"""
@@ -42,44 +58,198 @@ def copy_to_media(src_path):
     if src_path is None or not os.path.exists(src_path):
         return None
         
-    filename = os.path.basename(src_path)
-    dest_path = get_media_path(filename)
-    
     try:
-        # Only copy if not already in media dir or if different
-        if not os.path.exists(dest_path) or not filecmp.cmp(src_path, dest_path, shallow=False):
-            shutil.copy2(src_path, dest_path)
-        return dest_path
+        # Content-addressed: unchanged files are recognized from the manifest,
+        # identical files are stored once and name clashes get a new name
+        return media_store.add(src_path)
     except Exception as e:
         print(f"Error copying {src_path} to media directory:", e)
         return src_path  # Fallback to original path if copy fails
 
+# ------------------------------------------------------------------------------
+# Editor Thumbnails
+# ------------------------------------------------------------------------------
+# Resized previews are cached on disk by content hash and size, and the
+# PhotoImages built from them are kept in memory, so reloading a map or
+# re-picking a texture skips decoding and resampling
+PHOTO_CACHE_SIZE = 64
+thumbnail_cache = ThumbnailCache(hasher=media_store.file_hash) if Image else None
+photo_cache = OrderedDict()
+
+def decode_thumbnail(path, size=None):
+    """Decode and resize an image for the editor (safe on worker threads);
+    returns (cache key, PIL image), without an image if its PhotoImage is cached"""
+    if Image is None:
+        return None, None
+    key = (media_store.file_hash(path), size)
+    if key in photo_cache:
+        return key, None
+    if size:
+        return key, thumbnail_cache.get(path, (size, size), key[0])
+    img = Image.open(path)
+    img.load()
+    return key, img
+
+def thumbnail_photo(path, key, img):
+    """Return the PhotoImage for a decoded thumbnail (Tk thread only)"""
+    if Image is None:
+        return tk.PhotoImage(file=path)
+    photo = photo_cache.get(key)
+    if photo is not None:
+        photo_cache.move_to_end(key)
+        return photo
+    if img is None:
+        # Evicted from memory after decode_thumbnail saw it
+        return load_thumbnail(path, key[1])
+    photo = ImageTk.PhotoImage(img)
+    photo_cache[key] = photo
+    if len(photo_cache) > PHOTO_CACHE_SIZE:
+        photo_cache.popitem(last=False)
+    return photo
+
+def load_thumbnail(path, size=None):
+    """Return a PhotoImage of an image resized to size x size (or as-is)"""
+    key, img = decode_thumbnail(path, size)
+    return thumbnail_photo(path, key, img)
+
 def load_asset(path):
     """Get the proper path for an asset, ensuring it's in the media directory"""
     if path is None:
         return None
-        
-    # First try to find in media directory
+
+    # Media names directly, outside files by content (copied in if new)
+    try:
+        resolved = media_store.resolve(path)
+    except Exception as e:
+        print(f"Error resolving {path} in media directory:", e)
+        resolved = path if os.path.exists(path) else None
+    if resolved:
+        return resolved
+
+    # Last resort for maps from elsewhere: a media file of the same name
     media_path = get_media_path(path)
     if os.path.exists(media_path):
         return media_path
-        
-    # If not found, try original path
-    if os.path.exists(path):
-        # Attempt to copy to media dir for future use
-        return copy_to_media(path)
-        
     return None
 
+def preview_asset(path):
+    """Like load_asset, but a missing file keeps its media path: the preview
+    can still load the cooked version of it"""
+    if not path:
+        return None
+    return load_asset(path) or get_media_path(path)
+
+# ------------------------------------------------------------------------------
+# Background Asset Loading
+# ------------------------------------------------------------------------------
+# load_map resolves and decodes its assets on a thread pool. Finished jobs are
+# queued and applied on the Tk thread by a root.after poll, which is the only
+# place PhotoImages get created.
+ASSET_POLL_MS = 15
+asset_executor = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) + 2),
+                                    thread_name_prefix="asset")
+asset_results = queue.Queue()
+asset_load_generation = 0
+pending_asset_jobs = 0
+
+def decode_image_asset(path, size):
+    """Worker job: resolve an image asset and decode its editor thumbnail"""
+    path = preview_asset(path)
+    if not path or not os.path.exists(path):
+        return path, None, None
+    try:
+        key, img = decode_thumbnail(path, size)
+    except Exception as e:
+        # The map keeps referring to the file; it just has no thumbnail
+        print("Error decoding image", path, ":", e)
+        return path, None, None
+    return path, key, img
+
+def load_sound_asset(path):
+    """Worker job: resolve and decode a sound asset"""
+    path = preview_asset(path)
+    if not path or not os.path.exists(path):
+        return path, None
+    try:
+        return path, pygame.mixer.Sound(path)
+    except Exception as e:
+        print("Error loading handgun sound:", e)
+        return path, None
+
+def submit_asset_job(apply, job, *args):
+    """Run job(*args) on the asset pool and apply(result) later on the Tk thread"""
+    global pending_asset_jobs
+    generation = asset_load_generation
+    future = asset_executor.submit(job, *args)
+    future.add_done_callback(lambda f: asset_results.put((generation, apply, f)))
+    if pending_asset_jobs == 0:
+        root.after(ASSET_POLL_MS, poll_asset_results)
+    pending_asset_jobs += 1
+
+def poll_asset_results():
+    """Apply finished asset jobs, and keep polling while any are pending"""
+    global pending_asset_jobs
+    while True:
+        try:
+            generation, apply, future = asset_results.get_nowait()
+        except queue.Empty:
+            break
+        pending_asset_jobs -= 1
+        if generation != asset_load_generation:
+            continue  # Superseded by a later map load
+        try:
+            apply(future.result())
+        except Exception as e:
+            print("Error loading asset:", e)
+    if pending_asset_jobs > 0:
+        root.after(ASSET_POLL_MS, poll_asset_results)
+
+def apply_image_asset(path_name, img_name, redraw):
+    """Apply callback storing a decoded image in its editor globals"""
+    def apply(result):
+        path, key, img = result
+        globals()[path_name] = path
+        # A missing or undecodable file keeps its path (its cooked version may
+        # exist) but has no thumbnail
+        photo = None
+        if path and os.path.exists(path) and (key is not None or Image is None):
+            try:
+                photo = thumbnail_photo(path, key, img)
+            except Exception as e:
+                print("Error loading thumbnail", path, ":", e)
+        globals()[img_name] = photo
+        if redraw:
+            redraw_grid()
+    return apply
+
+def apply_path_asset(path_name):
+    """Apply callback storing a resolved asset path in its editor global"""
+    def apply(path):
+        globals()[path_name] = path
+    return apply
+
+def apply_sound_asset(result):
+    global handgun_shoot_sound_path, handgun_shoot_sound
+    handgun_shoot_sound_path, handgun_shoot_sound = result
+
 # ------------------------------------------------------------------------------
 # Game Configuration
 # ------------------------------------------------------------------------------
 ROWS = 20
 COLS = 20
 CELL_SIZE = 40
+MAX_MAP_SIZE = 4096
 
-# Initialize grid
-grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+# Initialize grid (one uint8 per cell; dimensions change per map)
+grid = np.zeros((ROWS, COLS), dtype=np.uint8)
+
+# Editor canvas state: item IDs per cell, cells waiting for redraw, spawn cells
+cell_items = {}
+dirty_cells = set()
+spawn_cells = set()
+
+# Undo/redo of cell edits (cleared whenever the grid is replaced)
+history = EditHistory()
 
 # Global variables
 sky_color_hex = "#87CEEB"
@@ -127,192 +297,310 @@ win_message_color_var = None
 # ------------------------------------------------------------------------------
 # Utility Functions
 # ------------------------------------------------------------------------------
-def hex_to_color(color_str):
-    """Convert hex color string to Raylib Color"""
-    if color_str.startswith("#"):
-        try:
-            hex_str = color_str.lstrip('#')
-            r = int(hex_str[0:2], 16)
-            g = int(hex_str[2:4], 16)
-            b = int(hex_str[4:6], 16)
-            return rl.Color(r, g, b, 255)
-        except Exception as e:
-            print("Error parsing hex color:", color_str, e)
-            return rl.Color(255, 255, 255, 255)
-    else:
-        try:
-            rgb_tuple = root.winfo_rgb(color_str)
-            r = int(rgb_tuple[0] / 65535 * 255)
-            g = int(rgb_tuple[1] / 65535 * 255)
-            b = int(rgb_tuple[2] / 65535 * 255)
-            return rl.Color(r, g, b, 255)
-        except Exception as e:
-            print("Error converting color name:", color_str, e)
-            return rl.Color(255, 255, 255, 255)
+def draw_cell(row, col):
+    """(Re)create the canvas items of a single cell"""
+    for item in cell_items.pop((row, col), ()):
+        canvas.delete(item)
+
+    x1 = col * CELL_SIZE
+    y1 = row * CELL_SIZE
+    x2 = x1 + CELL_SIZE
+    y2 = y1 + CELL_SIZE
+    cell_val = grid[row, col]
+    items = []
+
+    if cell_val == 0:  # Ground
+        if ground_texture_img is not None:
+            items.append(canvas.create_image(x1, y1, anchor='nw', image=ground_texture_img))
+        else:
+            items.append(canvas.create_rectangle(x1, y1, x2, y2, fill="white", outline="black"))
+    elif cell_val == 1:  # Wall
+        if wall_texture_img is not None:
+            items.append(canvas.create_image(x1, y1, anchor='nw', image=wall_texture_img))
+        else:
+            items.append(canvas.create_rectangle(x1, y1, x2, y2, fill="gray", outline="black"))
+    elif cell_val == 2:  # Spawn
+        if ground_texture_img is not None:
+            items.append(canvas.create_image(x1, y1, anchor='nw', image=ground_texture_img))
+        items.append(canvas.create_rectangle(x1, y1, x2, y2, fill="green", outline="black"))
+    elif cell_val == 3:  # Enemy
+        if enemy_idle_img is not None:
+            items.append(canvas.create_image(x1, y1, anchor='nw', image=enemy_idle_img))
+        else:
+            items.append(canvas.create_oval(x1, y1, x2, y2, fill="red", outline="black"))
+
+    cell_items[(row, col)] = items
+
+def visible_cell_range():
+    """Rows and columns (r0, r1, c0, c1) of the cells inside the canvas viewport"""
+    x0 = canvas.canvasx(0)
+    y0 = canvas.canvasy(0)
+    c0 = max(int(x0 // CELL_SIZE), 0)
+    r0 = max(int(y0 // CELL_SIZE), 0)
+    c1 = min(int((x0 + canvas.winfo_width()) // CELL_SIZE) + 1, COLS)
+    r1 = min(int((y0 + canvas.winfo_height()) // CELL_SIZE) + 1, ROWS)
+    return r0, r1, c0, c1
+
+def update_visible_cells():
+    """Create canvas items for cells scrolled into view and drop the others"""
+    r0, r1, c0, c1 = visible_cell_range()
+    for row, col in list(cell_items):
+        if not (r0 <= row < r1 and c0 <= col < c1):
+            for item in cell_items.pop((row, col)):
+                canvas.delete(item)
+    for row in range(r0, r1):
+        for col in range(c0, c1):
+            if (row, col) not in cell_items:
+                draw_cell(row, col)
 
 def redraw_grid():
-    """Redraw the grid canvas"""
+    """Redraw the whole grid canvas (only needed when cell textures change)"""
     canvas.delete("all")
-    for i in range(ROWS):
-        for j in range(COLS):
-            x1 = j * CELL_SIZE
-            y1 = i * CELL_SIZE
-            x2 = x1 + CELL_SIZE
-            y2 = y1 + CELL_SIZE
-            cell_val = grid[i][j]
-            
-            if cell_val == 0:  # Ground
-                if ground_texture_img is not None:
-                    canvas.create_image(x1, y1, anchor='nw', image=ground_texture_img)
-                else:
-                    canvas.create_rectangle(x1, y1, x2, y2, fill="white", outline="black")
-            elif cell_val == 1:  # Wall
-                if wall_texture_img is not None:
-                    canvas.create_image(x1, y1, anchor='nw', image=wall_texture_img)
-                else:
-                    canvas.create_rectangle(x1, y1, x2, y2, fill="gray", outline="black")
-            elif cell_val == 2:  # Spawn
-                if ground_texture_img is not None:
-                    canvas.create_image(x1, y1, anchor='nw', image=ground_texture_img)
-                canvas.create_rectangle(x1, y1, x2, y2, fill="green", outline="black")
-            elif cell_val == 3:  # Enemy
-                if enemy_idle_img is not None:
-                    canvas.create_image(x1, y1, anchor='nw', image=enemy_idle_img)
-                else:
-                    canvas.create_oval(x1, y1, x2, y2, fill="red", outline="black")
+    cell_items.clear()
+    dirty_cells.clear()
+    spawn_cells.clear()
+    spawn_cells.update((int(i), int(j)) for i, j in np.argwhere(grid == 2))
+    update_visible_cells()
+
+def set_cell(row, col, value):
+    """Change a grid cell and queue it for redraw"""
+    if grid[row, col] == value:
+        return
+    grid[row, col] = value
+    if value == 2:
+        spawn_cells.add((row, col))
+    else:
+        spawn_cells.discard((row, col))
+    dirty_cells.add((row, col))
+
+def flush_dirty_cells():
+    """Redraw only the cells changed since the last flush"""
+    for cell in dirty_cells:
+        if cell in cell_items:
+            draw_cell(*cell)
+    dirty_cells.clear()
+
+def edit_cell(row, col, value):
+    """set_cell for user edits: the change is recorded for undo"""
+    old = grid[row, col]
+    if old == value:
+        return
+    history.record(row * COLS + col, int(old), value)
+    set_cell(row, col, value)
+
+def apply_cell_values(indices, values):
+    """Write values to flat cell indices and redraw just those cells"""
+    for index, value in zip(indices.tolist(), values.tolist()):
+        set_cell(*divmod(index, COLS), value)
+    flush_dirty_cells()
+
+def undo(event=None):
+    """Revert the last edit"""
+    change = history.undo()
+    if change:
+        apply_cell_values(*change)
+
+def redo(event=None):
+    """Re-apply the last undone edit"""
+    change = history.redo()
+    if change:
+        apply_cell_values(*change)
+
+# Tk's Shift modifier bit in event.state (Caps Lock alone also makes <Control-Z> fire)
+SHIFT_MASK = 0x1
+
+def undo_key(event):
+    """Ctrl+Z undoes, Ctrl+Shift+Z redoes; text fields keep their own undo"""
+    if isinstance(event.widget, (tk.Entry, tk.Text)):
+        return
+    if event.state & SHIFT_MASK:
+        redo()
+    else:
+        undo()
+
+def redo_key(event):
+    """Ctrl+Y redoes, except in text fields"""
+    if not isinstance(event.widget, (tk.Entry, tk.Text)):
+        redo()
+
+def set_grid(new_grid):
+    """Replace the map grid (and its dimensions) and refresh the editor"""
+    global grid, ROWS, COLS
+    grid = np.ascontiguousarray(new_grid, dtype=np.uint8)
+    ROWS, COLS = grid.shape
+    history.clear()
+    map_rows_var.set(ROWS)
+    map_cols_var.set(COLS)
+    canvas.configure(scrollregion=(0, 0, COLS * CELL_SIZE, ROWS * CELL_SIZE))
+    redraw_grid()
 
-def canvas_click(event):
-    """Handle canvas click events"""
-    col = event.x // CELL_SIZE
-    row = event.y // CELL_SIZE
+def resize_map():
+    """Resize the map to the editor's row/column fields, keeping cells that still fit"""
+    try:
+        rows = max(1, min(int(map_rows_var.get()), MAX_MAP_SIZE))
+        cols = max(1, min(int(map_cols_var.get()), MAX_MAP_SIZE))
+    except (tk.TclError, ValueError) as e:
+        print("Invalid map size:", e)
+        return
+    new_grid = np.zeros((rows, cols), dtype=np.uint8)
+    keep_rows = min(rows, ROWS)
+    keep_cols = min(cols, COLS)
+    new_grid[:keep_rows, :keep_cols] = grid[:keep_rows, :keep_cols]
+    set_grid(new_grid)
+
+def scroll_canvas(view, *args):
+    """Scroll the canvas and realize the cells that came into view"""
+    view(*args)
+    update_visible_cells()
+
+def paint_cell(event):
+    """Apply the current editor mode to the cell under the pointer"""
+    col = int(canvas.canvasx(event.x) // CELL_SIZE)
+    row = int(canvas.canvasy(event.y) // CELL_SIZE)
     if row < 0 or row >= ROWS or col < 0 or col >= COLS:
         return
         
     mode = mode_var.get()
     if mode == "wall":
-        grid[row][col] = 1
+        edit_cell(row, col, 1)
     elif mode == "ground":
-        grid[row][col] = 0
+        edit_cell(row, col, 0)
     elif mode == "spawn":
         # Clear existing spawn point
-        for i in range(ROWS):
-            for j in range(COLS):
-                if grid[i][j] == 2:
-                    grid[i][j] = 0
-        grid[row][col] = 2
+        for spawn_row, spawn_col in list(spawn_cells):
+            edit_cell(spawn_row, spawn_col, 0)
+        edit_cell(row, col, 2)
     elif mode == "enemy":
-        grid[row][col] = 3
+        edit_cell(row, col, 3)
         
-    redraw_grid()
+    flush_dirty_cells()
+
+def canvas_click(event):
+    """Handle canvas click events; a click and the drag after it are one undo step"""
+    history.begin()
+    paint_cell(event)
+
+def canvas_release(event):
+    """End the current paint stroke"""
+    history.end()
 
-def ray_intersect_sphere(ray_origin, ray_dir, sphere_center, sphere_radius):
-    """Check if ray intersects with sphere"""
-    L = Vector3(sphere_center.x - ray_origin.x,
-                sphere_center.y - ray_origin.y,
-                sphere_center.z - ray_origin.z)
-    t_ca = L.x * ray_dir.x + L.y * ray_dir.y + L.z * ray_dir.z
-    if t_ca < 0:
-        return False
-    d2 = (L.x**2 + L.y**2 + L.z**2) - t_ca**2
-    return d2 <= sphere_radius**2
+# Preview assets kept decoded between preview sessions (cooked versions are
+# loaded instead where cooked/ has them)
+resources = ResourceRegistry(media_store.file_hash, COOKED_DIR)
+# Map file last loaded or saved; its cook manifest names the cooked assets
+map_file_path = None
 
 # ------------------------------------------------------------------------------
 # Game Preview Function
 # ------------------------------------------------------------------------------
-def preview():
-    """Run the game preview"""
+PROFILER_REFRESH_FRAMES = 15
+
+def preview(replay=None):
+    """Run the game preview, or play back a recorded InputLog in it"""
     global game_name_var, shot_delay_var
+
+    # A replay runs on the map it was recorded with; the editor grid is left alone
+    level_grid = replay.grid if replay else grid
     
-    # Find spawn position
-    spawn_found = False
-    spawn_row, spawn_col = 0, 0
-    for i in range(ROWS):
-        for j in range(COLS):
-            if grid[i][j] == 2:
-                spawn_row, spawn_col = i, j
-                spawn_found = True
-                break
-        if spawn_found:
-            break
-            
-    if not spawn_found:
-        spawn_row = ROWS // 2
-        spawn_col = COLS // 2
+    # Per-phase frame timings; F3 shows them, replays always collect them
+    profiler = FrameProfiler()
+    profiler.enabled = bool(replay)
+    show_profiler = False
+    profiler_lines = []
+
+    # Record every simulated frame's input so the session can be replayed
+    cooldown_duration = shot_delay_var.get()
+    recorder = None
+    if not replay and record_input_var.get():
+        try:
+            os.makedirs(RECORDINGS_DIR, exist_ok=True)
+            record_path = os.path.join(RECORDINGS_DIR, time.strftime("%Y%m%d-%H%M%S") + LOG_EXTENSION)
+            recorder = InputRecorder(record_path, grid, cooldown_duration)
+        except OSError as e:
+            print("Error starting input recording:", e)
+
+    # Game state (spawn, enemies, physics) lives in the headless simulation;
+    # this function only feeds it input and draws it. Enemy pathfinding runs
+    # on a worker thread unless the session has to be reproducible
+    if replay:
+        world = replay.new_world(profiler)
+    else:
+        world = World(grid, cooldown_duration, profiler, threaded_pathfinding=recorder is None)
 
     # Initialize window
     screen_width = int(800 * 1.5)
     screen_height = int(600 * 1.5)
     title = game_name_var.get().strip() or "Preview"
+    # Colors, texts and lighting are read from Tk once; the loop never touches Tk
+    settings = RenderSettings({
+        "sky_color": sky_color_hex,
+        "sun_color": sun_color_hex,
+        "win_message": win_message_var.get(),
+        "win_message_color": win_message_color_var.get(),
+        "main_menu_bg_mode": main_menu_bg_mode.get(),
+        "main_menu_bg_color": main_menu_bg_color.get(),
+        "main_menu_alignment": main_menu_alignment.get(),
+        "main_menu_title": main_menu_title_var.get(),
+        "main_menu_title_color": main_menu_title_color.get(),
+        "main_menu_button1": main_menu_button1_var.get(),
+        "main_menu_button2": main_menu_button2_var.get(),
+        "main_menu_button3": main_menu_button3_var.get(),
+        "main_menu_button1_color": main_menu_button1_color.get(),
+        "main_menu_button2_color": main_menu_button2_color.get(),
+        "main_menu_button3_color": main_menu_button3_color.get(),
+    }, *level_grid.shape, root.winfo_rgb)
     rl.init_window(screen_width, screen_height, title)
     rl.init_audio_device()
     rl.enable_cursor()
-    rl.set_target_fps(60)
+    # Replays run uncapped so their frame times measure the build, not vsync
+    rl.set_target_fps(0 if replay else 60)
 
-    # Load assets through media system
-    wall_model_path = load_asset("wall.obj") or "wall.obj"
-    model = rl.load_model(wall_model_path)
+    # Horizontal field of view of the preview camera, plus a margin for culling
+    camera_fovy = 60.0
+    half_fovy = math.radians(camera_fovy) / 2
+    view_fov = 2 * math.atan(math.tan(half_fovy) * screen_width / screen_height) + math.radians(10)
 
-    wall_tex = rl.load_texture(load_asset(wall_texture_path)) if wall_texture_path else None
-    ground_tex = rl.load_texture(load_asset(ground_texture_path)) if ground_texture_path else None
-    bg_texture = rl.load_texture(load_asset(main_menu_bg_image_path)) if main_menu_bg_image_path and main_menu_bg_mode.get() == "image" else None
-    handgun_idle_tex = rl.load_texture(load_asset(handgun_idle_path)) if handgun_idle_path else None
-    handgun_shoot_tex = rl.load_texture(load_asset(handgun_shoot_path)) if handgun_shoot_path else None
-    enemy_model = rl.load_model(load_asset(enemy_model_path)) if enemy_model_path else None
-    enemy_idle_tex = rl.load_texture(load_asset(enemy_idle_path)) if enemy_idle_path else None
-    enemy_shot_tex = rl.load_texture(load_asset(enemy_shot_path)) if enemy_shot_path else None
+    # Load assets through media system (decoded assets are kept between sessions)
+    resources.begin_session()
+    resources.use_manifest(load_map_manifest(COOKED_DIR, map_file_path))
+    wall_model_path = load_asset("wall.obj") or "wall.obj"
+    model = resources.model(wall_model_path)
+
+    wall_tex = resources.texture(preview_asset(wall_texture_path), mipmapped=True) if wall_texture_path else None
+    ground_tex = resources.texture(preview_asset(ground_texture_path), mipmapped=True) if ground_texture_path else None
+    bg_texture = resources.texture(preview_asset(main_menu_bg_image_path)) if main_menu_bg_image_path and settings.menu_bg_mode == "image" else None
+    handgun_idle_tex = resources.texture(preview_asset(handgun_idle_path)) if handgun_idle_path else None
+    handgun_shoot_tex = resources.texture(preview_asset(handgun_shoot_path)) if handgun_shoot_path else None
+    enemy_model = resources.model(preview_asset(enemy_model_path)) if enemy_model_path else None
+    enemy_idle_tex = resources.texture(preview_asset(enemy_idle_path), mipmapped=True) if enemy_idle_path else None
+    enemy_shot_tex = resources.texture(preview_asset(enemy_shot_path), mipmapped=True) if enemy_shot_path else None
+
+    # Merge the static ground and walls into one mesh per material; large maps
+    # only mesh the chunks around the player, in the background
+    if level_grid.size >= STREAM_MIN_CELLS:
+        streamer = ChunkStreamer(grid_region_reader(level_grid), *level_grid.shape)
+        level = LevelRenderer(level_grid, STREAM_CHUNK_SIZE, streamer)
+    else:
+        # A cook of this exact grid (python -m rayengine.cook) saves meshing it
+        level = LevelRenderer(level_grid, chunk_arrays=find_cooked_level(COOKED_DIR, level_grid))
+    visibility = VisibilityPass(world.walls.solid, level.chunk_size, view_fov)
+    enemy_renderer = EnemyRenderer(enemy_model, enemy_idle_tex, enemy_shot_tex)
+    uniforms = UniformCache(model.materials[0].shader)
+    menu = MenuCache(settings, bg_texture)
 
     # Load sound
-    sound_path = load_asset(handgun_shoot_sound_path) if handgun_shoot_sound_path else None
-    handgun_shoot_sound = pygame.mixer.Sound(sound_path) if sound_path else None
-
-    # Create enemies
-    enemies = []
-    for i in range(ROWS):
-        for j in range(COLS):
-            if grid[i][j] == 3:
-                enemies.append({
-                    'pos': Vector3(j + 0.5, 0, i + 0.5),
-                    'hit_count': 0,
-                    'state': 'idle',
-                    'state_timer': 0.0
-                })
-
-    # Game settings
-    cooldown_duration = shot_delay_var.get()
-    shoot_display_duration = 0.15
-    last_shot_time = -cooldown_duration
-    shot_display_timer = 0.0
-
-    player_radius = 0.3
-    player_height = 1.8
-    base_speed = 3.0
-    run_multiplier = 2.0
-    jump_impulse = 5.0
-    gravity = 9.8
-    mouse_sensitivity = 0.005
-
-    camera_pos = Vector3(spawn_col + 0.5, 0, spawn_row + 0.5)
-    camera_vel = Vector3(0, 0, 0)
-    yaw = 0.0
-    pitch = 0.0
-
-    game_state = "menu"
+    sound_path = preview_asset(handgun_shoot_sound_path)
+    handgun_shoot_sound = resources.sound(sound_path)
+    resources.print_report()
+
+    game_state = "game" if replay else "menu"
     cursor_locked = False
+    replay_frame = 0
+    frame_times = []
 
     # Main game loop
     while not rl.window_should_close():
         dt = rl.get_frame_time()
-        current_time = rl.get_time()
-
-        # Shooting logic
-        if rl.is_mouse_button_pressed(rl.MOUSE_LEFT_BUTTON) and (current_time - last_shot_time >= cooldown_duration):
-            last_shot_time = current_time
-            shot_display_timer = shoot_display_duration
-            if handgun_shoot_sound:
-                handgun_shoot_sound.play()
-
-        if shot_display_timer > 0:
-            shot_display_timer -= dt
 
         # Game state management
         if game_state == "menu":
@@ -320,257 +608,124 @@ def preview():
                 rl.enable_cursor()
                 cursor_locked = False
 
-            # Draw menu
+            # Draw the cached menu; it is only re-rendered when the window size changes
+            menu.update(rl.get_screen_width(), rl.get_screen_height())
             rl.begin_drawing()
-            if main_menu_bg_mode.get() == "color":
-                rl.clear_background(hex_to_color(main_menu_bg_color.get()))
-            elif main_menu_bg_mode.get() == "image" and bg_texture:
-                rl.clear_background(rl.RAYWHITE)
-                rl.draw_texture(bg_texture, 0, 0, rl.WHITE)
-            else:
-                rl.clear_background(rl.RAYWHITE)
-            
-            # Menu text and buttons
-            title_text = main_menu_title_var.get() or "My Game"
-            button1_text = main_menu_button1_var.get() or "Start Game"
-            button2_text = main_menu_button2_var.get() or "Options"
-            button3_text = main_menu_button3_var.get() or "Exit"
-
-            align = main_menu_alignment.get()
-            title_font_size = 40
-            title_width = rl.measure_text(title_text, title_font_size)
-            
-            if align == "left":
-                title_x = 50
-                button_x = 50
-            elif align == "right":
-                title_x = screen_width - title_width - 50
-                button_x = screen_width - 200 - 50
-            else:
-                title_x = (screen_width - title_width) // 2
-                button_x = (screen_width - 200) // 2
-
-            rl.draw_text(title_text, title_x, screen_height // 4, title_font_size, hex_to_color(main_menu_title_color.get()))
-
-            button_width = 200
-            button_height = 50
-            button_spacing = 20
-            
-            btn1_y = screen_height // 2 - button_height - button_spacing
-            btn2_y = screen_height // 2
-            btn3_y = screen_height // 2 + button_height + button_spacing
-
-            # Draw buttons
-            rl.draw_rectangle(button_x, btn1_y, button_width, button_height, rl.LIGHTGRAY)
-            btn1_text_width = rl.measure_text(button1_text, 20)
-            rl.draw_text(button1_text, 
-                         button_x + (button_width - btn1_text_width) // 2,
-                         btn1_y + (button_height - 20) // 2, 
-                         20, hex_to_color(main_menu_button1_color.get()))
-
-            rl.draw_rectangle(button_x, btn2_y, button_width, button_height, rl.LIGHTGRAY)
-            btn2_text_width = rl.measure_text(button2_text, 20)
-            rl.draw_text(button2_text, 
-                         button_x + (button_width - btn2_text_width) // 2,
-                         btn2_y + (button_height - 20) // 2, 
-                         20, hex_to_color(main_menu_button2_color.get()))
-
-            rl.draw_rectangle(button_x, btn3_y, button_width, button_height, rl.LIGHTGRAY)
-            btn3_text_width = rl.measure_text(button3_text, 20)
-            rl.draw_text(button3_text, 
-                         button_x + (button_width - btn3_text_width) // 2,
-                         btn3_y + (button_height - 20) // 2, 
-                         20, hex_to_color(main_menu_button3_color.get()))
+            menu.draw()
 
             # Check button clicks
             if rl.is_mouse_button_pressed(rl.MOUSE_LEFT_BUTTON):
                 mouse_pos = rl.get_mouse_position()
-                if (button_x <= mouse_pos.x <= button_x + button_width):
-                    if btn1_y <= mouse_pos.y <= btn1_y + button_height:
-                        game_state = "game"
-                        rl.disable_cursor()
-                        cursor_locked = True
-                    elif btn2_y <= mouse_pos.y <= btn2_y + button_height:
-                        print("Options selected (not implemented)")
-                    elif btn3_y <= mouse_pos.y <= btn3_y + button_height:
-                        break
+                button = menu.button_at(mouse_pos.x, mouse_pos.y)
+                if button == 0:
+                    game_state = "game"
+                    rl.disable_cursor()
+                    cursor_locked = True
+                elif button == 1:
+                    print("Options selected (not implemented)")
+                elif button == 2:
+                    break
 
             rl.end_drawing()
 
         elif game_state == "game":
-            # Handle input
-            if rl.is_key_pressed(rl.KeyboardKey.KEY_ESCAPE):
-                game_state = "menu"
-                rl.enable_cursor()
-                cursor_locked = False
-
-            # Camera movement
-            mouse_delta = rl.get_mouse_delta()
-            yaw -= mouse_delta.x * mouse_sensitivity
-            pitch -= mouse_delta.y * mouse_sensitivity
-            pitch = max(min(pitch, 1.4), -1.4)
-            
-            # Calculate movement vectors
-            forward = Vector3(math.sin(yaw) * math.cos(pitch),
-                             math.sin(pitch),
-                             math.cos(yaw) * math.cos(pitch))
-            forward = rl.vector3_normalize(forward)
-            
+            if rl.is_key_pressed(rl.KeyboardKey.KEY_F3):
+                show_profiler = not show_profiler
+                profiler.enabled = show_profiler or bool(replay)
+            profiler.begin_frame()
+
+            if replay:
+                # Frame time and input come from the log; the real frame time is measured
+                if replay_frame == len(replay.frames):
+                    break
+                if replay_frame:
+                    frame_times.append(dt)
+                dt, inputs = replay.frames[replay_frame]
+                replay_frame += 1
+            else:
+                # Handle input
+                if rl.is_key_pressed(rl.KeyboardKey.KEY_ESCAPE):
+                    game_state = "menu"
+                    rl.enable_cursor()
+                    cursor_locked = False
+
+                # Sample this frame's input
+                mouse_delta = rl.get_mouse_delta()
+                inputs = FrameInput(
+                    forward=rl.is_key_down(rl.KeyboardKey.KEY_W),
+                    back=rl.is_key_down(rl.KeyboardKey.KEY_S),
+                    left=rl.is_key_down(rl.KeyboardKey.KEY_A),
+                    right=rl.is_key_down(rl.KeyboardKey.KEY_D),
+                    run=rl.is_key_down(rl.KeyboardKey.KEY_LEFT_SHIFT),
+                    jump=rl.is_key_pressed(rl.KeyboardKey.KEY_SPACE),
+                    shoot=rl.is_mouse_button_pressed(rl.MOUSE_LEFT_BUTTON),
+                    mouse_dx=mouse_delta.x,
+                    mouse_dy=mouse_delta.y
+                )
+                if recorder:
+                    # Step with the logged values so a replay matches exactly
+                    dt, inputs = recorder.record(dt, inputs)
+
+            # Advance the simulation in fixed ticks
+            profiler.mark("input")
+            world.step(dt, inputs)
+
+            for event in world.events:
+                if event == "shot" and handgun_shoot_sound:
+                    handgun_shoot_sound.play()
+            world.events.clear()
+
+            eye_x, eye_y, eye_z = world.eye_position(world.accumulator / TICK)
+            forward_x, forward_y, forward_z = world.forward()
             up = Vector3(0, 1, 0)
-            right = rl.vector3_cross_product(forward, up)
-            right = rl.vector3_normalize(right)
-
-            # Movement input
-            move = Vector3(0, 0, 0)
-            if rl.is_key_down(rl.KeyboardKey.KEY_W):
-                move = rl.vector3_add(move, forward)
-            if rl.is_key_down(rl.KeyboardKey.KEY_S):
-                move = rl.vector3_subtract(move, forward)
-            if rl.is_key_down(rl.KeyboardKey.KEY_A):
-                move = rl.vector3_subtract(move, right)
-            if rl.is_key_down(rl.KeyboardKey.KEY_D):
-                move = rl.vector3_add(move, right)
-                
-            if rl.vector3_length(move) > 0:
-                move = rl.vector3_normalize(move)
-                
-            speed = base_speed * (run_multiplier if rl.is_key_down(rl.KeyboardKey.KEY_LEFT_SHIFT) else 1.0)
-            move = rl.vector3_scale(move, speed)
-            
-            camera_vel.x = move.x
-            camera_vel.z = move.z
-
-            # Jumping
-            if rl.is_key_pressed(rl.KeyboardKey.KEY_SPACE) and (camera_pos.y <= 0.05):
-                camera_vel.y = jump_impulse
-            camera_vel.y -= gravity * dt
-
-            # Update position
-            camera_pos = rl.vector3_add(camera_pos, rl.vector3_scale(camera_vel, dt))
-            if camera_pos.y < 0:
-                camera_pos.y = 0
-                camera_vel.y = 0
-
-            # Collision detection
-            walls = [(i, j) for i in range(ROWS) for j in range(COLS) if grid[i][j] == 1]
-            if walls:
-                walls_np = np.array(walls)
-                px, pz = camera_pos.x, camera_pos.z
-                
-                closest_x = np.maximum(walls_np[:,1], np.minimum(px, walls_np[:,1] + 1))
-                closest_z = np.maximum(walls_np[:,0], np.minimum(pz, walls_np[:,0] + 1))
-                
-                dx = px - closest_x
-                dz = pz - closest_z
-                distances = np.sqrt(dx * dx + dz * dz)
-                
-                collision_indices = np.where(distances < player_radius)[0]
-                if collision_indices.size > 0:
-                    correction_factor = 0.5 if camera_pos.y > 0.05 else 1.0
-                    distances_fixed = np.where(distances == 0, 0.001, distances)
-                    
-                    penetration = player_radius - distances[collision_indices]
-                    corr_x = np.sum((dx[collision_indices] / distances_fixed[collision_indices]) * penetration * correction_factor)
-                    corr_z = np.sum((dz[collision_indices] / distances_fixed[collision_indices]) * penetration * correction_factor)
-                    
-                    camera_pos.x += corr_x
-                    camera_pos.z += corr_z
-
-            # Shooting enemies
-            if rl.is_mouse_button_pressed(rl.MOUSE_LEFT_BUTTON) and (current_time - last_shot_time < 0.1):
-                ray_origin = Vector3(camera_pos.x, camera_pos.y + player_height * 0.5, camera_pos.z)
-                for enemy in enemies[:]:
-                    if ray_intersect_sphere(ray_origin, forward, enemy['pos'], 0.5):
-                        enemy['hit_count'] += 1
-                        enemy['state'] = 'shot'
-                        enemy['state_timer'] = 0.5
-                        if enemy['hit_count'] >= 2:
-                            enemies.remove(enemy)
-
-            # Update enemy states
-            for enemy in enemies:
-                if enemy['state'] == 'shot':
-                    enemy['state_timer'] -= dt
-                    if enemy['state_timer'] <= 0:
-                        enemy['state'] = 'idle'
 
             # Setup camera
-            eye_level = player_height * 0.5
             camera = rl.Camera3D(
-                position=Vector3(camera_pos.x, camera_pos.y + eye_level, camera_pos.z),
-                target=Vector3(camera_pos.x + forward.x, camera_pos.y + forward.y + eye_level, camera_pos.z + forward.z),
+                position=Vector3(eye_x, eye_y, eye_z),
+                target=Vector3(eye_x + forward_x, eye_y + forward_y, eye_z + forward_z),
                 up=up,
-                fovy=60.0,
+                fovy=camera_fovy,
                 projection=rl.CameraProjection.CAMERA_PERSPECTIVE
             )
 
             # Draw 3D scene
             rl.begin_drawing()
-            rl.clear_background(hex_to_color(sky_color_hex))
+            rl.clear_background(settings.sky_color)
             
             rl.begin_mode3d(camera)
             
             # Draw sun
-            sun_position = Vector3(COLS * 1.5, 10, -COLS * 0.5)
-            center = Vector3(COLS / 2, 0, ROWS / 2)
-            light_dir = rl.vector3_normalize(rl.vector3_subtract(center, sun_position))
-            
-            shader = model.materials[0].shader
-            lightPosLoc = rl.get_shader_location(shader, "light.position")
-            if lightPosLoc != -1:
-                rl.set_shader_value(shader, lightPosLoc, [light_dir.x, light_dir.y, light_dir.z], rl.SHADER_UNIFORM_VEC3)
-            
-            rl.draw_sphere(sun_position, 1.0, hex_to_color(sun_color_hex))
+            uniforms.set("light.position", settings.light_dir, rl.SHADER_UNIFORM_VEC3)
+            rl.draw_sphere(settings.sun_position, 1.0, settings.sun_color)
+
+            # Find the potentially visible cells; only those chunks and enemies are drawn
+            visibility.update(eye_x, eye_z, world.yaw, eye_y)
+            level.stream(eye_x, eye_z)
 
             # Draw ground and walls
-            for i in range(ROWS):
-                for j in range(COLS):
-                    pos = Vector3(j + 0.5, 0.05, i + 0.5)
-                    scale = Vector3(1.0, 0.1, 1.0)
-                    
-                    if grid[i][j] != 1:
-                        if ground_tex:
-                            model.materials[0].maps[rl.MATERIAL_MAP_DIFFUSE].texture = ground_tex
-                        rl.draw_model_ex(model, pos, Vector3(0, 1, 0), 0.0, scale, rl.WHITE)
-                    else:
-                        pos.y = 0.5
-                        scale.y = 1.0
-                        if wall_tex:
-                            model.materials[0].maps[rl.MATERIAL_MAP_DIFFUSE].texture = wall_tex
-                        rl.draw_model_ex(model, pos, Vector3(0, 1, 0), 0.0, scale, rl.WHITE)
+            level.draw(model.materials[0], {"ground": ground_tex, "wall": wall_tex}, visibility.chunks)
+            drawn_count = level.draw_calls
+            culled_count = level.culled_calls
 
             # Draw spawn point
-            rl.draw_cube(Vector3(spawn_col + 0.5, 0.5, spawn_row + 0.5), 0.5, 0.5, 0.5, rl.GREEN)
+            rl.draw_cube(Vector3(world.spawn_col + 0.5, 0.5, world.spawn_row + 0.5), 0.5, 0.5, 0.5, rl.GREEN)
 
-            # Draw enemies
-            for enemy in enemies:
-                if enemy_model:
-                    enemy_angle = math.degrees(math.atan2(camera_pos.x - enemy['pos'].x, 
-                                                       camera_pos.z - enemy['pos'].z)) + 180
-                    
-                    if enemy['state'] == 'shot' and enemy_shot_tex:
-                        enemy_model.materials[0].maps[rl.MATERIAL_MAP_DIFFUSE].texture = enemy_shot_tex
-                    elif enemy_idle_tex:
-                        enemy_model.materials[0].maps[rl.MATERIAL_MAP_DIFFUSE].texture = enemy_idle_tex
-                        
-                    rl.draw_model_ex(
-                        enemy_model, 
-                        Vector3(enemy['pos'].x, 0.5, enemy['pos'].z),
-                        Vector3(0, 1, 0), 
-                        enemy_angle, 
-                        Vector3(1.0, 1.0, 1.0), 
-                        rl.WHITE
-                    )
-                else:
-                    rl.draw_cube(Vector3(enemy['pos'].x, 0.5, enemy['pos'].z), 1.0, 1.0, 1.0, rl.RED)
+            # Draw enemies, batched by texture (culling is computed for all of them at once)
+            enemies = world.enemies
+            visible = visibility.are_visible(enemies.positions[:, 0], enemies.positions[:, 2])
+            visible_indices = np.flatnonzero(visible)
+            culled_count += len(enemies) - len(visible_indices)
+            drawn_count += len(visible_indices)
+            enemy_renderer.draw(camera, enemies, visible_indices, eye_x, eye_z)
 
             rl.end_mode3d()
+            profiler.mark("draw3d")
 
             # Draw HUD
             handgun_x = (screen_width - 416) // 2
             handgun_y = screen_height - 416
             
-            if shot_display_timer > 0 and handgun_shoot_tex:
+            if world.shot_display_timer > 0 and handgun_shoot_tex:
                 rl.draw_texture(handgun_shoot_tex, handgun_x, handgun_y, rl.WHITE)
             elif handgun_idle_tex:
                 rl.draw_texture(handgun_idle_tex, handgun_x, handgun_y, rl.WHITE)
@@ -578,36 +733,75 @@ def preview():
             # Draw FPS and controls
             fps = rl.get_fps()
             rl.draw_text(f"FPS: {fps}", screen_width - 100, 10, 20, rl.MAROON)
+            cull_text = (f"Drawn: {drawn_count} | Culled: {culled_count} | Level tris: {level.triangles} | "
+                         f"Enemy draws: {enemy_renderer.draw_calls} | Binds: {enemy_renderer.texture_binds}")
+            rl.draw_text(cull_text, screen_width - 120 - rl.measure_text(cull_text, 20), 10, 20, rl.MAROON)
             rl.draw_text("WASD: Move | SHIFT: Run | SPACE: Jump | ESC: Menu", 
                          10, 10, 20, rl.MAROON)
             
             # Draw win message if all enemies defeated
-            if not enemies:
-                win_text = win_message_var.get() or "YOU WIN!"
+            if not world.enemies:
+                win_text = settings.win_text
                 font_size = 50
                 text_width = rl.measure_text(win_text, font_size)
-                win_color = hex_to_color(win_message_color_var.get()) if win_message_color_var else rl.GREEN
+                win_color = settings.win_color
                 rl.draw_text(win_text, 
                             (screen_width - text_width) // 2,
                             (screen_height - font_size) // 2,
                             font_size, win_color)
+
+            # Profiler overlay, refreshed a few times a second
+            if show_profiler:
+                if not profiler_lines or profiler.count % PROFILER_REFRESH_FRAMES == 0:
+                    profiler_lines = profiler.overlay_lines()
+                rl.draw_rectangle(5, 35, 200, 20 * len(profiler_lines) + 10, rl.fade(rl.BLACK, 0.6))
+                for i, line in enumerate(profiler_lines):
+                    rl.draw_text(line, 10, 40 + 20 * i, 20, rl.GREEN)
+            profiler.mark("hud")
             
             rl.end_drawing()
+            profiler.end_frame("present")
+
+    if recorder:
+        recorder.close()
+        print(f"Input recorded to {recorder.path} ({recorder.frames} frames)")
+    if replay:
+        print_replay_report(world, frame_times, f"Replay of {os.path.basename(replay.path)}")
+    if profiler.count:
+        try:
+            os.makedirs(PROFILES_DIR, exist_ok=True)
+            profile_path = os.path.join(PROFILES_DIR, time.strftime("%Y%m%d-%H%M%S") + ".csv")
+            profiler.export_csv(profile_path)
+            print(f"Frame profile written to {profile_path}")
+        except OSError as e:
+            print("Error writing frame profile:", e)
 
     # Clean up
-    rl.unload_model(model)
-    if wall_tex: rl.unload_texture(wall_tex)
-    if ground_tex: rl.unload_texture(ground_tex)
-    if bg_texture: rl.unload_texture(bg_texture)
-    if handgun_idle_tex: rl.unload_texture(handgun_idle_tex)
-    if handgun_shoot_tex: rl.unload_texture(handgun_shoot_tex)
-    if enemy_idle_tex: rl.unload_texture(enemy_idle_tex)
-    if enemy_shot_tex: rl.unload_texture(enemy_shot_tex)
-    if enemy_model: rl.unload_model(enemy_model)
+    world.close()
+    level.unload()
+    enemy_renderer.unload()
+    menu.unload()
+    resources.end_session()
     
     rl.close_audio_device()
     rl.close_window()
 
+def replay_input_log():
+    """Play a recorded input log back in the preview, on the map it was recorded with"""
+    file_path = filedialog.askopenfilename(
+        initialdir=RECORDINGS_DIR,
+        filetypes=[("Input Logs", "*" + LOG_EXTENSION), ("All Files", "*.*")],
+        title="Replay Input Log"
+    )
+    if not file_path:
+        return
+    try:
+        log = InputLog(file_path)
+    except Exception as e:
+        print("Error loading input log:", e)
+        return
+    preview(replay=log)
+
 # ------------------------------------------------------------------------------
 # Asset Selection Functions
 # ------------------------------------------------------------------------------
@@ -632,12 +826,7 @@ def choose_wall_texture():
     if file_path:
         wall_texture_path = copy_to_media(file_path)
         try:
-            if Image:
-                img = Image.open(wall_texture_path)
-                img = img.resize((CELL_SIZE, CELL_SIZE), Image.Resampling.LANCZOS)
-                wall_texture_img = ImageTk.PhotoImage(img)
-            else:
-                wall_texture_img = tk.PhotoImage(file=wall_texture_path)
+            wall_texture_img = load_thumbnail(wall_texture_path, CELL_SIZE)
             redraw_grid()
         except Exception as e:
             print("Error loading wall texture:", e)
@@ -652,12 +841,7 @@ def choose_ground_texture():
     if file_path:
         ground_texture_path = copy_to_media(file_path)
         try:
-            if Image:
-                img = Image.open(ground_texture_path)
-                img = img.resize((CELL_SIZE, CELL_SIZE), Image.Resampling.LANCZOS)
-                ground_texture_img = ImageTk.PhotoImage(img)
-            else:
-                ground_texture_img = tk.PhotoImage(file=ground_texture_path)
+            ground_texture_img = load_thumbnail(ground_texture_path, CELL_SIZE)
             redraw_grid()
         except Exception as e:
             print("Error loading ground texture:", e)
@@ -672,12 +856,7 @@ def choose_handgun_idle_image():
     if file_path:
         handgun_idle_path = copy_to_media(file_path)
         try:
-            if Image:
-                img = Image.open(handgun_idle_path)
-                img = img.resize((416, 416), Image.Resampling.LANCZOS)
-                handgun_idle_img = ImageTk.PhotoImage(img)
-            else:
-                handgun_idle_img = tk.PhotoImage(file=handgun_idle_path)
+            handgun_idle_img = load_thumbnail(handgun_idle_path, 416)
         except Exception as e:
             print("Error loading handgun idle image:", e)
             handgun_idle_img = None
@@ -691,12 +870,7 @@ def choose_handgun_shoot_image():
     if file_path:
         handgun_shoot_path = copy_to_media(file_path)
         try:
-            if Image:
-                img = Image.open(handgun_shoot_path)
-                img = img.resize((416, 416), Image.Resampling.LANCZOS)
-                handgun_shoot_img = ImageTk.PhotoImage(img)
-            else:
-                handgun_shoot_img = tk.PhotoImage(file=handgun_shoot_path)
+            handgun_shoot_img = load_thumbnail(handgun_shoot_path, 416)
         except Exception as e:
             print("Error loading handgun shoot image:", e)
             handgun_shoot_img = None
@@ -724,12 +898,7 @@ def choose_enemy_idle_image():
     if file_path:
         enemy_idle_path = copy_to_media(file_path)
         try:
-            if Image:
-                img = Image.open(enemy_idle_path)
-                img = img.resize((CELL_SIZE, CELL_SIZE), Image.Resampling.LANCZOS)
-                enemy_idle_img = ImageTk.PhotoImage(img)
-            else:
-                enemy_idle_img = tk.PhotoImage(file=enemy_idle_path)
+            enemy_idle_img = load_thumbnail(enemy_idle_path, CELL_SIZE)
             redraw_grid()
         except Exception as e:
             print("Error loading enemy idle image:", e)
@@ -744,12 +913,7 @@ def choose_enemy_shot_image():
     if file_path:
         enemy_shot_path = copy_to_media(file_path)
         try:
-            if Image:
-                img = Image.open(enemy_shot_path)
-                img = img.resize((CELL_SIZE, CELL_SIZE), Image.Resampling.LANCZOS)
-                enemy_shot_img = ImageTk.PhotoImage(img)
-            else:
-                enemy_shot_img = tk.PhotoImage(file=enemy_shot_path)
+            enemy_shot_img = load_thumbnail(enemy_shot_path, CELL_SIZE)
             redraw_grid()
         except Exception as e:
             print("Error loading enemy shot image:", e)
@@ -781,10 +945,13 @@ def choose_win_message_color():
 # ------------------------------------------------------------------------------
 # File Operations
 # ------------------------------------------------------------------------------
+MAP_FILETYPES = [("JSON Files", "*.json"), ("Binary Map Files", "*.rmap"), ("All Files", "*.*")]
+
 def save_map():
+    global map_file_path
     file_path = filedialog.asksaveasfilename(
         defaultextension=".json",
-        filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+        filetypes=MAP_FILETYPES,
         title="Save Map"
     )
     if file_path:
@@ -828,35 +995,47 @@ def save_map():
                 "main_menu_button3_color": main_menu_button3_color.get()
             }
 
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=2)
+            save_map_file(file_path, data)
+            map_file_path = file_path
         except Exception as e:
             print("Error saving map:", e)
 
+# Image assets of a map: map file key -> (path global, PhotoImage global, thumbnail size)
+MAP_IMAGE_ASSETS = {
+    "wall_texture": ("wall_texture_path", "wall_texture_img", CELL_SIZE),
+    "ground_texture": ("ground_texture_path", "ground_texture_img", CELL_SIZE),
+    "handgun_idle_texture": ("handgun_idle_path", "handgun_idle_img", 416),
+    "handgun_shoot_texture": ("handgun_shoot_path", "handgun_shoot_img", 416),
+    "enemy_idle_texture": ("enemy_idle_path", "enemy_idle_img", CELL_SIZE),
+    "enemy_shot_texture": ("enemy_shot_path", "enemy_shot_img", CELL_SIZE),
+}
+# Textures drawn on the editor grid (the grid is redrawn when they arrive)
+GRID_TEXTURES = {"wall_texture", "ground_texture", "enemy_idle_texture"}
+
 def load_map():
-    global grid, sky_color_hex, sun_color_hex
-    global wall_texture_path, ground_texture_path, wall_texture_img, ground_texture_img
-    global handgun_idle_path, handgun_shoot_path, handgun_idle_img, handgun_shoot_img
-    global handgun_shoot_sound, handgun_shoot_sound_path
-    global enemy_idle_path, enemy_shot_path, enemy_idle_img, enemy_shot_img, enemy_model_path
+    global sky_color_hex, sun_color_hex, asset_load_generation
+    global handgun_shoot_sound, handgun_shoot_sound_path, enemy_model_path
     global game_name_var, shot_delay_var, win_message_var, win_message_color_var
     global main_menu_title_var, main_menu_button1_var, main_menu_button2_var, main_menu_button3_var
     global main_menu_alignment, main_menu_bg_mode, main_menu_bg_color, main_menu_bg_image_path
     global main_menu_title_color, main_menu_button1_color, main_menu_button2_color, main_menu_button3_color
+    global map_file_path
 
     file_path = filedialog.askopenfilename(
         defaultextension=".json",
-        filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+        filetypes=MAP_FILETYPES,
         title="Load Map"
     )
     if file_path:
         try:
-            with open(file_path, "r") as f:
-                data = json.load(f)
+            # JSON or binary, detected from the file contents
+            data = load_map_file(file_path)
 
             if "grid" in data and "sky_color" in data:
                 # Load basic data
-                grid[:] = data["grid"]
+                new_grid = data["grid"]
+                if max(new_grid.shape) > MAX_MAP_SIZE:
+                    raise ValueError(f"map is larger than {MAX_MAP_SIZE}x{MAX_MAP_SIZE}")
                 sky_color_hex = data["sky_color"]
                 sun_color_hex = data.get("sun_color", "#FFFF00")
                 game_name_var.set(data.get("game_name", "Preview"))
@@ -879,60 +1058,33 @@ def load_map():
                 main_menu_button2_color.set(data.get("main_menu_button2_color", "black"))
                 main_menu_button3_color.set(data.get("main_menu_button3_color", "black"))
 
-                # Load all assets (copy to media dir if needed)
-                def load_asset_path(path):
-                    if not path:
-                        return None
-                    # First try to find in media dir
-                    media_path = get_media_path(path)
-                    if os.path.exists(media_path):
-                        return media_path
-                    # Then try original path (and copy to media)
-                    if os.path.exists(path):
-                        return copy_to_media(path)
-                    return None
-
-                wall_texture_path = load_asset_path(data.get("wall_texture"))
-                ground_texture_path = load_asset_path(data.get("ground_texture"))
-                handgun_idle_path = load_asset_path(data.get("handgun_idle_texture"))
-                handgun_shoot_path = load_asset_path(data.get("handgun_shoot_texture"))
-                handgun_shoot_sound_path = load_asset_path(data.get("handgun_shoot_sound"))
-                enemy_idle_path = load_asset_path(data.get("enemy_idle_texture"))
-                enemy_shot_path = load_asset_path(data.get("enemy_shot_texture"))
-                enemy_model_path = load_asset_path(data.get("enemy_model"))
-                main_menu_bg_image_path = load_asset_path(data.get("main_menu_bg_image"))
-
-                # Reload all textures
-                def reload_texture(path, cell_size=None):
-                    if not path:
-                        return None
-                    try:
-                        if Image:
-                            img = Image.open(path)
-                            if cell_size:
-                                img = img.resize((cell_size, cell_size), Image.Resampling.LANCZOS)
-                            return ImageTk.PhotoImage(img)
-                        return tk.PhotoImage(file=path)
-                    except Exception as e:
-                        print(f"Error loading texture {path}:", e)
-                        return None
-
-                wall_texture_img = reload_texture(wall_texture_path, CELL_SIZE)
-                ground_texture_img = reload_texture(ground_texture_path, CELL_SIZE)
-                handgun_idle_img = reload_texture(handgun_idle_path, 416)
-                handgun_shoot_img = reload_texture(handgun_shoot_path, 416)
-                enemy_idle_img = reload_texture(enemy_idle_path, CELL_SIZE)
-                enemy_shot_img = reload_texture(enemy_shot_path, CELL_SIZE)
-
-                # Reload sound
-                if handgun_shoot_sound_path:
-                    try:
-                        handgun_shoot_sound = pygame.mixer.Sound(handgun_shoot_sound_path)
-                    except Exception as e:
-                        print("Error loading handgun sound:", e)
-                        handgun_shoot_sound = None
-
-                redraw_grid()
+                # Show the grid right away with placeholder cells. Paths hold the
+                # map's references until their jobs resolve them, so saving
+                # meanwhile (or after a failed decode) keeps every reference
+                for key, (path_name, img_name, size) in MAP_IMAGE_ASSETS.items():
+                    globals()[path_name] = data.get(key)
+                    globals()[img_name] = None
+                handgun_shoot_sound_path = data.get("handgun_shoot_sound")
+                handgun_shoot_sound = None
+                enemy_model_path = data.get("enemy_model")
+                main_menu_bg_image_path = data.get("main_menu_bg_image")
+                set_grid(new_grid)
+                map_file_path = file_path
+
+                # Resolve (copy to media dir if needed) and decode assets in the
+                # background; textures fill in as they arrive
+                asset_load_generation += 1
+                for key, (path_name, img_name, size) in MAP_IMAGE_ASSETS.items():
+                    if data.get(key):
+                        submit_asset_job(apply_image_asset(path_name, img_name, key in GRID_TEXTURES),
+                                         decode_image_asset, data[key], size)
+                if data.get("handgun_shoot_sound"):
+                    submit_asset_job(apply_sound_asset, load_sound_asset, data["handgun_shoot_sound"])
+                if data.get("enemy_model"):
+                    submit_asset_job(apply_path_asset("enemy_model_path"), preview_asset, data["enemy_model"])
+                if data.get("main_menu_bg_image"):
+                    submit_asset_job(apply_path_asset("main_menu_bg_image_path"), preview_asset,
+                                     data["main_menu_bg_image"])
             else:
                 print("Invalid map file format")
         except Exception as e:
@@ -1106,9 +1258,20 @@ tk.Button(main_menu_frame, text="Load Main Menu", command=load_main_menu).pack(p
 canvas_frame = tk.Frame(main_frame)
 canvas_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-canvas = tk.Canvas(canvas_frame, width=COLS * CELL_SIZE, height=ROWS * CELL_SIZE, bg="white")
+canvas = tk.Canvas(canvas_frame, width=COLS * CELL_SIZE, height=ROWS * CELL_SIZE, bg="white",
+                   scrollregion=(0, 0, COLS * CELL_SIZE, ROWS * CELL_SIZE))
+canvas_xscroll = tk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL,
+                              command=lambda *args: scroll_canvas(canvas.xview, *args))
+canvas_yscroll = tk.Scrollbar(canvas_frame, orient=tk.VERTICAL,
+                              command=lambda *args: scroll_canvas(canvas.yview, *args))
+canvas.configure(xscrollcommand=canvas_xscroll.set, yscrollcommand=canvas_yscroll.set)
+canvas_xscroll.pack(side=tk.BOTTOM, fill=tk.X)
+canvas_yscroll.pack(side=tk.RIGHT, fill=tk.Y)
 canvas.pack(fill=tk.BOTH, expand=True)
 canvas.bind("<Button-1>", canvas_click)
+canvas.bind("<B1-Motion>", paint_cell)
+canvas.bind("<ButtonRelease-1>", canvas_release)
+canvas.bind("<Configure>", lambda event: update_visible_cells())
 
 # Right panel - Map Controls
 control_frame = tk.Frame(main_frame)
@@ -1122,6 +1285,17 @@ tk.Radiobutton(control_frame, text="Ground", variable=mode_var, value="ground").
 tk.Radiobutton(control_frame, text="Spawn", variable=mode_var, value="spawn").pack(anchor='nw')
 tk.Radiobutton(control_frame, text="Enemy", variable=mode_var, value="enemy").pack(anchor='nw')
 
+# Map size
+tk.Label(control_frame, text=f"Map Size (max {MAX_MAP_SIZE}):").pack(anchor='nw', pady=(10, 0))
+map_size_frame = tk.Frame(control_frame)
+map_size_frame.pack(anchor='nw', padx=5)
+map_rows_var = tk.IntVar(value=ROWS)
+map_cols_var = tk.IntVar(value=COLS)
+tk.Entry(map_size_frame, textvariable=map_rows_var, width=6).pack(side=tk.LEFT)
+tk.Label(map_size_frame, text="x").pack(side=tk.LEFT)
+tk.Entry(map_size_frame, textvariable=map_cols_var, width=6).pack(side=tk.LEFT)
+tk.Button(control_frame, text="Resize Map", command=resize_map).pack(pady=5, anchor='nw')
+
 # Game settings
 tk.Label(control_frame, text="Game Name:").pack(anchor='nw', pady=(10, 0))
 game_name_var = tk.StringVar(value="Preview")
@@ -1161,9 +1335,18 @@ tk.Button(control_frame, text="Choose Enemy Model", command=choose_enemy_model).
 
 # File operations
 tk.Button(control_frame, text="Test Preview", command=preview).pack(pady=5, anchor='nw')
+record_input_var = tk.BooleanVar(value=False)
+tk.Checkbutton(control_frame, text="Record Input", variable=record_input_var).pack(anchor='nw')
+tk.Button(control_frame, text="Replay Input Log", command=replay_input_log).pack(pady=5, anchor='nw')
 tk.Button(control_frame, text="Save Map", command=save_map).pack(pady=5, anchor='nw')
 tk.Button(control_frame, text="Load Map", command=load_map).pack(pady=5, anchor='nw')
 
+# Undo/redo
+for key in ("<Control-z>", "<Control-Z>"):
+    root.bind(key, undo_key)
+for key in ("<Control-y>", "<Control-Y>"):
+    root.bind(key, redo_key)
+
 # Initialize UI
 redraw_grid()
 root.mainloop()
@@ -0,0 +1,68 @@
+"""Per-frame player collision time against map size
+
+Compares the old full-grid wall scan from preview() with the WallIndex query.
+
+    python benchmarks/bench_collision.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_grid
+from rayengine.collision import WallIndex
+
+MAP_SIZES = [20, 64, 128, 256, 512]
+PLAYER_RADIUS = 0.3
+
+
+def full_scan_collision(grid, px, pz, radius):
+    """Collision as preview() used to do it: rebuild the wall list every frame"""
+    rows, cols = len(grid), len(grid[0])
+    walls = [(i, j) for i in range(rows) for j in range(cols) if grid[i][j] == 1]
+    if not walls:
+        return 0.0, 0.0
+    walls_np = np.array(walls)
+    closest_x = np.maximum(walls_np[:, 1], np.minimum(px, walls_np[:, 1] + 1))
+    closest_z = np.maximum(walls_np[:, 0], np.minimum(pz, walls_np[:, 0] + 1))
+    dx = px - closest_x
+    dz = pz - closest_z
+    distances = np.sqrt(dx * dx + dz * dz)
+    hits = np.where(distances < radius)[0]
+    if hits.size == 0:
+        return 0.0, 0.0
+    distances_fixed = np.where(distances == 0, 0.001, distances)
+    penetration = radius - distances[hits]
+    return (float(np.sum(dx[hits] / distances_fixed[hits] * penetration)),
+            float(np.sum(dz[hits] / distances_fixed[hits] * penetration)))
+
+
+def time_per_call(fn, positions):
+    """Average seconds per call of fn(x, z) over the given positions"""
+    start = time.perf_counter()
+    for x, z in positions:
+        fn(x, z)
+    return (time.perf_counter() - start) / len(positions)
+
+
+def main():
+    rng = np.random.default_rng(1)
+    print(f"{'map':>9} {'full scan (ms)':>15} {'index (ms)':>11}")
+    for size in MAP_SIZES:
+        # Nested lists, as preview() kept the grid before it became an array
+        grid = make_grid(size).tolist()
+        positions = rng.uniform(1, size - 1, size=(2000, 2))
+        index = WallIndex(grid)
+
+        scan_frames = max(2, 2000 // (size * size // 400))
+        scan = time_per_call(lambda x, z: full_scan_collision(grid, x, z, PLAYER_RADIUS),
+                             positions[:scan_frames])
+        indexed = time_per_call(lambda x, z: index.resolve(x, z, PLAYER_RADIUS), positions)
+        print(f"{size:>4}x{size:<4} {scan * 1000:>15.3f} {indexed * 1000:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""File size and load time of JSON versus binary maps
+
+    python benchmarks/bench_mapfile.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_map
+from rayengine.mapfile import load_map_file, save_binary_map, save_json_map
+
+MAP_SIZES = [100, 500, 2000]
+
+
+def time_load(path, repeat):
+    """Best-of-repeat load time in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load_map_file(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'map':>11} {'json size':>12} {'rmap size':>12} {'json load (ms)':>15} {'rmap load (ms)':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in MAP_SIZES:
+            data = make_map(size, 0.3, size * size // 100)
+            json_path = os.path.join(tmp, f"map{size}.json")
+            rmap_path = os.path.join(tmp, f"map{size}.rmap")
+            save_json_map(json_path, data)
+            save_binary_map(rmap_path, data)
+            assert np.array_equal(load_map_file(rmap_path)["grid"], data["grid"])
+
+            repeat = 5 if size < 1000 else 2
+            print(f"{size:>5}x{size:<5} {os.path.getsize(json_path):>12,} {os.path.getsize(rmap_path):>12,} "
+                  f"{time_load(json_path, repeat) * 1000:>15.1f} {time_load(rmap_path, repeat) * 1000:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
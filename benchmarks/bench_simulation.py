@@ -0,0 +1,49 @@
+"""Headless simulation throughput against map size
+
+Runs the fixed-timestep World without a window and reports ticks per second,
+i.e. how far ahead of real time the game logic can run.
+
+    python benchmarks/bench_simulation.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_grid
+from rayengine.simulation import TICK, TICK_RATE, FrameInput, World
+
+MAP_SIZES = [20, 64, 256, 512]
+ENEMY_COUNT = 50
+SECONDS = 10
+
+
+def run(grid, seconds):
+    """Simulate walking, turning and shooting for the given game time"""
+    world = World(grid, 0.2)
+    frames = seconds * TICK_RATE
+    start = time.perf_counter()
+    for frame in range(frames):
+        inputs = FrameInput(
+            forward=True,
+            run=frame % 120 < 60,
+            jump=frame % 90 == 0,
+            shoot=frame % 15 == 0,
+            mouse_dx=4.0
+        )
+        world.step(TICK, inputs)
+        world.events.clear()
+    elapsed = time.perf_counter() - start
+    return world.ticks / elapsed
+
+
+def main():
+    print(f"{'map':>10} {'ticks/s':>12} {'x realtime':>12}")
+    for size in MAP_SIZES:
+        rate = run(make_grid(size, 0.2, ENEMY_COUNT), SECONDS)
+        print(f"{size:>4}x{size:<5} {rate:>12.0f} {rate / TICK_RATE:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""Benchmark suite for the engine's headless hot paths
+
+Times wall collision, hit testing, enemy updates, flow-field pathfinding,
+level meshing, grid scans, map serialization, map analysis and media imports
+on seeded synthetic maps from 20x20 to 1024x1024 with 10 to 10,000 enemies,
+and writes the results as JSON. With --compare, the run is checked
+against a stored baseline and the exit status is 1 if anything regressed.
+
+    python benchmarks/run.py                                 # full suite
+    python benchmarks/run.py --quick --filter collision      # subset
+    python benchmarks/run.py --out baseline.json
+    python benchmarks/run.py --compare baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import ENEMY, GROUND, SPAWN, WALL, make_grid, make_map
+from rayengine.analyze import analyze_map
+from rayengine.collision import WallIndex
+from rayengine.enemies import SHOT, EnemyManager
+from rayengine.level_mesh import build_chunk, chunk_keys
+from rayengine.mapfile import MapChunkReader, load_map_file, save_binary_map, save_json_map
+from rayengine.media_store import MediaStore
+from rayengine.pathfinding import FlowField
+from rayengine.simulation import MAX_PITCH, PLAYER_RADIUS, TICK, World
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+RESULTS_VERSION = 1
+
+MAP_SIZES = [20, 64, 256, 1024]
+QUICK_MAP_SIZES = [20, 256]
+ENEMY_COUNTS = [10, 100, 1000, 10000]
+QUICK_ENEMY_COUNTS = [10, 1000]
+DENSITIES = [0.1, 0.3]
+MEDIA_FILES = 16
+MEDIA_FILE_BYTES = 64 * 1024
+
+REPEAT = 7
+MIN_SAMPLE_TIME = 0.02
+
+
+# ------------------------------------------------------------------------------
+# Timing
+# ------------------------------------------------------------------------------
+def measure(fn, setup=None, repeat=REPEAT):
+    """Seconds per call of fn, one value per sample. Without setup, each sample
+    loops fn long enough to be measurable; with setup, setup() runs untimed
+    before every single call"""
+    if setup:
+        samples = []
+        for _ in range(repeat):
+            setup()
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    fn()  # warm up caches and lazy allocations
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_TIME:
+            break
+        number *= 2 if elapsed <= 0 else max(2, math.ceil(MIN_SAMPLE_TIME / elapsed))
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+# ------------------------------------------------------------------------------
+# Cases
+# ------------------------------------------------------------------------------
+# Each case generator yields (name, prepare). prepare() does the case's setup
+# and returns (fn, setup, ops), so cases left out by --filter cost nothing;
+# times are reported per op, e.g. per collision query rather than per batch.
+def collision_cases(sizes, enemy_counts, workdir):
+    """WallIndex.resolve, as the World does once per tick"""
+    for size in sizes:
+        for density in DENSITIES:
+            def prepare(size=size, density=density):
+                index = WallIndex(make_grid(size, density))
+                positions = np.random.default_rng(1).uniform(1, size - 1, size=(256, 2)).tolist()
+
+                def run():
+                    for x, z in positions:
+                        index.resolve(x, z, PLAYER_RADIUS)
+
+                return run, None, len(positions)
+
+            yield f"collision/{size}x{size}/density={density}", prepare
+
+
+def hit_test_cases(sizes, enemy_counts, workdir):
+    """One shot against every enemy (World.hitscan). Neither variant hits, so
+    the state (and the work per shot) stays the same between calls"""
+    size = 256
+    mid = size // 2
+    for count in enemy_counts:
+        for variant, pitch in (("sky", MAX_PITCH), ("occluded", 0.0)):
+            def prepare(count=count, pitch=pitch):
+                grid = make_grid(size, 0.1, count)
+                # Straight ahead of the spawn (+z): open floor, a wall, then an enemy
+                grid[mid + 1:mid + 20, mid] = GROUND
+                grid[mid + 20, mid] = WALL
+                grid[mid + 30, mid] = ENEMY
+                world = World(grid, 0.0)
+                enemies = len(world.enemies)
+
+                def run():
+                    world.pitch = pitch
+                    world.last_shot_time = -math.inf
+                    world.shoot()
+                    world.events.clear()
+
+                run()
+                assert len(world.enemies) == enemies and not world.enemies.hits.any()
+                return run, None, 1
+
+            yield f"hit_test/{variant}/enemies={count}", prepare
+
+
+def enemy_update_cases(sizes, enemy_counts, workdir):
+    """Per-frame enemy work: state timers for one tick and facing angles"""
+    for count in enemy_counts:
+        def prepare(count=count):
+            enemies = EnemyManager.from_grid(make_grid(256, 0.1, count))
+
+            def run():
+                # Keep everyone in the 'shot' state so the timers are always updated
+                enemies.states[:] = SHOT
+                enemies.timers[:] = 1.0
+                enemies.update(TICK)
+                enemies.facing_angles(128.5, 128.5)
+
+            return run, None, 1
+
+        yield f"enemy_update/enemies={count}", prepare
+
+
+def pathfinding_cases(sizes, enemy_counts, workdir):
+    """Flow-field builds on large maps (once per player cell change) and one
+    tick of every enemy following the field"""
+    size = 512
+    for density in DENSITIES:
+        def prepare(density=density):
+            solid = make_grid(size, density) == WALL
+            return lambda: FlowField.build(solid, size // 2, size // 2), None, 1
+
+        yield f"flow_field/{size}x{size}/density={density}", prepare
+
+    for count in enemy_counts:
+        def prepare(count=count):
+            field = FlowField.build(make_grid(256, 0.1) == WALL, 128, 128)
+            enemies = EnemyManager.from_grid(make_grid(256, 0.1, count))
+            start = enemies.positions.copy()
+
+            def run():
+                enemies.positions[:] = start
+                enemies.chase(field, 128.5, 128.5, TICK)
+
+            return run, None, 1
+
+        yield f"enemy_chase/enemies={count}", prepare
+
+
+def level_mesh_cases(sizes, enemy_counts, workdir):
+    """Meshing every chunk of a map (greedy walls and ground runs), as the
+    level renderer does on load"""
+    for size in sizes:
+        if size > 256:
+            continue
+
+        def prepare(size=size):
+            grid = make_grid(size, 0.3)
+            keys = chunk_keys(size, size)
+
+            def run():
+                for key in keys:
+                    build_chunk(grid, key)
+
+            return run, None, len(keys)
+
+        yield f"level_mesh/{size}x{size}/density=0.3", prepare
+
+
+def grid_scan_cases(sizes, enemy_counts, workdir):
+    """Spawn and enemy searches done when a preview starts"""
+    for size in sizes:
+        count = min(max(enemy_counts), size * size // 10)
+
+        def prepare(size=size, count=count):
+            grid = make_grid(size, 0.3, count)
+
+            def run():
+                np.argwhere(grid == SPAWN)
+                np.argwhere(grid == ENEMY)
+
+            return run, None, 1
+
+        yield f"grid_scan/{size}x{size}/enemies={count}", prepare
+
+
+def mapfile_cases(sizes, enemy_counts, workdir):
+    """save_map / load_map in both formats, and reading part of a binary map"""
+    maps = {}
+
+    def saved_map(size, fmt):
+        """Map data of a size, and its file in the given format"""
+        if size not in maps:
+            maps[size] = make_map(size, 0.3, min(1000, size * size // 10))
+        path = os.path.join(workdir, f"map{size}.{fmt}")
+        if not os.path.exists(path):
+            (save_json_map if fmt == "json" else save_binary_map)(path, maps[size])
+        return maps[size], path
+
+    for size in sizes:
+        for fmt, save in (("json", save_json_map), ("rmap", save_binary_map)):
+            def prepare_save(size=size, fmt=fmt, save=save):
+                data, path = saved_map(size, fmt)
+                return lambda: save(path, data), None, 1
+
+            def prepare_load(size=size, fmt=fmt):
+                data, path = saved_map(size, fmt)
+                return lambda: load_map_file(path), None, 1
+
+            yield f"map_save/{fmt}/{size}x{size}", prepare_save
+            yield f"map_load/{fmt}/{size}x{size}", prepare_load
+
+        # Opening a binary map and reading the cells around one point, as streaming does
+        def prepare_read_region(size=size):
+            data, path = saved_map(size, "rmap")
+
+            def run():
+                reader = MapChunkReader(path)
+                mid = size // 2
+                reader.read_region(max(mid - 17, 0), max(mid - 17, 0), min(mid + 17, size), min(mid + 17, size))
+                reader.close()
+
+            return run, None, 1
+
+        yield f"map_read_region/rmap/{size}x{size}", prepare_read_region
+
+
+def analyze_cases(sizes, enemy_counts, workdir):
+    """One map through the analysis CLI's per-map work (load, counts, flood fill)"""
+    for size in sizes:
+        def prepare(size=size):
+            path = os.path.join(workdir, f"analyze{size}.rmap")
+            save_binary_map(path, make_map(size, 0.3, min(1000, size * size // 10)))
+            return lambda: analyze_map(path, workdir), None, 1
+
+        yield f"analyze_map/{size}x{size}", prepare
+
+
+def media_cases(sizes, enemy_counts, workdir):
+    """copy_to_media: importing new files, and re-importing known ones"""
+    src_dir = os.path.join(workdir, "media_src")
+    media_dir = os.path.join(workdir, "media")
+    sources = []
+    state = {}
+
+    def write_sources():
+        if sources:
+            return
+        rng = np.random.default_rng(2)
+        os.makedirs(src_dir)
+        for i in range(MEDIA_FILES):
+            path = os.path.join(src_dir, f"texture{i}.png")
+            with open(path, "wb") as f:
+                f.write(rng.bytes(MEDIA_FILE_BYTES))
+            sources.append(path)
+
+    def fresh_store():
+        shutil.rmtree(media_dir, ignore_errors=True)
+        state["store"] = MediaStore(media_dir)
+
+    def add_all():
+        for path in sources:
+            state["store"].add(path)
+
+    def prepare_new():
+        write_sources()
+        return add_all, fresh_store, len(sources)
+
+    def prepare_known():
+        write_sources()
+        fresh_store()
+        add_all()
+        return add_all, None, len(sources)
+
+    yield "copy_to_media/new", prepare_new
+    yield "copy_to_media/known", prepare_known
+
+
+CASE_GROUPS = [collision_cases, hit_test_cases, enemy_update_cases, pathfinding_cases, level_mesh_cases,
+               grid_scan_cases, mapfile_cases, analyze_cases, media_cases]
+
+
+# ------------------------------------------------------------------------------
+# Running and Comparing
+# ------------------------------------------------------------------------------
+def run_suite(quick=False, name_filter=None):
+    """Run every case (matching the filter) and return the results document"""
+    sizes = QUICK_MAP_SIZES if quick else MAP_SIZES
+    enemy_counts = QUICK_ENEMY_COUNTS if quick else ENEMY_COUNTS
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for group in CASE_GROUPS:
+            for name, prepare in group(sizes, enemy_counts, workdir):
+                if name_filter and name_filter not in name:
+                    continue
+                fn, setup, ops = prepare()
+                samples = [s / ops * 1000.0 for s in measure(fn, setup)]
+                results[name] = {
+                    "ms": statistics.median(samples),
+                    "min_ms": min(samples),
+                    "max_ms": max(samples),
+                    "samples": len(samples),
+                }
+                print(f"{name:<45} {results[name]['ms']:>12.4f} ms")
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "quick": quick,
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print the change of every case present in both runs; returns the names
+    of cases whose median time grew by more than the threshold"""
+    regressions = []
+    print(f"\n{'case':<45} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        change = result["ms"] / base["ms"] - 1.0 if base["ms"] > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<45} {base['ms']:>12.4f} {result['ms']:>12.4f} {change:>+8.1%}{flag}")
+    if baseline.get("machine") != current["machine"]:
+        print("\nNote: the baseline was recorded on a different machine or environment")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine's headless hot paths")
+    parser.add_argument("--quick", action="store_true", help="fewer map sizes and enemy counts")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown reported as a regression (default 0.15)")
+    args = parser.parse_args()
+
+    current = run_suite(args.quick, args.filter)
+
+    out_path = args.out
+    if not out_path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out_path = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(out_path, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults written to {out_path}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
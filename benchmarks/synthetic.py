@@ -0,0 +1,58 @@
+"""Seeded synthetic maps for the benchmarks
+
+Every map is a pure function of its arguments, so runs on different machines
+and builds time exactly the same content.
+"""
+import numpy as np
+
+GROUND = 0
+WALL = 1
+SPAWN = 2
+ENEMY = 3
+
+
+def make_grid(size, density=0.3, enemies=0, seed=0):
+    """Square grid with random walls at the given density, a solid border, a
+    spawn in the middle and up to `enemies` enemies on free cells"""
+    rng = np.random.default_rng(seed)
+    grid = np.where(rng.random((size, size)) < density, WALL, GROUND).astype(np.uint8)
+    grid[0, :] = grid[-1, :] = WALL
+    grid[:, 0] = grid[:, -1] = WALL
+
+    # Keep the spawn and its neighbours open so the player doesn't start stuck
+    mid = size // 2
+    grid[max(mid - 1, 0):mid + 2, max(mid - 1, 0):mid + 2] = GROUND
+    grid[mid, mid] = SPAWN
+
+    if enemies:
+        free = np.flatnonzero(grid == GROUND)
+        picks = rng.choice(free, min(enemies, len(free)), replace=False)
+        grid.flat[picks] = ENEMY
+    return grid
+
+
+def make_map(size, density=0.3, enemies=0, seed=0):
+    """Map dict as save_map writes it, around a synthetic grid"""
+    return {
+        "grid": make_grid(size, density, enemies, seed),
+        "sky_color": "#87CEEB",
+        "sun_color": "#FFFF00",
+        "wall_texture": "wall.png",
+        "ground_texture": "ground.png",
+        "handgun_idle_texture": "handgun_idle.png",
+        "handgun_shoot_texture": "handgun_shoot.png",
+        "handgun_shoot_sound": "shoot.wav",
+        "enemy_idle_texture": "enemy_idle.png",
+        "enemy_shot_texture": "enemy_shot.png",
+        "enemy_model": None,
+        "game_name": "Benchmark",
+        "shot_delay": 2.2,
+        "win_message_text": "YOU WIN!",
+        "win_message_color": "#00FF00",
+        "main_menu_title": "Benchmark",
+        "main_menu_buttons": ["Start Game", "Options", "Exit"],
+        "main_menu_alignment": "center",
+        "main_menu_bg_mode": "color",
+        "main_menu_bg_color": "#222222",
+        "main_menu_bg_image": None,
+    }
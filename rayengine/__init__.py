@@ -0,0 +1 @@
+"""Headless engine modules used by the Ray Engine editor and preview"""
@@ -0,0 +1,161 @@
+"""Check map files from the command line, without the editor
+
+    python -m rayengine.analyze maps/                  # every map under maps/
+    python -m rayengine.analyze a.json b.rmap --jobs 4 --media-dir media
+
+Writes one JSON object per map to stdout as soon as it is analyzed, then a
+summary line. The exit status is 1 if any map could not be read.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from rayengine.mapfile import BINARY_EXTENSION, is_map_file, load_map_file
+from rayengine.pathfinding import bfs_distances
+
+# ------------------------------------------------------------------------------
+# Map Analysis
+# ------------------------------------------------------------------------------
+# Each map is analyzed in a worker process; only the file path goes in and a
+# small dict comes out, so the work scales with the number of cores.
+WALL = 1
+SPAWN = 2
+ENEMY = 3
+
+MAP_EXTENSIONS = (".json", BINARY_EXTENSION)
+DEFAULT_MEDIA_DIR = "media"
+# Map keys that name a media file (as written by the editor's save_map)
+MEDIA_KEYS = (
+    "wall_texture", "ground_texture", "handgun_idle_texture", "handgun_shoot_texture",
+    "handgun_shoot_sound", "enemy_idle_texture", "enemy_shot_texture", "enemy_model",
+    "main_menu_bg_image",
+)
+
+
+def media_exists(path, media_dir):
+    """Whether the game would find a media reference (in the media directory
+    under its file name, or at the path itself)"""
+    return os.path.exists(os.path.join(media_dir, os.path.basename(path))) or os.path.exists(path)
+
+
+def analyze_map(path, media_dir=DEFAULT_MEDIA_DIR):
+    """Counts, spawn, enemy reachability and media checks of one map file"""
+    result = {"path": path}
+    try:
+        result["file_bytes"] = os.path.getsize(path)
+        data = load_map_file(path)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    grid = data["grid"]
+    rows, cols = grid.shape
+    spawns = np.argwhere(grid == SPAWN)
+    enemies = np.argwhere(grid == ENEMY)
+    # The player starts on the first spawn cell, or the middle of the map
+    start = tuple(int(v) for v in spawns[0]) if len(spawns) else (rows // 2, cols // 2)
+    distance = bfs_distances(grid == WALL, *start)
+    unreachable = enemies[distance[enemies[:, 0], enemies[:, 1]] < 0] if grid[start] != WALL else enemies
+
+    result.update({
+        "rows": rows,
+        "cols": cols,
+        "walls": int(np.count_nonzero(grid == WALL)),
+        "enemies": len(enemies),
+        "spawn": bool(len(spawns)),
+        "spawns": len(spawns),
+        "unreachable_enemies": len(unreachable),
+        "all_enemies_reachable": not len(unreachable),
+        "missing_media": {key: data[key] for key in MEDIA_KEYS
+                          if data.get(key) and not media_exists(data[key], media_dir)},
+    })
+    return result
+
+
+def _analyze_task(task):
+    return analyze_map(*task)
+
+
+def looks_like_map(path):
+    """Whether a file found in a directory scan is a map (unreadable files are
+    kept so they get reported)"""
+    try:
+        return is_map_file(path)
+    except OSError:
+        return True
+
+
+def find_maps(paths):
+    """Map files named directly or found under directories, sorted per directory.
+    Other JSON files under a directory (media and cook manifests) are skipped"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                found.extend(path for path in (os.path.join(dirpath, name) for name in sorted(filenames)
+                                               if name.lower().endswith(MAP_EXTENSIONS))
+                             if looks_like_map(path))
+        else:
+            found.append(path)
+    return found
+
+
+def file_size_stats(sizes):
+    """Total, smallest, largest, mean and median file size in bytes"""
+    if not sizes:
+        return None
+    sizes = np.array(sizes)
+    return {
+        "total": int(sizes.sum()),
+        "min": int(sizes.min()),
+        "max": int(sizes.max()),
+        "mean": float(sizes.mean()),
+        "median": float(np.median(sizes)),
+    }
+
+
+def analyze_maps(paths, media_dir=DEFAULT_MEDIA_DIR, jobs=None):
+    """Yield analyze_map results as workers finish them (in no fixed order)"""
+    jobs = jobs or os.cpu_count() or 1
+    tasks = [(path, media_dir) for path in paths]
+    if jobs == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _analyze_task(task)
+        return
+    # Several maps per task keep the pool's messaging overhead low on big corpora
+    chunksize = max(1, len(tasks) // (jobs * 8))
+    with multiprocessing.Pool(min(jobs, len(tasks))) as pool:
+        yield from pool.imap_unordered(_analyze_task, tasks, chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze map files and print one JSON line per map")
+    parser.add_argument("paths", nargs="+", help="map files or directories to search for .json/.rmap maps")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--media-dir", default=DEFAULT_MEDIA_DIR, help="media directory to check references against")
+    args = parser.parse_args(argv)
+
+    maps = find_maps(args.paths)
+    sizes = []
+    counts = {"maps": len(maps), "errors": 0, "no_spawn": 0, "unreachable_enemies": 0, "missing_media": 0}
+    for result in analyze_maps(maps, args.media_dir, args.jobs):
+        print(json.dumps(result), flush=True)
+        if "error" in result:
+            counts["errors"] += 1
+            continue
+        sizes.append(result["file_bytes"])
+        counts["no_spawn"] += not result["spawn"]
+        counts["unreachable_enemies"] += not result["all_enemies_reachable"]
+        counts["missing_media"] += bool(result["missing_media"])
+
+    print(json.dumps({"summary": dict(counts, file_bytes=file_size_stats(sizes))}), flush=True)
+    return 1 if counts["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
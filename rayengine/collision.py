@@ -0,0 +1,64 @@
+import math
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# Wall Occupancy Index
+# ------------------------------------------------------------------------------
+WALL = 1
+
+
+class WallIndex:
+    """Occupancy mask of wall cells, queried around the player for collision"""
+
+    def __init__(self, grid):
+        self.rebuild(grid)
+
+    def rebuild(self, grid):
+        """Rebuild the occupancy mask from a full grid"""
+        self.solid = np.asarray(grid) == WALL
+        self.rows, self.cols = self.solid.shape
+
+    def set_cell(self, row, col, value):
+        """Keep the index in sync after a single grid cell changed"""
+        self.solid[row, col] = value == WALL
+
+    def is_wall(self, row, col):
+        """Check if a cell is a wall (cells outside the map are open)"""
+        if row < 0 or row >= self.rows or col < 0 or col >= self.cols:
+            return False
+        return bool(self.solid[row, col])
+
+    def walls_near(self, x, z, radius):
+        """Return (rows, cols) arrays of the wall cells a circle can touch"""
+        r0 = max(int(math.floor(z - radius)), 0)
+        r1 = min(int(math.floor(z + radius)), self.rows - 1)
+        c0 = max(int(math.floor(x - radius)), 0)
+        c1 = min(int(math.floor(x + radius)), self.cols - 1)
+        if r0 > r1 or c0 > c1:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        wall_rows, wall_cols = np.nonzero(self.solid[r0:r1 + 1, c0:c1 + 1])
+        return wall_rows + r0, wall_cols + c0
+
+    def resolve(self, x, z, radius, correction_factor=1.0):
+        """Return the (dx, dz) correction pushing a circle out of nearby walls"""
+        wall_rows, wall_cols = self.walls_near(x, z, radius)
+        if wall_rows.size == 0:
+            return 0.0, 0.0
+
+        closest_x = np.maximum(wall_cols, np.minimum(x, wall_cols + 1))
+        closest_z = np.maximum(wall_rows, np.minimum(z, wall_rows + 1))
+
+        dx = x - closest_x
+        dz = z - closest_z
+        distances = np.sqrt(dx * dx + dz * dz)
+
+        hits = distances < radius
+        if not hits.any():
+            return 0.0, 0.0
+
+        distances_fixed = np.where(distances == 0, 0.001, distances)
+        penetration = radius - distances[hits]
+        corr_x = np.sum((dx[hits] / distances_fixed[hits]) * penetration * correction_factor)
+        corr_z = np.sum((dz[hits] / distances_fixed[hits]) * penetration * correction_factor)
+        return float(corr_x), float(corr_z)
@@ -0,0 +1,407 @@
+"""Cook a map and its media into runtime-ready files
+
+    python -m rayengine.cook level.json                 # into cooked/
+    python -m rayengine.cook level.json --out build/cooked --jobs 4
+
+Textures are decoded ahead of time (3D textures also resized to powers of two
+with a full mipmap chain), .obj meshes are parsed into triangle arrays and the
+level geometry is meshed. Outputs are named after the content hash of their
+input, so cooking again only redoes what changed. Each map gets a manifest in
+cooked/maps/ naming the cooked file of every asset it uses; the preview loads
+those directly, checking only the size and mtime of sources it has hashed
+before. Media changed since the cook is loaded from the source again.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from rayengine.level_mesh import CHUNK_SIZE, build_chunk, chunk_keys
+from rayengine.mapfile import load_map_file
+from rayengine.media_store import hash_file
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# ------------------------------------------------------------------------------
+# Asset Cooking
+# ------------------------------------------------------------------------------
+# Every cooked file lives in <cook dir>/v<COOK_VERSION>/ under the SHA-256 of
+# its input plus the cook kind, so the same content is cooked once however many
+# maps use it, and raising COOK_VERSION invalidates everything cooked before.
+#   .rtex   magic "RTEX", version u16, pixel format u16, width u32, height u32,
+#           mipmap count u32, then RGBA8 pixels of every level, largest first
+#   .rmesh  NumPy .npz with float32 vertices, normals and texcoords (triangles)
+#   .rlvl   NumPy .npz with the merged ground and wall arrays of every chunk
+# Sounds are copied as they are. Meshes whose .obj uses an .mtl file are not
+# cooked: the preview loads those with raylib to keep their materials.
+COOKED_DIR = "cooked"
+COOK_VERSION = 2
+MANIFEST_DIR = "maps"
+
+TEXTURE_MAGIC = b"RTEX"
+TEXTURE_VERSION = 1
+PIXELFORMAT_RGBA8 = 7  # raylib PIXELFORMAT_UNCOMPRESSED_R8G8B8A8
+MAX_TEXTURE_SIZE = 2048
+_TEXTURE_HEADER = struct.Struct("<4sHHIII")
+
+# Cook kind per map key (as written by the editor's save_map): 3D textures get
+# mipmaps, 2D overlays keep their size because the HUD draws them pixel for pixel
+MAP_ASSET_KINDS = {
+    "wall_texture": "texture",
+    "ground_texture": "texture",
+    "enemy_idle_texture": "texture",
+    "enemy_shot_texture": "texture",
+    "handgun_idle_texture": "image",
+    "handgun_shoot_texture": "image",
+    "main_menu_bg_image": "image",
+    "enemy_model": "mesh",
+    "handgun_shoot_sound": "sound",
+}
+# Loaded by every preview, whatever the map
+BUILTIN_ASSETS = {"wall.obj": "mesh"}
+KIND_EXTENSIONS = {"texture": ".rtex", "image": ".rtex", "mesh": ".rmesh", "level": ".rlvl"}
+
+
+def cooked_path(cook_dir, digest, kind, source=""):
+    """Path of the cooked output for input content digest; sounds keep the
+    source's extension"""
+    extension = KIND_EXTENSIONS.get(kind) or os.path.splitext(source)[1]
+    return os.path.join(cook_dir, f"v{COOK_VERSION}", f"{digest}.{kind}{extension}")
+
+
+def map_manifest_path(cook_dir, map_path):
+    """Path of the cook manifest of a map file"""
+    map_path = os.path.abspath(map_path)
+    stem = os.path.splitext(os.path.basename(map_path))[0]
+    digest = hashlib.sha256(map_path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cook_dir, MANIFEST_DIR, f"{stem}-{digest}.json")
+
+
+def load_map_manifest(cook_dir, map_path):
+    """Cook kind -> {absolute source path: (content hash, cooked file)} of a
+    map's cook manifest; empty if the map was not cooked"""
+    if not map_path:
+        return {}
+    path = map_manifest_path(cook_dir, map_path)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print("Error reading cook manifest:", e)
+        return {}
+    if manifest.get("version") != COOK_VERSION:
+        return {}
+    return {kind: {source: tuple(output) for source, output in outputs.items()}
+            for kind, outputs in manifest.get("assets", {}).items()}
+
+
+def level_digest(grid, chunk_size=CHUNK_SIZE):
+    """Content hash of a grid as far as the level geometry is concerned"""
+    grid = np.ascontiguousarray(grid, dtype=np.uint8)
+    digest = hashlib.sha256(struct.pack("<III", grid.shape[0], grid.shape[1], chunk_size))
+    digest.update(grid.tobytes())
+    return digest.hexdigest()
+
+
+def _write_atomic(path, write):
+    """Write a file through a temporary name, so a half-written output is never
+    mistaken for a finished one"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+# ------------------------------------------------------------------------------
+# Textures
+# ------------------------------------------------------------------------------
+def power_of_two(size, limit=MAX_TEXTURE_SIZE):
+    """Nearest power of two to size, at most limit"""
+    return min(1 << max(0, round(np.log2(max(size, 1)))), limit)
+
+
+def cook_texture(src, dst, mipmapped):
+    """Decode an image to RGBA8; mipmapped textures are resized to powers of two
+    and get every mipmap level down to 1x1"""
+    if Image is None:
+        raise RuntimeError("cooking textures requires Pillow")
+    with Image.open(src) as img:
+        img = img.convert("RGBA")
+        levels = [img]
+        if mipmapped:
+            size = (power_of_two(img.width), power_of_two(img.height))
+            if img.size != size:
+                img = img.resize(size, Image.Resampling.LANCZOS)
+            levels = [img]
+            while img.width > 1 or img.height > 1:
+                img = img.resize((max(img.width // 2, 1), max(img.height // 2, 1)), Image.Resampling.BOX)
+                levels.append(img)
+
+    def write(f):
+        f.write(_TEXTURE_HEADER.pack(TEXTURE_MAGIC, TEXTURE_VERSION, PIXELFORMAT_RGBA8,
+                                     levels[0].width, levels[0].height, len(levels)))
+        for level in levels:
+            f.write(level.tobytes())
+
+    _write_atomic(dst, write)
+
+
+def read_texture(path):
+    """(width, height, mipmap count, pixel format, pixel bytes) of a .rtex file"""
+    with open(path, "rb") as f:
+        header = f.read(_TEXTURE_HEADER.size)
+        if len(header) < _TEXTURE_HEADER.size:
+            raise ValueError("truncated texture header")
+        magic, version, pixel_format, width, height, mipmaps = _TEXTURE_HEADER.unpack(header)
+        if magic != TEXTURE_MAGIC or version != TEXTURE_VERSION:
+            raise ValueError("not a cooked texture")
+        return width, height, mipmaps, pixel_format, f.read()
+
+
+# ------------------------------------------------------------------------------
+# Meshes
+# ------------------------------------------------------------------------------
+def _obj_index(token, count):
+    """0-based index of an OBJ face index (1-based, negative counts from the end)"""
+    index = int(token)
+    return index - 1 if index > 0 else count + index
+
+
+def parse_obj(path):
+    """Triangle arrays (vertices, normals, texcoords) of a Wavefront .obj file.
+    Polygons are fanned into triangles; faces without normals get flat ones, and
+    v is flipped as raylib's own loader does"""
+    positions, uvs, normals = [], [], []
+    corners = []  # (position, uv or None, normal or None) per triangle corner
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "v":
+                positions.append([float(v) for v in parts[1:4]])
+            elif parts[0] == "vt":
+                uvs.append([float(v) for v in parts[1:3]])
+            elif parts[0] == "vn":
+                normals.append([float(v) for v in parts[1:4]])
+            elif parts[0] == "f":
+                face = []
+                for token in parts[1:]:
+                    fields = token.split("/") + ["", ""]
+                    face.append((_obj_index(fields[0], len(positions)),
+                                 _obj_index(fields[1], len(uvs)) if fields[1] else None,
+                                 _obj_index(fields[2], len(normals)) if fields[2] else None))
+                for i in range(1, len(face) - 1):
+                    corners.extend((face[0], face[i], face[i + 1]))
+
+    count = len(corners)
+    positions = np.array(positions, dtype=np.float32).reshape(-1, 3)
+    vertices = positions[[corner[0] for corner in corners]].reshape(count, 3)
+
+    texcoords = np.zeros((count, 2), dtype=np.float32)
+    if uvs:
+        uvs = np.array(uvs, dtype=np.float32)
+        has_uv = np.array([corner[1] is not None for corner in corners], dtype=bool)
+        if has_uv.any():
+            texcoords[has_uv] = uvs[[corner[1] for corner in corners if corner[1] is not None]]
+            texcoords[has_uv, 1] = 1.0 - texcoords[has_uv, 1]
+
+    # Flat normals first, then the file's own where it has them
+    triangles = vertices.reshape(-1, 3, 3)
+    flat = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    length = np.linalg.norm(flat, axis=1, keepdims=True)
+    flat = np.divide(flat, length, out=np.zeros_like(flat), where=length > 0)
+    vertex_normals = np.repeat(flat, 3, axis=0).astype(np.float32)
+    if normals:
+        normals = np.array(normals, dtype=np.float32)
+        has_normal = np.array([corner[2] is not None for corner in corners], dtype=bool)
+        if has_normal.any():
+            vertex_normals[has_normal] = normals[[corner[2] for corner in corners if corner[2] is not None]]
+    return vertices, vertex_normals, texcoords
+
+
+def obj_uses_materials(path):
+    """Check whether an .obj file refers to an .mtl material library"""
+    with open(path, "r", errors="replace") as f:
+        return any(line.split()[:1] == ["mtllib"] for line in f)
+
+
+def cook_mesh(src, dst):
+    """Parse an .obj file into a .rmesh"""
+    vertices, normals, texcoords = parse_obj(src)
+    _write_atomic(dst, lambda f: np.savez(f, vertices=vertices, normals=normals, texcoords=texcoords))
+
+
+def read_mesh(path):
+    """(vertices, normals, texcoords) of a .rmesh file"""
+    with np.load(path) as data:
+        return data["vertices"], data["normals"], data["texcoords"]
+
+
+# ------------------------------------------------------------------------------
+# Level Geometry
+# ------------------------------------------------------------------------------
+def cook_level(grid, dst, chunk_size=CHUNK_SIZE):
+    """Mesh every chunk of a grid into a .rlvl"""
+    rows, cols = np.shape(grid)
+    arrays = {}
+    for key in chunk_keys(rows, cols, chunk_size):
+        for name, triangles in build_chunk(grid, key, chunk_size).items():
+            for field, array in zip(("vertices", "normals", "texcoords"), triangles):
+                arrays[f"{key[0]}_{key[1]}_{name}_{field}"] = array
+    _write_atomic(dst, lambda f: np.savez(f, **arrays))
+
+
+def read_level(path):
+    """Chunk key -> {material: (vertices, normals, texcoords)} of a .rlvl file"""
+    chunks = {}
+    with np.load(path) as data:
+        for name in data.files:
+            row, col, material, field = name.split("_")
+            triangles = chunks.setdefault((int(row), int(col)), {}).setdefault(material, {})
+            triangles[field] = data[name]
+    return {key: {material: (fields["vertices"], fields["normals"], fields["texcoords"])
+                  for material, fields in materials.items()}
+            for key, materials in chunks.items()}
+
+
+def find_cooked_level(cook_dir, grid, chunk_size=CHUNK_SIZE):
+    """Cooked chunk arrays for exactly this grid, or None"""
+    path = cooked_path(cook_dir, level_digest(grid, chunk_size), "level")
+    if not os.path.exists(path):
+        return None
+    try:
+        return read_level(path)
+    except Exception as e:
+        print("Error reading cooked level:", e)
+        return None
+
+
+# ------------------------------------------------------------------------------
+# Cooking a Map
+# ------------------------------------------------------------------------------
+def resolve_media(path, media_dir):
+    """Where the game finds a media reference (the media directory first), or None"""
+    if not path:
+        return None
+    for candidate in (os.path.join(media_dir, os.path.basename(path)), path):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def copy_file(src, dst):
+    """Cook a file that needs no processing (sounds)"""
+    def write(f):
+        with open(src, "rb") as source:
+            shutil.copyfileobj(source, f)
+    _write_atomic(dst, write)
+
+
+def _cook_job(kind, src, dst):
+    """Cook one output in a worker process; returns the seconds it took"""
+    start = time.perf_counter()
+    if kind in ("texture", "image"):
+        cook_texture(src, dst, kind == "texture")
+    elif kind == "mesh":
+        cook_mesh(src, dst)
+    elif kind == "level":
+        cook_level(src, dst)
+    else:
+        copy_file(src, dst)
+    return time.perf_counter() - start
+
+
+def cook_map(map_path, cook_dir=COOKED_DIR, media_dir="media", jobs=None):
+    """Cook a map's level geometry and media; returns the manifest entries.
+    Outputs that already exist for the same input content are reused"""
+    data = load_map_file(map_path)
+    assets = [(key, kind, data.get(key)) for key, kind in MAP_ASSET_KINDS.items()]
+    assets += [(name, kind, name) for name, kind in BUILTIN_ASSETS.items()]
+
+    entries = []
+    work = []
+    for key, kind, reference in assets:
+        if not reference:
+            continue
+        src = resolve_media(reference, media_dir)
+        if src is None:
+            entries.append({"key": key, "source": reference, "status": "missing"})
+            continue
+        if kind == "mesh" and obj_uses_materials(src):
+            entries.append({"key": key, "kind": kind, "source": src, "status": "skipped",
+                            "error": "uses .mtl materials; loaded from the source"})
+            continue
+        digest = hash_file(src)
+        dst = cooked_path(cook_dir, digest, kind, src)
+        entry = {"key": key, "kind": kind, "source": src, "hash": digest, "output": dst}
+        entries.append(entry)
+        if os.path.exists(dst):
+            entry["status"] = "cached"
+        else:
+            work.append((entry, (kind, src, dst)))
+
+    level_entry = {"key": "level", "kind": "level", "hash": level_digest(data["grid"])}
+    level_entry["output"] = cooked_path(cook_dir, level_entry["hash"], "level")
+    entries.append(level_entry)
+
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [(entry, pool.submit(_cook_job, *job)) for entry, job in work]
+        if os.path.exists(level_entry["output"]):
+            level_entry["status"] = "cached"
+        else:
+            futures.append((level_entry, pool.submit(_cook_job, "level", data["grid"], level_entry["output"])))
+        for entry, future in futures:
+            try:
+                entry["ms"] = round(future.result() * 1000, 2)
+                entry["status"] = "cooked"
+            except Exception as e:
+                entry["status"] = "error"
+                entry["error"] = f"{type(e).__name__}: {e}"
+
+    # Only finished outputs go into the assets the preview loads
+    assets = {}
+    for entry in entries:
+        if entry.get("status") in ("cooked", "cached") and entry["kind"] != "level":
+            outputs = assets.setdefault(entry["kind"], {})
+            outputs[os.path.abspath(entry["source"])] = (entry["hash"], os.path.abspath(entry["output"]))
+    manifest = {"version": COOK_VERSION, "map": os.path.abspath(map_path), "assets": assets, "entries": entries}
+    _write_atomic(map_manifest_path(cook_dir, map_path),
+                  lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cook a map and its media into runtime-ready files")
+    parser.add_argument("maps", nargs="+", help="map files (.json or .rmap)")
+    parser.add_argument("--out", default=COOKED_DIR, help="cook directory (default: cooked)")
+    parser.add_argument("--media-dir", default="media", help="media directory the map refers to")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for map_path in args.maps:
+        print(f"{map_path}:")
+        for entry in cook_map(map_path, args.out, args.media_dir, args.jobs):
+            status = entry.get("status")
+            failed |= status == "error"
+            detail = entry.get("error") or (f"{entry['ms']:.1f} ms" if "ms" in entry else "")
+            print(f"  {entry['key']:<22} {status:<8} {detail}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
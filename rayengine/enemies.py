@@ -0,0 +1,122 @@
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# Enemy Storage (structure of arrays)
+# ------------------------------------------------------------------------------
+# Enemy i lives in row i of every array; only the first `count` rows are in use.
+# Per-tick updates and per-frame queries are a few NumPy calls regardless of
+# the number of enemies, and removal moves the last enemy into the freed slot.
+ENEMY = 3
+
+ENEMY_RADIUS = 0.5
+ENEMY_HITS_TO_KILL = 2
+ENEMY_SHOT_DURATION = 0.5
+ENEMY_SPEED = 2.0
+ENEMY_STOP_DISTANCE = 1.0
+
+IDLE = 0
+SHOT = 1
+STATE_NAMES = ("idle", "shot")
+
+
+class EnemyManager:
+    """Positions, hit counts, states and state timers of all enemies"""
+
+    def __init__(self, positions):
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.count = len(positions)
+        self._positions = positions.copy()
+        self._hits = np.zeros(self.count, dtype=np.int32)
+        self._states = np.full(self.count, IDLE, dtype=np.uint8)
+        self._timers = np.zeros(self.count, dtype=np.float64)
+
+    @classmethod
+    def from_grid(cls, grid):
+        """One enemy standing in the middle of every enemy cell"""
+        cells = np.argwhere(np.asarray(grid) == ENEMY)
+        positions = np.zeros((len(cells), 3))
+        positions[:, 0] = cells[:, 1] + 0.5
+        positions[:, 2] = cells[:, 0] + 0.5
+        return cls(positions)
+
+    def __len__(self):
+        return self.count
+
+    # Views of the rows in use; they are invalidated by remove()
+    @property
+    def positions(self):
+        return self._positions[:self.count]
+
+    @property
+    def hits(self):
+        return self._hits[:self.count]
+
+    @property
+    def states(self):
+        return self._states[:self.count]
+
+    @property
+    def timers(self):
+        return self._timers[:self.count]
+
+    def hit(self, index):
+        """Register a hit on one enemy; returns True if it was killed (and removed)"""
+        self._hits[index] += 1
+        self._states[index] = SHOT
+        self._timers[index] = ENEMY_SHOT_DURATION
+        if self._hits[index] >= ENEMY_HITS_TO_KILL:
+            self.remove(index)
+            return True
+        return False
+
+    def remove(self, index):
+        """Remove an enemy in O(1) by moving the last one into its slot"""
+        last = self.count - 1
+        for array in (self._positions, self._hits, self._states, self._timers):
+            array[index] = array[last]
+        self.count = last
+
+    def update(self, dt):
+        """Count down the 'shot' state and return expired enemies to idle"""
+        states = self.states
+        shot = states == SHOT
+        if not shot.any():
+            return
+        timers = self.timers
+        timers[shot] -= dt
+        states[shot & (timers <= 0)] = IDLE
+
+    def chase(self, field, x, z, dt, speed=ENEMY_SPEED, stop_distance=ENEMY_STOP_DISTANCE):
+        """Move every enemy along the flow field towards the player at (x, z):
+        to the center of the next cell, or straight at the player once in the
+        player's cell. Enemies in unreachable cells or within stop_distance stay"""
+        if not self.count or field is None:
+            return
+        positions = self.positions
+        rows, cols = field.shape
+        cell_x = np.clip(np.floor(positions[:, 0]).astype(np.intp), 0, cols - 1)
+        cell_z = np.clip(np.floor(positions[:, 2]).astype(np.intp), 0, rows - 1)
+        distance = field.distance_at(cell_z, cell_x)
+
+        step_x, step_z = field.steps(cell_z, cell_x)
+        target_x = cell_x + 0.5 + step_x
+        target_z = cell_z + 0.5 + step_z
+        at_player = distance == 0
+        target_x[at_player] = x
+        target_z[at_player] = z
+
+        dx = target_x - positions[:, 0]
+        dz = target_z - positions[:, 2]
+        length = np.hypot(dx, dz)
+        player_distance = np.hypot(x - positions[:, 0], z - positions[:, 2])
+        moving = (distance >= 0) & (player_distance > stop_distance) & (length > 1e-9)
+        if not moving.any():
+            return
+        step = np.minimum(speed * dt, length[moving]) / length[moving]
+        positions[moving, 0] += dx[moving] * step
+        positions[moving, 2] += dz[moving] * step
+
+    def facing_angles(self, x, z):
+        """Yaw in degrees that turns each enemy towards the point (x, z)"""
+        positions = self.positions
+        return np.degrees(np.arctan2(x - positions[:, 0], z - positions[:, 2])) + 180
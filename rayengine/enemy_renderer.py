@@ -0,0 +1,177 @@
+import ctypes
+
+import numpy as np
+import raylibpy as rl
+
+from rayengine.enemies import IDLE, SHOT
+
+# ------------------------------------------------------------------------------
+# Batched Enemy Rendering
+# ------------------------------------------------------------------------------
+# Visible enemies are bucketed by the texture their state shows, so each
+# texture is bound once per frame. Enemy models are drawn with one instanced
+# call per bucket and mesh; without an instancing shader they fall back to one
+# draw_model_ex per enemy. Sprite-only enemies (no model, but a texture) are
+# camera-facing billboards, which rlgl merges into one batch per texture. rlgl
+# flushes its batch whenever the vertex buffer fills up, so a bucket costs one
+# GPU draw call per buffer's worth of vertices; draw_calls counts those flushes.
+ENEMY_HEIGHT = 0.5
+SPRITE_SIZE = 1.0
+# rlgl's default batch holds this many quads (4 vertices each)
+BATCH_VERTICES = rl.RL_DEFAULT_BATCH_BUFFER_ELEMENTS * 4
+BILLBOARD_VERTICES = 4
+CUBE_VERTICES = 36
+
+INSTANCING_VS = """#version 330
+in vec3 vertexPosition;
+in vec2 vertexTexCoord;
+in mat4 instanceTransform;
+uniform mat4 mvp;
+out vec2 fragTexCoord;
+void main()
+{
+    fragTexCoord = vertexTexCoord;
+    gl_Position = mvp*instanceTransform*vec4(vertexPosition, 1.0);
+}
+"""
+
+INSTANCING_FS = """#version 330
+in vec2 fragTexCoord;
+uniform sampler2D texture0;
+uniform vec4 colDiffuse;
+out vec4 finalColor;
+void main()
+{
+    finalColor = texture(texture0, fragTexCoord)*colDiffuse;
+}
+"""
+
+
+def batch_draw_calls(count, vertices_per_item):
+    """GPU draw calls rlgl needs for count items of one texture: one for every
+    batch buffer they fill"""
+    return -(-count * vertices_per_item // BATCH_VERTICES)
+
+
+def instance_transforms(positions, angles, model_transform):
+    """Row-major 4x4 float32 matrices (raylib Matrix memory layout) that place
+    each enemy like draw_model_ex(model, (x, ENEMY_HEIGHT, z), up, angle, 1)"""
+    radians = np.radians(angles)
+    cos, sin = np.cos(radians), np.sin(radians)
+    matrices = np.zeros((len(positions), 4, 4), dtype=np.float32)
+    matrices[:, 0, 0] = cos
+    matrices[:, 0, 2] = sin
+    matrices[:, 2, 0] = -sin
+    matrices[:, 2, 2] = cos
+    matrices[:, 1, 1] = 1.0
+    matrices[:, 0, 3] = positions[:, 0]
+    matrices[:, 1, 3] = ENEMY_HEIGHT
+    matrices[:, 2, 3] = positions[:, 2]
+    matrices[:, 3, 3] = 1.0
+    return np.ascontiguousarray(matrices @ model_transform, dtype=np.float32)
+
+
+class EnemyRenderer:
+    """Draws visible enemies in per-texture batches, counting draws and binds"""
+
+    def __init__(self, model=None, idle_texture=None, shot_texture=None, instanced=True):
+        self.model = model
+        self.idle_texture = idle_texture
+        self.shot_texture = shot_texture
+        self.draw_calls = 0
+        self.texture_binds = 0
+        self.material = None
+
+        if model:
+            diffuse = model.materials[0].maps[rl.MATERIAL_MAP_DIFFUSE]
+            self.model_texture = rl.Texture2D.from_buffer_copy(diffuse.texture)
+            self.model_transform = np.frombuffer(bytes(model.transform), dtype=np.float32).reshape(4, 4)
+            if instanced:
+                self.material = self._load_instancing_material()
+
+    def _load_instancing_material(self):
+        """Default material with the instancing shader, or None if it didn't compile"""
+        shader = rl.load_shader_from_memory(INSTANCING_VS, INSTANCING_FS)
+        if not rl.is_shader_valid(shader) or shader.id == rl.rl_get_shader_id_default():
+            print("Instanced enemy shader unavailable; drawing enemies one by one")
+            return None
+        shader.locs[rl.SHADER_LOC_MATRIX_MODEL] = rl.get_shader_location_attrib(shader, "instanceTransform")
+        material = rl.load_material_default()
+        material.shader = shader
+        self.default_texture = rl.Texture2D.from_buffer_copy(material.maps[rl.MATERIAL_MAP_DIFFUSE].texture)
+        return material
+
+    @property
+    def instanced(self):
+        return self.material is not None
+
+    def buckets(self, enemies, indices):
+        """(texture, enemy indices) per distinct texture; texture None means the
+        model's own texture (or plain cubes)"""
+        states = enemies.states[indices]
+        groups = {}
+        for state, texture in ((IDLE, self.idle_texture), (SHOT, self.shot_texture or self.idle_texture)):
+            selected = indices[states == state]
+            if len(selected):
+                key = texture.id if texture else None
+                groups.setdefault(key, (texture, []))[1].append(selected)
+        return [(texture, np.concatenate(parts)) for texture, parts in groups.values()]
+
+    def draw(self, camera, enemies, indices, eye_x, eye_z):
+        """Draw the enemies at the given indices (inside begin_mode3d)"""
+        self.draw_calls = 0
+        self.texture_binds = 0
+        if not len(indices):
+            return
+        buckets = self.buckets(enemies, np.asarray(indices))
+        if self.model:
+            angles = enemies.facing_angles(eye_x, eye_z)
+            if self.instanced:
+                self._draw_instanced(enemies, buckets, angles)
+            else:
+                self._draw_models(enemies, buckets, angles)
+        else:
+            self._draw_sprites(camera, enemies, buckets)
+
+    def _draw_instanced(self, enemies, buckets, angles):
+        diffuse = self.material.maps[rl.MATERIAL_MAP_DIFFUSE]
+        for texture, selected in buckets:
+            diffuse.texture = texture or self.model_texture
+            self.texture_binds += 1
+            transforms = instance_transforms(enemies.positions[selected], angles[selected], self.model_transform)
+            transforms_ptr = ctypes.cast(transforms.ctypes.data, ctypes.POINTER(rl.Matrix))
+            for i in range(self.model.mesh_count):
+                rl.draw_mesh_instanced(self.model.meshes[i], self.material, transforms_ptr, len(selected))
+                self.draw_calls += 1
+        diffuse.texture = self.default_texture
+
+    def _draw_models(self, enemies, buckets, angles):
+        diffuse = self.model.materials[0].maps[rl.MATERIAL_MAP_DIFFUSE]
+        for texture, selected in buckets:
+            diffuse.texture = texture or self.model_texture
+            self.texture_binds += 1
+            positions = enemies.positions[selected].tolist()
+            for (x, _, z), angle in zip(positions, angles[selected].tolist()):
+                rl.draw_model_ex(self.model, rl.Vector3(x, ENEMY_HEIGHT, z), rl.Vector3(0, 1, 0),
+                                 angle, rl.Vector3(1.0, 1.0, 1.0), rl.WHITE)
+                self.draw_calls += self.model.mesh_count
+        diffuse.texture = self.model_texture
+
+    def _draw_sprites(self, camera, enemies, buckets):
+        # rlgl batches consecutive quads with the same texture, so each bucket
+        # reaches the GPU in one draw call per full batch buffer
+        for texture, selected in buckets:
+            self.texture_binds += 1
+            self.draw_calls += batch_draw_calls(len(selected), BILLBOARD_VERTICES if texture else CUBE_VERTICES)
+            for x, _, z in enemies.positions[selected].tolist():
+                if texture:
+                    rl.draw_billboard(camera, texture, rl.Vector3(x, ENEMY_HEIGHT, z), SPRITE_SIZE, rl.WHITE)
+                else:
+                    rl.draw_cube(rl.Vector3(x, ENEMY_HEIGHT, z), 1.0, 1.0, 1.0, rl.RED)
+
+    def unload(self):
+        """Free the instancing shader and material (the textures belong to the caller)"""
+        if self.material is not None:
+            self.material.maps[rl.MATERIAL_MAP_DIFFUSE].texture = self.default_texture
+            rl.unload_material(self.material)
+            self.material = None
@@ -0,0 +1,95 @@
+from collections import deque, namedtuple
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# Editor Undo History
+# ------------------------------------------------------------------------------
+# Edits are stored as the cells they changed (flat cell index, old value, new
+# value) rather than as grid snapshots, so an entry costs 5 bytes per changed
+# cell whatever the map size. All changes between begin() and end() (one drag
+# stroke, including side effects such as clearing the old spawn) form a single
+# entry. Once the log grows past max_bytes the oldest entries are dropped.
+HISTORY_MAX_BYTES = 32 * 1024 * 1024
+
+Edit = namedtuple("Edit", "indices old new")
+
+
+def edit_bytes(edit):
+    """Memory used by one entry's arrays"""
+    return edit.indices.nbytes + edit.old.nbytes + edit.new.nbytes
+
+
+class EditHistory:
+    """Undo/redo log of grid cell changes"""
+
+    def __init__(self, max_bytes=HISTORY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.bytes = 0
+        # Cell index -> [old, new] of the stroke in progress
+        self.stroke = None
+
+    def begin(self):
+        """Start collecting changes into one entry"""
+        self.end()
+        self.stroke = {}
+
+    def record(self, index, old, new):
+        """Note that a cell changed from old to new; outside a stroke the change
+        becomes an entry of its own"""
+        if self.stroke is None:
+            self.begin()
+            self.record(index, old, new)
+            self.end()
+            return
+        change = self.stroke.get(index)
+        if change is None:
+            self.stroke[index] = [old, new]
+        else:
+            change[1] = new
+
+    def end(self):
+        """Finish the stroke; it is stored unless it left every cell as it was"""
+        stroke, self.stroke = self.stroke, None
+        if not stroke:
+            return
+        changed = [(index, old, new) for index, (old, new) in stroke.items() if old != new]
+        if not changed:
+            return
+        indices, old, new = zip(*changed)
+        edit = Edit(np.array(indices, dtype=np.uint32), np.array(old, dtype=np.uint8), np.array(new, dtype=np.uint8))
+
+        self.bytes -= sum(edit_bytes(entry) for entry in self.redo_stack)
+        self.redo_stack.clear()
+        self.undo_stack.append(edit)
+        self.bytes += edit_bytes(edit)
+        # Oldest first, but always keep the newest entry
+        while self.bytes > self.max_bytes and len(self.undo_stack) > 1:
+            self.bytes -= edit_bytes(self.undo_stack.popleft())
+
+    def undo(self):
+        """(indices, values) restoring the cells of the last entry, or None"""
+        self.end()
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        self.redo_stack.append(edit)
+        return edit.indices, edit.old
+
+    def redo(self):
+        """(indices, values) re-applying the last undone entry, or None"""
+        self.end()
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        self.undo_stack.append(edit)
+        return edit.indices, edit.new
+
+    def clear(self):
+        """Forget everything (the grid was replaced or resized)"""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.bytes = 0
+        self.stroke = None
@@ -0,0 +1,219 @@
+import sys
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# Level Geometry Builder
+# ------------------------------------------------------------------------------
+# The static world is a thin ground surface over every open cell and unit-high
+# walls. Ground cells are merged into one quad per row run. Walls only get the
+# faces that can be seen: no bottoms, and no sides pressed against another wall.
+# Those faces are merged greedily into large quads with the texture repeated once
+# per cell. Everything is packed into one vertex buffer per material and per
+# chunk, so a map draws in a handful of calls and an edit only rebuilds the chunk
+# it touches. The boxes are generated here; wall.obj only lends its material.
+WALL = 1
+CHUNK_SIZE = 16
+GROUND_HEIGHT = 0.1
+WALL_HEIGHT = 1.0
+
+MATERIALS = ("ground", "wall")
+
+# Quad corners of a unit box, counter-clockwise seen from outside
+_FACES = [
+    ((1, 0, 0), [(1, 0, 1), (1, 0, 0), (1, 1, 0), (1, 1, 1)]),
+    ((-1, 0, 0), [(0, 0, 0), (0, 0, 1), (0, 1, 1), (0, 1, 0)]),
+    ((0, 0, 1), [(0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)]),
+    ((0, 0, -1), [(1, 0, 0), (0, 0, 0), (0, 1, 0), (1, 1, 0)]),
+    ((0, 1, 0), [(0, 1, 1), (1, 1, 1), (1, 1, 0), (0, 1, 0)]),
+    ((0, -1, 0), [(0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1)]),
+]
+_QUAD_UVS = [(0, 1), (1, 1), (1, 0), (0, 0)]
+# Axes (x=0, y=1, z=2) that texture u and v follow on each face above
+_FACE_UV_AXES = [(2, 1), (2, 1), (0, 1), (0, 1), (0, 2), (0, 2)]
+_QUAD_TRIANGLES = [0, 1, 2, 0, 2, 3]
+
+
+def quad_arrays(corners, normal, uvs):
+    """Triangle arrays for quads given as (n, 4, 3) corners and (n, 4, 2) uvs"""
+    count = len(corners)
+    vertices = corners[:, _QUAD_TRIANGLES, :].reshape(-1, 3)
+    normals = np.broadcast_to(np.asarray(normal, dtype=np.float32), (count * 6, 3))
+    texcoords = uvs[:, _QUAD_TRIANGLES, :].reshape(-1, 2)
+    return (np.ascontiguousarray(vertices, dtype=np.float32),
+            np.ascontiguousarray(normals),
+            np.ascontiguousarray(texcoords, dtype=np.float32))
+
+
+def row_runs(mask):
+    """(rows, starts, ends) of the horizontal runs of True cells in a 2D mask"""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    start_rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return start_rows, starts, ends
+
+
+def merge_runs(lines, starts, ends):
+    """Greedy merge of row runs into rectangles: runs with the same span on
+    consecutive lines are stacked. Returns (first lines, end lines, starts, ends)"""
+    if not len(lines):
+        return lines, lines, starts, ends
+    order = np.lexsort((lines, ends, starts))
+    lines, starts, ends = lines[order], starts[order], ends[order]
+    new = np.ones(len(lines), dtype=bool)
+    new[1:] = (starts[1:] != starts[:-1]) | (ends[1:] != ends[:-1]) | (lines[1:] != lines[:-1] + 1)
+    first = np.flatnonzero(new)
+    last = np.append(first[1:], len(lines)) - 1
+    return lines[first], lines[last] + 1, starts[first], ends[first]
+
+
+def face_arrays(face, bases, sizes):
+    """Triangle arrays for one face of _FACES on boxes given by (n, 3) corners
+    and sizes, with the texture repeated once per unit"""
+    normal, corners = _FACES[face]
+    bases = np.asarray(bases, dtype=np.float32)
+    sizes = np.asarray(sizes, dtype=np.float32)
+    corners = bases[:, None, :] + np.asarray(corners, dtype=np.float32)[None] * sizes[:, None, :]
+    uvs = np.asarray(_QUAD_UVS, dtype=np.float32)[None] * sizes[:, None, list(_FACE_UV_AXES[face])]
+    return quad_arrays(corners, normal, uvs)
+
+
+def _concat_arrays(parts):
+    """Join (vertices, normals, texcoords) triples into one"""
+    return tuple(np.concatenate([part[i] for part in parts]) for i in range(3))
+
+
+def wall_masks(grid, r0, c0, r1, c1):
+    """Wall cells of a region and, per side face of _FACES, the walls whose face
+    on that side is exposed. Cells outside the grid count as open"""
+    rows, cols = np.shape(grid)
+    # The region plus a one-cell border of neighbours
+    halo = np.zeros((r1 - r0 + 2, c1 - c0 + 2), dtype=bool)
+    hr0, hc0 = max(r0 - 1, 0), max(c0 - 1, 0)
+    hr1, hc1 = min(r1 + 1, rows), min(c1 + 1, cols)
+    halo[hr0 - r0 + 1:hr1 - r0 + 1, hc0 - c0 + 1:hc1 - c0 + 1] = np.asarray(grid)[hr0:hr1, hc0:hc1] == WALL
+    solid = halo[1:-1, 1:-1]
+    exposed = [
+        solid & ~halo[1:-1, 2:],   # +x
+        solid & ~halo[1:-1, :-2],  # -x
+        solid & ~halo[2:, 1:-1],   # +z
+        solid & ~halo[:-2, 1:-1],  # -z
+    ]
+    return solid, exposed
+
+
+def wall_arrays(grid, r0, c0, r1, c1, height):
+    """Greedy-meshed triangle arrays for the visible wall faces in a region"""
+    solid, exposed = wall_masks(grid, r0, c0, r1, c1)
+    parts = []
+    for face, mask in enumerate(exposed):
+        if face < 2:
+            # x faces: runs along z in each column
+            cols, starts, ends = row_runs(mask.T)
+            bases = np.stack([cols + c0, np.zeros(len(cols)), starts + r0], axis=1)
+            sizes = np.stack([np.ones(len(cols)), np.full(len(cols), height), ends - starts], axis=1)
+        else:
+            # z faces: runs along x in each row
+            rows, starts, ends = row_runs(mask)
+            bases = np.stack([starts + c0, np.zeros(len(rows)), rows + r0], axis=1)
+            sizes = np.stack([ends - starts, np.full(len(rows), height), np.ones(len(rows))], axis=1)
+        parts.append(face_arrays(face, bases.reshape(-1, 3), sizes.reshape(-1, 3)))
+
+    first_rows, end_rows, starts, ends = merge_runs(*row_runs(solid))
+    bases = np.stack([starts + c0, np.zeros(len(starts)), first_rows + r0], axis=1)
+    sizes = np.stack([ends - starts, np.full(len(starts), height), end_rows - first_rows], axis=1)
+    parts.append(face_arrays(4, bases.reshape(-1, 3), sizes.reshape(-1, 3)))
+    return _concat_arrays(parts)
+
+
+def wall_triangle_stats(grid):
+    """Wall triangle counts of a whole map: one cube per wall, exposed faces
+    only, and exposed faces after greedy merging"""
+    rows, cols = np.shape(grid)
+    solid, exposed = wall_masks(grid, 0, 0, rows, cols)
+    walls = int(solid.sum())
+    exposed_faces = walls + sum(int(mask.sum()) for mask in exposed)
+    return {
+        "walls": walls,
+        "cubes": walls * 12,
+        "exposed": exposed_faces * 2,
+        "greedy": len(wall_arrays(grid, 0, 0, rows, cols, WALL_HEIGHT)[0]) // 3,
+    }
+
+
+def ground_arrays(rows, starts, ends, height):
+    """Top-facing quads for ground row runs, with the texture tiled once per cell"""
+    count = len(rows)
+    corners = np.empty((count, 4, 3), dtype=np.float32)
+    corners[:, :, 1] = height
+    corners[:, [0, 3], 0] = starts[:, None]
+    corners[:, [1, 2], 0] = ends[:, None]
+    corners[:, [0, 1], 2] = rows[:, None] + 1
+    corners[:, [2, 3], 2] = rows[:, None]
+    uvs = np.empty((count, 4, 2), dtype=np.float32)
+    uvs[:] = _QUAD_UVS
+    uvs[:, [1, 2], 0] = (ends - starts)[:, None]
+    return quad_arrays(corners, (0, 1, 0), uvs)
+
+
+def build_region(grid, r0, c0, r1, c1):
+    """Triangle arrays per material for the cells in rows r0:r1, cols c0:c1"""
+    block = np.asarray(grid)[r0:r1, c0:c1]
+    run_rows, starts, ends = row_runs(block != WALL)
+    return {
+        "ground": ground_arrays(run_rows + r0, starts + c0, ends + c0, GROUND_HEIGHT),
+        "wall": wall_arrays(grid, r0, c0, r1, c1, WALL_HEIGHT),
+    }
+
+
+def chunk_keys(rows, cols, chunk_size=CHUNK_SIZE):
+    """All (chunk_row, chunk_col) keys covering a rows x cols grid"""
+    return [(cr, cc)
+            for cr in range((rows + chunk_size - 1) // chunk_size)
+            for cc in range((cols + chunk_size - 1) // chunk_size)]
+
+
+def chunk_bounds(key, rows, cols, chunk_size=CHUNK_SIZE):
+    """Cell bounds (r0, c0, r1, c1) of a chunk, clipped to the grid"""
+    cr, cc = key
+    r0, c0 = cr * chunk_size, cc * chunk_size
+    return r0, c0, min(r0 + chunk_size, rows), min(c0 + chunk_size, cols)
+
+
+def chunks_touching(row, col, rows, cols, chunk_size=CHUNK_SIZE):
+    """Keys of the chunks whose meshes depend on a cell: its own chunk and, for a
+    cell on a chunk edge, the neighbours whose wall faces it hides or exposes"""
+    cr, cc = row // chunk_size, col // chunk_size
+    chunk_rows = [cr]
+    chunk_cols = [cc]
+    if row % chunk_size == 0 and cr > 0:
+        chunk_rows.append(cr - 1)
+    if row % chunk_size == chunk_size - 1 and row + 1 < rows:
+        chunk_rows.append(cr + 1)
+    if col % chunk_size == 0 and cc > 0:
+        chunk_cols.append(cc - 1)
+    if col % chunk_size == chunk_size - 1 and col + 1 < cols:
+        chunk_cols.append(cc + 1)
+    # Side faces only touch edge neighbours, not diagonal ones
+    return {(r, cc) for r in chunk_rows} | {(cr, c) for c in chunk_cols}
+
+
+def build_chunk(grid, key, chunk_size=CHUNK_SIZE):
+    """Triangle arrays per material for one chunk"""
+    rows, cols = np.shape(grid)
+    return build_region(grid, *chunk_bounds(key, rows, cols, chunk_size))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python -m rayengine.level_mesh <map .json or .rmap>")
+        sys.exit(2)
+    from rayengine.mapfile import load_map_file
+
+    stats = wall_triangle_stats(np.asarray(load_map_file(sys.argv[1])["grid"]))
+    print(f"Walls:             {stats['walls']}")
+    print(f"Cube triangles:    {stats['cubes']}")
+    print(f"Exposed faces:     {stats['exposed']}")
+    print(f"Greedy-meshed:     {stats['greedy']} ({stats['greedy'] / max(stats['cubes'], 1):.1%} of cubes)")
@@ -0,0 +1,128 @@
+import ctypes
+
+import numpy as np
+import raylibpy as rl
+
+from rayengine.level_mesh import CHUNK_SIZE, MATERIALS, build_chunk, chunk_keys, chunks_touching
+
+# Streamed chunks uploaded per frame at most, to spread the GPU uploads out
+STREAM_UPLOADS_PER_FRAME = 4
+
+# ------------------------------------------------------------------------------
+# Merged Level Meshes
+# ------------------------------------------------------------------------------
+def _raylib_buffer(array):
+    """Copy a float32 array into raylib-owned memory (freed by unload_mesh)"""
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    ptr = rl.mem_alloc(array.nbytes)
+    ctypes.memmove(ptr, array.ctypes.data, array.nbytes)
+    return ctypes.cast(ptr, ctypes.POINTER(ctypes.c_float))
+
+
+def upload_arrays(vertices, normals, texcoords):
+    """Create a GPU mesh from merged triangle arrays"""
+    mesh = rl.Mesh()
+    mesh.vertex_count = len(vertices)
+    mesh.triangle_count = len(vertices) // 3
+    mesh.vertices = _raylib_buffer(vertices)
+    mesh.normals = _raylib_buffer(normals)
+    mesh.texcoords = _raylib_buffer(texcoords)
+    rl.upload_mesh(mesh, False)
+    return mesh
+
+
+class LevelRenderer:
+    """Draws the ground and walls of a grid as one merged mesh per material and
+    chunk. With a ChunkStreamer only the chunks around the player are kept;
+    chunk_arrays can supply already meshed chunks"""
+
+    def __init__(self, grid, chunk_size=CHUNK_SIZE, streamer=None, chunk_arrays=None):
+        self.cells = np.array(grid, dtype=np.uint8)
+        self.chunk_size = chunk_size
+        self.chunks = {}
+        self.dirty = set()
+        self.mesh_count = 0
+        self.draw_calls = 0
+        self.culled_calls = 0
+        self.triangles = 0
+        self.transform = rl.matrix_identity()
+        self.streamer = streamer
+        if streamer is None:
+            rows, cols = self.cells.shape
+            for key in chunk_keys(rows, cols, chunk_size):
+                # Prebuilt (cooked) arrays skip meshing
+                if chunk_arrays and key in chunk_arrays:
+                    self.upload_chunk(key, chunk_arrays[key])
+                else:
+                    self.rebuild_chunk(key)
+
+    def rebuild_chunk(self, key):
+        """Regenerate and re-upload the meshes of one chunk"""
+        self.upload_chunk(key, build_chunk(self.cells, key, self.chunk_size))
+
+    def upload_chunk(self, key, arrays):
+        """Replace the meshes of one chunk with the given triangle arrays"""
+        self.unload_chunk(key)
+        meshes = {}
+        for name, (vertices, normals, texcoords) in arrays.items():
+            meshes[name] = upload_arrays(vertices, normals, texcoords) if len(vertices) else None
+        self.chunks[key] = meshes
+        self.mesh_count += sum(mesh is not None for mesh in meshes.values())
+
+    def set_cell(self, row, col, value):
+        """Record a grid change; the chunks it affects are rebuilt by rebuild_dirty()"""
+        if self.cells[row, col] != value:
+            self.cells[row, col] = value
+            rows, cols = self.cells.shape
+            self.dirty.update(chunks_touching(row, col, rows, cols, self.chunk_size))
+
+    def rebuild_dirty(self):
+        """Rebuild only the chunks touched since the last call"""
+        for key in self.dirty:
+            # Streamed chunks that are not loaded pick the change up when they load
+            if self.streamer is None or key in self.chunks:
+                self.rebuild_chunk(key)
+        self.dirty.clear()
+
+    def stream(self, x, z, max_uploads=STREAM_UPLOADS_PER_FRAME):
+        """Upload the streamed chunks that are ready and free distant ones"""
+        if self.streamer is None:
+            return
+        for key in self.streamer.update(x, z):
+            self.unload_chunk(key)
+        for key, arrays in self.streamer.poll(max_uploads):
+            self.upload_chunk(key, arrays)
+
+    def draw(self, material, textures, keys=None):
+        """Draw the level (or only the chunks in keys); textures maps material
+        name to a texture (or None)"""
+        diffuse = material.maps[rl.MATERIAL_MAP_DIFFUSE]
+        default_texture = rl.Texture2D.from_buffer_copy(diffuse.texture)
+        keys = self.chunks.keys() if keys is None else keys
+        self.draw_calls = 0
+        self.triangles = 0
+        for name in MATERIALS:
+            diffuse.texture = textures.get(name) or default_texture
+            for key in keys:
+                meshes = self.chunks.get(key)
+                mesh = meshes.get(name) if meshes else None
+                if mesh is not None:
+                    rl.draw_mesh(mesh, material, self.transform)
+                    self.draw_calls += 1
+                    self.triangles += mesh.triangle_count
+        diffuse.texture = default_texture
+        self.culled_calls = self.mesh_count - self.draw_calls
+
+    def unload_chunk(self, key):
+        """Free the GPU and CPU buffers of one chunk"""
+        for mesh in self.chunks.pop(key, {}).values():
+            if mesh is not None:
+                rl.unload_mesh(mesh)
+                self.mesh_count -= 1
+
+    def unload(self):
+        """Free all level meshes and stop streaming"""
+        if self.streamer is not None:
+            self.streamer.close()
+        for key in list(self.chunks):
+            self.unload_chunk(key)
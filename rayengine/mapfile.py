@@ -0,0 +1,255 @@
+import json
+import mmap
+import re
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# Map Files (JSON and compact binary)
+# ------------------------------------------------------------------------------
+# Binary layout (little-endian):
+#   header    magic "RMAP", version u16, compression u16, rows u32, cols u32,
+#             settings length u32, grid payload length u32
+#   settings  UTF-8 JSON with every map field except the grid
+#   payload   version 1: grid cells as uint8, row-major, zlib-compressed
+#             version 2: chunk size u32, then (chunk count + 1) u64 offsets
+#             into the chunk data that follows, then every chunk's cells
+#             (row-major within the chunk, chunks in row-major order), each
+#             compressed on its own so chunks can be read independently
+BINARY_MAGIC = b"RMAP"
+BINARY_VERSION = 2
+BINARY_EXTENSION = ".rmap"
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+
+MAP_CHUNK_SIZE = 32
+
+_HEADER = struct.Struct("<4sHHIIII")
+_CHUNK_SIZE = struct.Struct("<I")
+
+
+def _chunk_count(rows, cols, chunk_size):
+    """Chunks per column and per row of a rows x cols grid"""
+    return (rows + chunk_size - 1) // chunk_size, (cols + chunk_size - 1) // chunk_size
+
+
+def grid_from_json(data):
+    """Grid array of a JSON map (maps without rows/cols are the old 20x20 format)"""
+    grid = np.array(data["grid"], dtype=np.uint8)
+    if grid.ndim != 2:
+        raise ValueError("grid is not a 2D array")
+    rows = data.get("rows", grid.shape[0])
+    cols = data.get("cols", grid.shape[1])
+    if grid.shape != (rows, cols):
+        raise ValueError(f"grid is {grid.shape[0]}x{grid.shape[1]}, expected {rows}x{cols}")
+    return grid
+
+
+def save_json_map(path, data):
+    """Write a map dict as JSON (the original editor format)"""
+    grid = np.asarray(data["grid"])
+    data = dict(data, rows=grid.shape[0], cols=grid.shape[1], grid=grid.tolist())
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_json_map(path):
+    """Read a JSON map; the grid comes back as a uint8 array"""
+    with open(path, "r") as f:
+        data = json.load(f)
+    data["grid"] = grid_from_json(data)
+    data["rows"], data["cols"] = data["grid"].shape
+    return data
+
+
+def save_binary_map(path, data, level=6, chunk_size=MAP_CHUNK_SIZE):
+    """Write a map dict as a binary map with a chunked, zlib-compressed grid"""
+    grid = np.ascontiguousarray(data["grid"], dtype=np.uint8)
+    rows, cols = grid.shape
+    settings = {key: value for key, value in data.items() if key not in ("grid", "rows", "cols")}
+    settings_bytes = json.dumps(settings, separators=(",", ":")).encode("utf-8")
+
+    chunk_rows, chunk_cols = _chunk_count(rows, cols, chunk_size)
+    chunks = [zlib.compress(grid[r:r + chunk_size, c:c + chunk_size].tobytes(), level)
+              for r in range(0, chunk_rows * chunk_size, chunk_size)
+              for c in range(0, chunk_cols * chunk_size, chunk_size)]
+    offsets = np.zeros(len(chunks) + 1, dtype="<u8")
+    np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+    payload_len = _CHUNK_SIZE.size + offsets.nbytes + int(offsets[-1])
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, COMPRESSION_ZLIB,
+                             rows, cols, len(settings_bytes), payload_len))
+        f.write(settings_bytes)
+        f.write(_CHUNK_SIZE.pack(chunk_size))
+        f.write(offsets.tobytes())
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def _decompress(payload, compression):
+    """Grid bytes of a payload"""
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression != COMPRESSION_NONE:
+        raise ValueError(f"unknown grid compression {compression}")
+    return bytes(payload)
+
+
+def _read_header(buffer):
+    """Header fields of a binary map, validated"""
+    if len(buffer) < _HEADER.size:
+        raise ValueError("truncated map header")
+    magic, version, compression, rows, cols, settings_len, payload_len = _HEADER.unpack_from(buffer)
+    if magic != BINARY_MAGIC:
+        raise ValueError("not a binary map file")
+    if version not in (1, 2):
+        raise ValueError(f"unsupported binary map version {version}")
+    return version, compression, rows, cols, settings_len, payload_len
+
+
+class MapChunkReader:
+    """Reads chunks of a version 2 binary map on demand through mmap, so only
+    the chunks asked for are read and decompressed"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.view = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError("truncated map header")
+        try:
+            version, self.compression, self.rows, self.cols, settings_len, payload_len = _read_header(self.view)
+            if version != 2:
+                raise ValueError(f"binary map version {version} has no chunk table")
+            start = _HEADER.size + settings_len
+            if len(self.view) < start + payload_len:
+                raise ValueError("truncated map payload")
+            self.settings = json.loads(self.view[_HEADER.size:start].decode("utf-8"))
+            (self.chunk_size,) = _CHUNK_SIZE.unpack_from(self.view, start)
+            self.chunk_rows, self.chunk_cols = _chunk_count(self.rows, self.cols, self.chunk_size)
+            count = self.chunk_rows * self.chunk_cols + 1
+            table = start + _CHUNK_SIZE.size
+            self.offsets = np.frombuffer(self.view[table:table + count * 8], dtype="<u8").astype(np.int64)
+            self.data_start = table + count * 8
+        except Exception:
+            self.close()
+            raise
+
+    def chunk_bounds(self, key):
+        """Cell bounds (r0, c0, r1, c1) of a chunk"""
+        cr, cc = key
+        r0, c0 = cr * self.chunk_size, cc * self.chunk_size
+        return r0, c0, min(r0 + self.chunk_size, self.rows), min(c0 + self.chunk_size, self.cols)
+
+    def read_chunk(self, key):
+        """Cells of one chunk as a uint8 array"""
+        cr, cc = key
+        index = cr * self.chunk_cols + cc
+        start = self.data_start + self.offsets[index]
+        payload = _decompress(self.view[start:self.data_start + self.offsets[index + 1]], self.compression)
+        r0, c0, r1, c1 = self.chunk_bounds(key)
+        if len(payload) != (r1 - r0) * (c1 - c0):
+            raise ValueError(f"chunk {key} has {len(payload)} cells, expected {r1 - r0}x{c1 - c0}")
+        return np.frombuffer(payload, dtype=np.uint8).reshape(r1 - r0, c1 - c0)
+
+    def read_region(self, r0, c0, r1, c1):
+        """Cells in rows r0:r1, cols c0:c1, assembled from the chunks they span"""
+        region = np.empty((r1 - r0, c1 - c0), dtype=np.uint8)
+        size = self.chunk_size
+        for cr in range(r0 // size, (r1 - 1) // size + 1):
+            for cc in range(c0 // size, (c1 - 1) // size + 1):
+                cells = self.read_chunk((cr, cc))
+                kr0, kc0, kr1, kc1 = self.chunk_bounds((cr, cc))
+                sr0, sc0 = max(r0, kr0), max(c0, kc0)
+                sr1, sc1 = min(r1, kr1), min(c1, kc1)
+                region[sr0 - r0:sr1 - r0, sc0 - c0:sc1 - c0] = cells[sr0 - kr0:sr1 - kr0, sc0 - kc0:sc1 - kc0]
+        return region
+
+    def read_grid(self):
+        """The whole grid"""
+        return self.read_region(0, 0, self.rows, self.cols)
+
+    def close(self):
+        """Release the mapping and the file"""
+        self.view.close()
+        self.file.close()
+
+
+def load_binary_map(path):
+    """Read a binary map into the same dict layout as load_json_map"""
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        version, compression, rows, cols, settings_len, payload_len = _read_header(header)
+        if version == 1:
+            data = json.loads(f.read(settings_len).decode("utf-8"))
+            payload = _decompress(f.read(payload_len), compression)
+            if len(payload) != rows * cols:
+                raise ValueError(f"grid payload has {len(payload)} cells, expected {rows}x{cols}")
+            grid = np.frombuffer(payload, dtype=np.uint8).reshape(rows, cols).copy()
+        else:
+            reader = MapChunkReader(path)
+            try:
+                data, grid = reader.settings, reader.read_grid()
+            finally:
+                reader.close()
+
+    data["grid"] = grid
+    data["rows"], data["cols"] = rows, cols
+    return data
+
+
+def is_binary_map(path):
+    """Check the file's magic bytes"""
+    with open(path, "rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def is_map_file(path):
+    """Check whether a file holds a map: the binary magic bytes, or JSON with a
+    "grid" key (other JSON files, such as manifests, have none). JSON is only
+    scanned, not parsed"""
+    if is_binary_map(path):
+        return True
+    key = re.compile(rb'"grid"\s*:')
+    tail = b""
+    with open(path, "rb") as f:
+        if not f.read(64).lstrip().startswith(b"{"):
+            return False
+        f.seek(0)
+        for block in iter(lambda: f.read(1 << 20), b""):
+            if key.search(tail + block):
+                return True
+            tail = block[-16:]
+    return False
+
+
+def load_map_file(path):
+    """Load a map in either format, detected from the file contents"""
+    if is_binary_map(path):
+        return load_binary_map(path)
+    return load_json_map(path)
+
+
+def save_map_file(path, data):
+    """Save a map, choosing the binary format for .rmap paths and JSON otherwise"""
+    if path.lower().endswith(BINARY_EXTENSION):
+        save_binary_map(path, data)
+    else:
+        save_json_map(path, data)
+
+
+def convert_map(src_path, dst_path):
+    """Convert a map between JSON and binary (by destination extension)"""
+    save_map_file(dst_path, load_map_file(src_path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python -m rayengine.mapfile <input map> <output .json|.rmap>")
+        sys.exit(2)
+    convert_map(sys.argv[1], sys.argv[2])
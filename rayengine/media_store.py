@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+# ------------------------------------------------------------------------------
+# Content-Addressed Media Store
+# ------------------------------------------------------------------------------
+# Every file in the media directory is known by the SHA-256 of its contents.
+# The manifest remembers the hash of each file seen (stored or source) along
+# with its size and mtime, so unchanged files are never reread, identical files
+# are stored once and different files with the same name get distinct names.
+# References to files outside the media directory resolve by content, never by
+# file name, so two different files called wall.png can't be mixed up. The
+# store is safe to use from asset loading threads; hashing runs unlocked.
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def hash_file(path):
+    """SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class MediaStore:
+    """Media directory that stores each distinct file content once"""
+
+    def __init__(self, media_dir):
+        self.media_dir = media_dir
+        self.manifest_path = os.path.join(media_dir, MANIFEST_NAME)
+        self.files = {}    # stored file name -> content hash
+        self.sources = {}  # absolute path -> {"hash", "size", "mtime"}
+        self.by_hash = {}  # content hash -> stored file name
+        self.dirty = False
+        self.lock = threading.RLock()
+        os.makedirs(media_dir, exist_ok=True)
+        self.load_manifest()
+
+    def load_manifest(self):
+        """Read the manifest (a missing or broken manifest starts empty)"""
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.files = manifest.get("files", {})
+                self.sources = manifest.get("sources", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print("Error reading media manifest:", e)
+        self.by_hash = {digest: name for name, digest in self.files.items()}
+
+    def save_manifest(self):
+        """Write the manifest if anything changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": MANIFEST_VERSION, "files": self.files, "sources": self.sources}, f)
+            os.replace(tmp_path, self.manifest_path)
+            self.dirty = False
+
+    def file_hash(self, path):
+        """Content hash of a file, read from the manifest while size and mtime match"""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self.lock:
+            entry = self.sources.get(key)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+                return entry["hash"]
+        digest = hash_file(path)
+        with self.lock:
+            self.sources[key] = {"hash": digest, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+            self.dirty = True
+            # Saved right away, so the next session doesn't hash the file again
+            self.save_manifest()
+        return digest
+
+    def _remember(self, path, digest):
+        """Record a file whose hash is already known"""
+        stat = os.stat(path)
+        self.sources[os.path.abspath(path)] = {"hash": digest, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+        self.dirty = True
+
+    def path_for(self, name):
+        """Path of a stored file"""
+        return os.path.join(self.media_dir, name)
+
+    def _stored_name(self, digest):
+        """Name of the stored file with this content, if it is still intact"""
+        name = self.by_hash.get(digest)
+        if name is None:
+            return None
+        path = self.path_for(name)
+        if os.path.exists(path) and self.file_hash(path) == digest:
+            return name
+        self._forget(name)
+        return None
+
+    def _forget(self, name):
+        digest = self.files.pop(name, None)
+        if digest is not None and self.by_hash.get(digest) == name:
+            del self.by_hash[digest]
+        self.dirty = True
+
+    def _free_name(self, filename, digest):
+        """Pick a file name that doesn't clash with different stored content"""
+        stem, ext = os.path.splitext(filename)
+        candidates = [filename, f"{stem}-{digest[:8]}{ext}", f"{stem}-{digest}{ext}"]
+        for name in candidates:
+            if name == MANIFEST_NAME:
+                continue
+            path = self.path_for(name)
+            if self.files.get(name) == digest or not os.path.exists(path):
+                return name
+            if name not in self.files and self.file_hash(path) == digest:
+                return name
+        raise OSError(f"no free media name for {filename}")
+
+    def stored_path(self, src_path):
+        """Media path of the stored copy of a file added earlier, found by the
+        content hash recorded for it (the file itself may be gone), or None"""
+        with self.lock:
+            entry = self.sources.get(os.path.abspath(src_path))
+            name = self._stored_name(entry["hash"]) if entry else None
+        return self.path_for(name) if name else None
+
+    def resolve(self, path):
+        """Media path for a reference to a file, or None: a bare or media
+        directory name is a stored file, anything else is matched by content
+        (and stored if it is new)"""
+        directory = os.path.dirname(path)
+        if not directory or os.path.abspath(directory) == os.path.abspath(self.media_dir):
+            stored = self.path_for(os.path.basename(path))
+            if os.path.exists(stored):
+                return stored
+        if os.path.exists(path):
+            return self.add(path)
+        return self.stored_path(path)
+
+    def add(self, src_path):
+        """Store a file and return its media path; identical contents are stored once"""
+        digest = self.file_hash(src_path)
+        with self.lock:
+            name = self._stored_name(digest)
+            if name is None:
+                name = self._free_name(os.path.basename(src_path), digest)
+                dest_path = self.path_for(name)
+                if os.path.abspath(src_path) != os.path.abspath(dest_path):
+                    shutil.copy2(src_path, dest_path)
+                    self._remember(dest_path, digest)
+                if name in self.files:
+                    self._forget(name)
+                self.files[name] = digest
+                self.by_hash[digest] = name
+                self.dirty = True
+            self.save_manifest()
+            return self.path_for(name)
@@ -0,0 +1,102 @@
+import raylibpy as rl
+
+# ------------------------------------------------------------------------------
+# Cached Main Menu
+# ------------------------------------------------------------------------------
+# The menu is static, so it is drawn once into a RenderTexture and blitted each
+# frame. It is only drawn again when the window size changes or invalidate() is
+# called. Button hit rectangles come from the same layout pass.
+TITLE_FONT_SIZE = 40
+BUTTON_FONT_SIZE = 20
+BUTTON_WIDTH = 200
+BUTTON_HEIGHT = 50
+BUTTON_SPACING = 20
+MARGIN = 50
+
+
+def menu_layout(settings, width, height, measure_text):
+    """Title position and button rectangles (x, y, w, h) for the given screen size"""
+    title_width = measure_text(settings.menu_title, TITLE_FONT_SIZE)
+    if settings.menu_alignment == "left":
+        title_x = MARGIN
+        button_x = MARGIN
+    elif settings.menu_alignment == "right":
+        title_x = width - title_width - MARGIN
+        button_x = width - BUTTON_WIDTH - MARGIN
+    else:
+        title_x = (width - title_width) // 2
+        button_x = (width - BUTTON_WIDTH) // 2
+
+    buttons = [
+        (button_x, height // 2 - BUTTON_HEIGHT - BUTTON_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT),
+        (button_x, height // 2, BUTTON_WIDTH, BUTTON_HEIGHT),
+        (button_x, height // 2 + BUTTON_HEIGHT + BUTTON_SPACING, BUTTON_WIDTH, BUTTON_HEIGHT),
+    ]
+    return (title_x, height // 4), buttons
+
+
+class MenuCache:
+    """Main menu rendered once into a texture"""
+
+    def __init__(self, settings, bg_texture=None):
+        self.settings = settings
+        self.bg_texture = bg_texture
+        self.target = None
+        self.size = None
+        self.buttons = []
+        self.renders = 0
+
+    def invalidate(self):
+        """Redraw the menu on the next update (after a configuration change)"""
+        self.size = None
+
+    def update(self, width, height):
+        """Render the menu texture if it is missing or out of date (call outside
+        begin_drawing)"""
+        if self.size == (width, height):
+            return
+        if self.target is not None:
+            rl.unload_render_texture(self.target)
+        self.target = rl.load_render_texture(width, height)
+        self.size = (width, height)
+        self.renders += 1
+
+        settings = self.settings
+        title_pos, self.buttons = menu_layout(settings, width, height, rl.measure_text)
+
+        rl.begin_texture_mode(self.target)
+        if settings.menu_bg_mode == "color":
+            rl.clear_background(settings.menu_bg_color)
+        elif settings.menu_bg_mode == "image" and self.bg_texture:
+            rl.clear_background(rl.RAYWHITE)
+            rl.draw_texture(self.bg_texture, 0, 0, rl.WHITE)
+        else:
+            rl.clear_background(rl.RAYWHITE)
+
+        rl.draw_text(settings.menu_title, title_pos[0], title_pos[1], TITLE_FONT_SIZE, settings.menu_title_color)
+        for (x, y, w, h), text, color in zip(self.buttons, settings.menu_buttons, settings.menu_button_colors):
+            rl.draw_rectangle(x, y, w, h, rl.LIGHTGRAY)
+            text_width = rl.measure_text(text, BUTTON_FONT_SIZE)
+            rl.draw_text(text, x + (w - text_width) // 2, y + (h - BUTTON_FONT_SIZE) // 2, BUTTON_FONT_SIZE, color)
+        rl.end_texture_mode()
+
+    def draw(self):
+        """Blit the cached menu (inside begin_drawing)"""
+        width, height = self.size
+        # Render textures are stored upside down; a negative source height flips them
+        rl.draw_texture_rec(self.target.texture, rl.Rectangle(0, 0, width, -height),
+                            rl.Vector2(0, 0), rl.WHITE)
+
+    def button_at(self, x, y):
+        """Index of the button under the point, or None"""
+        for i, (bx, by, bw, bh) in enumerate(self.buttons):
+            if bx <= x <= bx + bw and by <= y <= by + bh:
+                return i
+        return None
+
+    def unload(self):
+        """Free the render texture"""
+        if self.target is not None:
+            rl.unload_render_texture(self.target)
+            self.target = None
+            self.size = None
@@ -0,0 +1,213 @@
+import math
+import threading
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# Flow-Field Pathfinding
+# ------------------------------------------------------------------------------
+# One breadth-first search from the player's cell gives every open cell its
+# walking distance to the player. An enemy steps to whichever neighbouring cell
+# is closer, so chasing costs the same per enemy however many there are. The
+# field is rebuilt after the player enters a new cell: on a worker thread, or in
+# the simulation itself at most every PATH_REBUILD_TICKS ticks and a budget of
+# cells per tick, so no tick stalls on a large map and a replay sees the same
+# field on the same tick. The search stops PATH_MAX_DISTANCE steps out, so it
+# only ever covers the square window of that radius around the player, and
+# its cost doesn't depend on the map size; enemies further away stand still.
+UNREACHABLE = -1
+PATH_MAX_DISTANCE = 128
+PATH_REBUILD_TICKS = 15
+# Cells a synchronous rebuild visits per tick (well under 1 ms)
+PATH_CELLS_PER_TICK = 4096
+
+# Neighbour order of the step lookup: +x, -x, +z, -z (columns, then rows)
+_STEP_COLS = np.array([1, -1, 0, 0], dtype=np.int8)
+_STEP_ROWS = np.array([0, 0, 1, -1], dtype=np.int8)
+_FAR = np.iinfo(np.int32).max
+
+
+class FlowFieldBuilder:
+    """Breadth-first search from (row, col) through 4-connected open cells,
+    expanded a budget of cells at a time"""
+
+    def __init__(self, solid, row, col, max_distance=None):
+        self.target = (row, col)
+        self.max_distance = max_distance
+        self.shape = solid.shape
+        self.origin = (0, 0)
+        if max_distance is not None:
+            # Nothing further than max_distance steps away can be reached
+            r0, c0 = max(row - max_distance, 0), max(col - max_distance, 0)
+            solid = solid[r0:row + max_distance + 1, c0:col + max_distance + 1]
+            self.origin = (r0, c0)
+            row, col = row - r0, col - c0
+        rows, cols = solid.shape
+        # A one-cell solid border removes all bounds checks from the search
+        self.width = width = cols + 2
+        open_cells = np.zeros((rows + 2, width), dtype=bool)
+        open_cells[1:-1, 1:-1] = ~solid
+        self.open_cells = open_cells.ravel()
+        self.distance = np.full((rows + 2, width), UNREACHABLE, dtype=np.int32)
+        self.offsets = np.array([1, -1, width, -width])
+        # Cells reached from two frontier cells are deduplicated by letting the
+        # last write into `slot` win, which avoids sorting
+        self.slot = np.empty(self.open_cells.size, dtype=np.intp)
+
+        start = (row + 1) * width + col + 1
+        self.distance.flat[start] = 0
+        self.open_cells[start] = False
+        self.frontier = np.array([start])
+        self.level = 0
+
+    @property
+    def done(self):
+        return not self.frontier.size or self.level == self.max_distance
+
+    def advance(self, budget=None):
+        """Expand whole BFS levels until about budget cells were visited (or the
+        search is complete); returns True once it is complete"""
+        visited = 0
+        distance = self.distance.ravel()
+        frontier = self.frontier
+        while not self.done and (budget is None or visited < budget):
+            self.level += 1
+            candidates = (frontier[:, None] + self.offsets).ravel()
+            candidates = candidates[self.open_cells[candidates]]
+            order = np.arange(candidates.size)
+            self.slot[candidates] = order
+            candidates = candidates[self.slot[candidates] == order]
+            self.open_cells[candidates] = False
+            distance[candidates] = self.level
+            self.frontier = frontier = candidates
+            visited += frontier.size
+        return self.done
+
+    def field(self):
+        """The finished FlowField"""
+        return FlowField(self.target, self.distance, self.origin, self.shape)
+
+
+def bfs_distances(solid, row, col):
+    """Steps from (row, col) to every cell through 4-connected open cells;
+    UNREACHABLE for walls and cells cut off from it"""
+    return FlowField.build(solid, row, col).distance
+
+
+class FlowField:
+    """Distances to a target cell, and the step towards it from any cell. The
+    distances cover the window of the map starting at origin that the search
+    could reach; cells outside it are UNREACHABLE"""
+
+    def __init__(self, target, padded_distance, origin=(0, 0), shape=None):
+        self.target = target
+        # Kept with its UNREACHABLE border so neighbour lookups need no clipping
+        self.padded = padded_distance
+        self.distance = padded_distance[1:-1, 1:-1]
+        self.origin = origin
+        self.shape = shape or self.distance.shape
+
+    @classmethod
+    def build(cls, solid, row, col, max_distance=None):
+        """Complete field towards (row, col)"""
+        builder = FlowFieldBuilder(solid, row, col, max_distance)
+        builder.advance()
+        return builder.field()
+
+    def _window(self, rows, cols):
+        """Map cells as clipped padded-window indices, and whether each is inside"""
+        height, width = self.distance.shape
+        rows = rows - self.origin[0] + 1
+        cols = cols - self.origin[1] + 1
+        inside = (rows >= 1) & (rows <= height) & (cols >= 1) & (cols <= width)
+        return np.clip(rows, 1, height), np.clip(cols, 1, width), inside
+
+    def distance_at(self, rows, cols):
+        """Distances of map cells (UNREACHABLE outside the window)"""
+        rows, cols, inside = self._window(rows, cols)
+        return np.where(inside, self.padded[rows, cols], UNREACHABLE)
+
+    def steps(self, rows, cols):
+        """(step_x, step_z) towards the neighbour with the smallest distance for
+        each given map cell; (0, 0) where no neighbour is closer"""
+        rows, cols, inside = self._window(rows, cols)
+        neighbours = self.padded[rows + _STEP_ROWS[:, None], cols + _STEP_COLS[:, None]]
+        neighbours = np.where(neighbours >= 0, neighbours, _FAR)
+        best = neighbours.argmin(axis=0)
+        own = np.where(inside, self.padded[rows, cols], UNREACHABLE)
+        downhill = (own > 0) & (neighbours.min(axis=0) < own)
+        return np.where(downhill, _STEP_COLS[best], 0), np.where(downhill, _STEP_ROWS[best], 0)
+
+
+class Pathfinder:
+    """Keeps a flow field towards the player, rebuilt when the player changes cell"""
+
+    def __init__(self, solid, threaded=False, cells_per_tick=PATH_CELLS_PER_TICK,
+                 rebuild_ticks=PATH_REBUILD_TICKS, max_distance=PATH_MAX_DISTANCE):
+        self.solid = solid
+        self.cells_per_tick = cells_per_tick
+        self.rebuild_ticks = rebuild_ticks
+        self.max_distance = max_distance
+        self.field = None
+        self.target = None
+        self.builder = None
+        self.ticks_since_start = rebuild_ticks
+        self.builds = 0
+        self.thread = None
+        if threaded:
+            self.lock = threading.Lock()
+            self.wakeup = threading.Event()
+            self.pending = None
+            self.closed = False
+            self.thread = threading.Thread(target=self._run, name="flow-field", daemon=True)
+            self.thread.start()
+
+    def update(self, x, z):
+        """Point the field at the cell containing (x, z); called once per tick.
+        Enemies follow the previous field until the new one is complete"""
+        rows, cols = self.solid.shape
+        row = min(max(int(math.floor(z)), 0), rows - 1)
+        col = min(max(int(math.floor(x)), 0), cols - 1)
+        if self.thread is None:
+            self._advance(row, col)
+        elif (row, col) != self.target:
+            self.target = (row, col)
+            # Only the latest target matters
+            with self.lock:
+                self.pending = (row, col)
+            self.wakeup.set()
+
+    def _advance(self, row, col):
+        """One tick of synchronous building. A build in progress is finished
+        before the next one starts, so a moving player can't starve it"""
+        self.ticks_since_start += 1
+        if self.builder is None:
+            if (row, col) == self.target or self.ticks_since_start < self.rebuild_ticks:
+                return
+            self.target = (row, col)
+            self.builder = FlowFieldBuilder(self.solid, row, col, self.max_distance)
+            self.ticks_since_start = 0
+        if self.builder.advance(self.cells_per_tick):
+            self.field = self.builder.field()
+            self.builder = None
+            self.builds += 1
+
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            with self.lock:
+                target, self.pending = self.pending, None
+            if self.closed:
+                return
+            if target is not None:
+                self.field = FlowField.build(self.solid, *target, self.max_distance)
+                self.builds += 1
+
+    def close(self):
+        """Stop the worker thread"""
+        if self.thread is not None:
+            self.closed = True
+            self.wakeup.set()
+            self.thread.join()
+            self.thread = None
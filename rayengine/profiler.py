@@ -0,0 +1,105 @@
+import csv
+import time
+
+import numpy as np
+
+# ------------------------------------------------------------------------------
+# Frame Profiler
+# ------------------------------------------------------------------------------
+# Each frame is split into phases by calling mark(phase) when a phase ends; the
+# time since the previous mark is added to that phase. Per-frame totals are kept
+# in a ring buffer of the last HISTORY_FRAMES frames. While disabled every call
+# returns immediately, so the hooks can stay in the game loop.
+PHASES = ("input", "movement", "collision", "shooting", "pathfinding", "enemies", "draw3d", "hud", "present")
+HISTORY_FRAMES = 3600
+PROFILES_DIR = "profiles"
+
+
+def worst_average(frame_times, fraction):
+    """Mean of the slowest fraction of frame times (the '1% low' frame time)"""
+    if not len(frame_times):
+        return 0.0
+    count = max(1, int(len(frame_times) * fraction))
+    return float(np.partition(frame_times, len(frame_times) - count)[-count:].mean())
+
+
+class FrameProfiler:
+    """Per-phase frame timings over a ring buffer of recent frames"""
+
+    def __init__(self, phases=PHASES, history=HISTORY_FRAMES):
+        self.phases = phases
+        self.phase_index = {name: i for i, name in enumerate(phases)}
+        # One row per frame: phase seconds, then the whole frame's seconds
+        self.samples = np.zeros((history, len(phases) + 1))
+        self.current = [0.0] * len(phases)
+        self.count = 0
+        self.enabled = False
+        self.frame_start = 0.0
+        self.last = 0.0
+
+    def begin_frame(self):
+        """Start timing a frame"""
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        self.current = [0.0] * len(self.phases)
+
+    def mark(self, phase):
+        """End a phase: charge the time since the previous mark to it"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[self.phase_index[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self, phase="present"):
+        """End the last phase and store the frame in the ring buffer"""
+        if not self.enabled:
+            return
+        self.mark(phase)
+        row = self.samples[self.count % len(self.samples)]
+        row[:-1] = self.current
+        row[-1] = self.last - self.frame_start
+        self.count += 1
+
+    def history(self):
+        """Recorded frames, oldest first"""
+        size = len(self.samples)
+        if self.count <= size:
+            return self.samples[:self.count]
+        start = self.count % size
+        return np.concatenate((self.samples[start:], self.samples[:start]))
+
+    def summary(self):
+        """Mean milliseconds per phase and frame, plus 1% and 0.1% low frame times"""
+        frames = self.history() * 1000.0
+        if not len(frames):
+            return None
+        totals = frames[:, -1]
+        return {
+            "frames": len(frames),
+            "phases": dict(zip(self.phases, frames[:, :-1].mean(axis=0).tolist())),
+            "frame": float(totals.mean()),
+            "low_1": worst_average(totals, 0.01),
+            "low_01": worst_average(totals, 0.001),
+        }
+
+    def overlay_lines(self):
+        """Text lines for the in-game overlay"""
+        stats = self.summary()
+        if stats is None:
+            return ["Profiler: no frames yet"]
+        lines = [f"{name:<10}{ms:7.2f} ms" for name, ms in stats["phases"].items()]
+        lines.append(f"{'frame':<10}{stats['frame']:7.2f} ms")
+        lines.append(f"{'1% low':<10}{stats['low_1']:7.2f} ms")
+        lines.append(f"{'0.1% low':<10}{stats['low_01']:7.2f} ms")
+        return lines
+
+    def export_csv(self, path):
+        """Write the recorded frames as CSV, one row per frame in milliseconds"""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", *(f"{name}_ms" for name in self.phases), "frame_ms"])
+            first = max(0, self.count - len(self.samples))
+            for i, row in enumerate(self.history() * 1000.0, first):
+                writer.writerow([i, *(f"{ms:.4f}" for ms in row)])
@@ -0,0 +1,87 @@
+import math
+
+import raylibpy as rl
+
+# ------------------------------------------------------------------------------
+# Render Settings Snapshot
+# ------------------------------------------------------------------------------
+# The preview reads its colors, texts and menu layout once, when it starts, and
+# keeps them here as ready-to-use raylib values. The frame loop then needs no
+# Tk calls and no string parsing; shader uniforms go through UniformCache so a
+# value is only uploaded when it actually changes.
+WHITE = (255, 255, 255, 255)
+
+
+def parse_color(value, lookup_name=None, default=WHITE):
+    """RGBA tuple for '#rrggbb' or a color name; names are resolved by
+    lookup_name (Tk's winfo_rgb: 16-bit channels)"""
+    if value.startswith("#"):
+        try:
+            hex_str = value.lstrip('#')
+            return (int(hex_str[0:2], 16), int(hex_str[2:4], 16), int(hex_str[4:6], 16), 255)
+        except Exception as e:
+            print("Error parsing hex color:", value, e)
+            return default
+    try:
+        r, g, b = lookup_name(value)
+        return (int(r / 65535 * 255), int(g / 65535 * 255), int(b / 65535 * 255), 255)
+    except Exception as e:
+        print("Error converting color name:", value, e)
+        return default
+
+
+class RenderSettings:
+    """Colors, texts and lighting of one preview session, resolved up front"""
+
+    def __init__(self, values, rows, cols, lookup_name=None):
+        def color(key):
+            return rl.Color(*parse_color(values[key], lookup_name))
+
+        self.sky_color = color("sky_color")
+        self.sun_color = color("sun_color")
+
+        self.win_text = values["win_message"] or "YOU WIN!"
+        self.win_color = color("win_message_color")
+
+        self.menu_bg_mode = values["main_menu_bg_mode"]
+        self.menu_bg_color = color("main_menu_bg_color")
+        self.menu_alignment = values["main_menu_alignment"]
+        self.menu_title = values["main_menu_title"] or "My Game"
+        self.menu_title_color = color("main_menu_title_color")
+        self.menu_buttons = [
+            values["main_menu_button1"] or "Start Game",
+            values["main_menu_button2"] or "Options",
+            values["main_menu_button3"] or "Exit",
+        ]
+        self.menu_button_colors = [color(f"main_menu_button{i}_color") for i in (1, 2, 3)]
+
+        # The sun hangs off one corner of the map and lights its center
+        self.sun_position = rl.Vector3(cols * 1.5, 10, -cols * 0.5)
+        dx, dy, dz = cols / 2 - cols * 1.5, -10.0, rows / 2 + cols * 0.5
+        length = math.sqrt(dx * dx + dy * dy + dz * dz)
+        self.light_dir = (dx / length, dy / length, dz / length)
+
+
+class UniformCache:
+    """Shader uniform locations looked up once; values sent only when changed"""
+
+    def __init__(self, shader):
+        self.shader = shader
+        self.locations = {}
+        self.values = {}
+
+    def location(self, name):
+        """Cached get_shader_location (-1 if the shader has no such uniform)"""
+        loc = self.locations.get(name)
+        if loc is None:
+            loc = self.locations[name] = rl.get_shader_location(self.shader, name)
+        return loc
+
+    def set(self, name, value, uniform_type):
+        """Upload a uniform value (a number or tuple) unless the shader already has it"""
+        if self.values.get(name) == value:
+            return
+        loc = self.location(name)
+        if loc != -1:
+            rl.set_shader_value(self.shader, loc, list(value) if isinstance(value, tuple) else value, uniform_type)
+        self.values[name] = value
@@ -0,0 +1,160 @@
+import hashlib
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from rayengine.simulation import TICK_RATE, FrameInput, World
+
+# ------------------------------------------------------------------------------
+# Input Recording and Replay
+# ------------------------------------------------------------------------------
+# A log holds everything World needs to reproduce a session: the map, the shot
+# cooldown and the input of every simulated frame. Values are stored exactly as
+# the simulation saw them (frame time and mouse delta are float32 in raylib), so
+# replaying a log reaches bit-for-bit the same player and enemy state.
+#
+# Layout (little-endian):
+#   header    magic "RINP", version u16, tick rate u16, rows u32, cols u32,
+#             shot cooldown f64, grid payload length u32
+#   payload   grid cells as uint8, row-major, zlib-compressed
+#   frames    dt f32, mouse dx f32, mouse dy f32, key bits u8 (until EOF)
+LOG_MAGIC = b"RINP"
+LOG_VERSION = 1
+LOG_EXTENSION = ".rinp"
+RECORDINGS_DIR = "recordings"
+
+_HEADER = struct.Struct("<4sHHIIdI")
+_FRAME = struct.Struct("<fffB")
+_KEYS = FrameInput._fields[:7]
+_FLUSH_FRAMES = 600
+
+
+def pack_frame(dt, inputs):
+    """Encode one frame of input"""
+    bits = 0
+    for bit, key in enumerate(_KEYS):
+        if getattr(inputs, key):
+            bits |= 1 << bit
+    return _FRAME.pack(dt, inputs.mouse_dx, inputs.mouse_dy, bits)
+
+
+def unpack_frame(record):
+    """Decode one frame of input into (dt, FrameInput)"""
+    dt, mouse_dx, mouse_dy, bits = _FRAME.unpack(record)
+    keys = [bool(bits & (1 << bit)) for bit in range(len(_KEYS))]
+    return dt, FrameInput(*keys, mouse_dx, mouse_dy)
+
+
+class InputRecorder:
+    """Writes the input of a preview session to a log file"""
+
+    def __init__(self, path, grid, cooldown_duration):
+        grid = np.ascontiguousarray(grid, dtype=np.uint8)
+        payload = zlib.compress(grid.tobytes(), 6)
+        self.path = path
+        self.frames = 0
+        self.buffer = bytearray()
+        self.file = open(path, "wb")
+        self.file.write(_HEADER.pack(LOG_MAGIC, LOG_VERSION, TICK_RATE,
+                                     grid.shape[0], grid.shape[1], cooldown_duration, len(payload)))
+        self.file.write(payload)
+
+    def record(self, dt, inputs):
+        """Log one frame; returns the frame as a replay will see it, which is
+        what the live simulation must be stepped with to stay reproducible"""
+        record = pack_frame(dt, inputs)
+        self.buffer += record
+        self.frames += 1
+        if self.frames % _FLUSH_FRAMES == 0:
+            self.flush()
+        return unpack_frame(record)
+
+    def flush(self):
+        """Write buffered frames to disk"""
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        """Flush and close the log"""
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+class InputLog:
+    """A recorded session loaded back from disk"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError("truncated input log header")
+            magic, version, tick_rate, rows, cols, cooldown, payload_len = _HEADER.unpack(header)
+            if magic != LOG_MAGIC:
+                raise ValueError("not an input log")
+            if version != LOG_VERSION:
+                raise ValueError(f"unsupported input log version {version}")
+            if tick_rate != TICK_RATE:
+                raise ValueError(f"log was recorded at {tick_rate} ticks/s, simulation runs at {TICK_RATE}")
+            payload = zlib.decompress(f.read(payload_len))
+            frames = f.read()
+
+        if len(payload) != rows * cols:
+            raise ValueError(f"grid payload has {len(payload)} cells, expected {rows}x{cols}")
+        # A session that was cut off mid-write still replays up to its last whole frame
+        usable = len(frames) - len(frames) % _FRAME.size
+
+        self.path = path
+        self.grid = np.frombuffer(payload, dtype=np.uint8).reshape(rows, cols).copy()
+        self.cooldown_duration = cooldown
+        self.frames = [unpack_frame(frames[i:i + _FRAME.size]) for i in range(0, usable, _FRAME.size)]
+
+    def new_world(self, profiler=None):
+        """A fresh World in the state the recording started from"""
+        return World(self.grid, self.cooldown_duration, profiler)
+
+
+def state_digest(world):
+    """Hash of the player and enemy state, equal between identical replays"""
+    h = hashlib.sha256()
+    h.update(struct.pack("<7dq", *world.position, *world.velocity, world.yaw, world.ticks))
+    h.update(struct.pack("<3d", world.pitch, world.time, world.accumulator))
+    enemies = world.enemies
+    for array in (enemies.positions, enemies.hits, enemies.states, enemies.timers):
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+
+def replay_headless(log):
+    """Run a log through the simulation without a window; returns the final
+    World and the wall-clock time of every frame step in seconds"""
+    world = log.new_world()
+    step_times = np.empty(len(log.frames))
+    for i, (dt, inputs) in enumerate(log.frames):
+        start = time.perf_counter()
+        world.step(dt, inputs)
+        world.events.clear()
+        step_times[i] = time.perf_counter() - start
+    return world, step_times
+
+
+def print_replay_report(world, frame_times, label="Replay"):
+    """Print frame time statistics and the final state digest"""
+    ms = np.asarray(frame_times) * 1000.0
+    if len(ms):
+        print(f"{label}: {len(ms)} frames, {world.ticks} ticks, "
+              f"mean {ms.mean():.3f} ms, p99 {np.percentile(ms, 99):.3f} ms, max {ms.max():.3f} ms")
+    print(f"{label}: {len(world.enemies)} enemies left, state {state_digest(world)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python -m rayengine.replay <input log .rinp>")
+        sys.exit(2)
+    log = InputLog(sys.argv[1])
+    world, step_times = replay_headless(log)
+    print_replay_report(world, step_times)
@@ -0,0 +1,236 @@
+import ctypes
+import os
+import time
+
+import pygame
+import raylibpy as rl
+
+from rayengine.cook import cooked_path, read_mesh, read_texture
+from rayengine.level_renderer import upload_arrays
+
+# ------------------------------------------------------------------------------
+# Preview Resource Registry
+# ------------------------------------------------------------------------------
+# Assets are keyed by kind, path and content hash and stay decoded in CPU
+# memory between preview sessions. GPU objects can't outlive the preview window
+# (closing it destroys the GL context), so each session only re-uploads textures
+# and meshes from the cached CPU copies; anything whose content changed on disk
+# is decoded again. Entries not acquired during a session are freed when it ends.
+# With a cook directory, content that has a cooked version (see rayengine.cook)
+# is loaded from that instead of being decoded or parsed. Assets named in the
+# cook manifest of the map being previewed are loaded from their cooked files
+# while the hasher (the media store's size and mtime check) still gives the
+# cooked hash for the source, or when the source is gone altogether.
+MAX_MATERIAL_MAPS = 12
+
+
+class _Entry:
+    __slots__ = ("digest", "cpu", "gpu", "refs", "reusable")
+
+    def __init__(self, digest, cpu):
+        self.digest = digest
+        self.cpu = cpu
+        self.gpu = None
+        self.refs = 0
+        self.reusable = True
+
+
+class ResourceRegistry:
+    """Reference-counted cache of preview textures, models and sounds"""
+
+    def __init__(self, hasher, cook_dir=None):
+        self.hasher = hasher
+        self.cook_dir = cook_dir
+        self.manifest = {}
+        self.entries = {}
+        self.report = []
+
+    def use_manifest(self, manifest):
+        """Take cooked files from a map's cook manifest (as returned by
+        rayengine.cook.load_map_manifest)"""
+        self.manifest = manifest
+
+    def _cooked(self, digest, cook_kind, path):
+        """Path of the cooked version of some content, or None"""
+        if self.cook_dir is None or digest is None or cook_kind is None:
+            return None
+        cooked = cooked_path(self.cook_dir, digest, cook_kind, path)
+        return cooked if os.path.exists(cooked) else None
+
+    def _lookup(self, kind, path, decode, free, cook_kind=None, load_cooked=None):
+        """Entry for (kind, path), decoding it again if the file content changed
+        (or loading its cooked version with load_cooked, if there is one)"""
+        key = (kind, os.path.abspath(path))
+        digest, cooked = self.manifest.get(cook_kind, {}).get(key[1], (None, None))
+        if cooked is not None and os.path.exists(path):
+            current = self.hasher(path)
+            if current != digest:
+                print("Cooked asset is out of date (cook the map again):", path)
+                digest, cooked = current, None
+        if cooked is None or not os.path.exists(cooked):
+            digest = self.hasher(path) if os.path.exists(path) else None
+            cooked = self._cooked(digest, cook_kind, path)
+        entry = self.entries.get(key)
+        status = "cached"
+        if entry is None or digest is None or entry.digest != digest:
+            if entry is not None:
+                free(entry)
+            if cooked:
+                try:
+                    entry = _Entry(digest, load_cooked(cooked))
+                    status = "cooked"
+                except Exception as e:
+                    print("Error loading cooked asset:", cooked, e)
+                    cooked = None
+            if not cooked:
+                entry = _Entry(digest, decode(path))
+                status = "decoded"
+            self.entries[key] = entry
+        entry.refs += 1
+        return entry, status
+
+    def _record(self, kind, path, start, status):
+        self.report.append((kind, path, (time.perf_counter() - start) * 1000, status))
+
+    def texture(self, path, mipmapped=False):
+        """GPU texture for an image file; mipmapped textures (for 3D surfaces)
+        use the cooked power-of-two version with mipmaps when there is one"""
+        if not path:
+            return None
+        start = time.perf_counter()
+        kind = "mipmapped texture" if mipmapped else "texture"
+        cook_kind = "texture" if mipmapped else "image"
+        entry, status = self._lookup(kind, path, rl.load_image, self._free_texture, cook_kind, _load_cooked_image)
+        if entry.gpu is None:
+            entry.gpu = rl.load_texture_from_image(entry.cpu)
+            if entry.cpu.mipmaps > 1:
+                rl.set_texture_filter(entry.gpu, rl.TEXTURE_FILTER_TRILINEAR)
+            if status == "cached":
+                status = "uploaded"
+        else:
+            status = "reused"
+        self._record("texture", path, start, status)
+        return entry.gpu
+
+    def model(self, path):
+        """GPU model for a mesh file"""
+        if not path:
+            return None
+        start = time.perf_counter()
+        entry, status = self._lookup("model", path, rl.load_model, self._free_model, "mesh", _load_cooked_model)
+        if status in ("decoded", "cooked"):
+            # Material textures of the model itself can't be re-uploaded later
+            entry.reusable = _uses_default_textures(entry.cpu)
+        elif entry.gpu is not None:
+            status = "reused"
+        else:
+            _reupload_model(entry.cpu)
+            status = "uploaded"
+        entry.gpu = entry.cpu
+        self._record("model", path, start, status)
+        return entry.gpu
+
+    def sound(self, path):
+        """Decoded pygame sound"""
+        if not path:
+            return None
+        start = time.perf_counter()
+        entry, status = self._lookup("sound", path, pygame.mixer.Sound, lambda entry: None,
+                                     "sound", pygame.mixer.Sound)
+        self._record("sound", path, start, status)
+        return entry.cpu
+
+    def begin_session(self):
+        """Start counting references and load times for a new preview session"""
+        self.report.clear()
+        for entry in self.entries.values():
+            entry.refs = 0
+
+    def print_report(self):
+        """Print the load time of every asset acquired this session"""
+        total = sum(ms for _, _, ms, _ in self.report)
+        print(f"Preview assets loaded in {total:.1f} ms:")
+        for kind, path, ms, status in self.report:
+            print(f"  {kind:<8} {ms:8.2f} ms  {status:<8} {path}")
+
+    def end_session(self):
+        """Release GPU copies before the window closes, keeping CPU data for the
+        next session; assets this session didn't use are freed entirely"""
+        for key, entry in list(self.entries.items()):
+            kind = "texture" if key[0].endswith("texture") else key[0]
+            # Models with textures of their own can't be re-uploaded, so they
+            # are unloaded completely while their GL context still exists
+            if entry.refs == 0 or not entry.reusable:
+                if kind == "texture":
+                    self._free_texture(entry)
+                elif kind == "model":
+                    self._free_model(entry)
+                del self.entries[key]
+                continue
+            if kind == "texture" and entry.gpu is not None:
+                rl.unload_texture(entry.gpu)
+            elif kind == "model" and entry.gpu is not None:
+                _release_mesh_buffers(entry.cpu)
+            entry.gpu = None
+
+    @staticmethod
+    def _free_texture(entry):
+        if entry.gpu is not None:
+            rl.unload_texture(entry.gpu)
+        rl.unload_image(entry.cpu)
+
+    @staticmethod
+    def _free_model(entry):
+        rl.unload_model(entry.cpu)
+
+
+def _load_cooked_image(path):
+    """CPU image (with its mipmaps) from a cooked .rtex file"""
+    width, height, mipmaps, pixel_format, pixels = read_texture(path)
+    # raylib frees image data itself, so it has to live in raylib's allocator
+    data = rl.mem_alloc(len(pixels))
+    ctypes.memmove(data, pixels, len(pixels))
+    return rl.Image(ctypes.cast(data, ctypes.c_void_p), width, height, mipmaps, pixel_format)
+
+
+def _load_cooked_model(path):
+    """Model with a single mesh from a cooked .rmesh file"""
+    return rl.load_model_from_mesh(upload_arrays(*read_mesh(path)))
+
+
+def _uses_default_textures(model):
+    """Check that no material map of the model has a texture of its own"""
+    default_id = rl.rl_get_texture_id_default()
+    for i in range(model.material_count):
+        maps = model.materials[i].maps
+        for j in range(MAX_MATERIAL_MAPS):
+            if maps[j].texture.id not in (0, default_id):
+                return False
+    return True
+
+
+def _release_mesh_buffers(model):
+    """Drop the GPU side of the model's meshes, keeping their vertex data; the
+    vertex buffers themselves go away with the GL context"""
+    for i in range(model.mesh_count):
+        mesh = model.meshes[i]
+        rl.rl_unload_vertex_array(mesh.vao_id)
+        mesh.vao_id = 0
+        if mesh.vbo_id:
+            rl.mem_free(ctypes.cast(mesh.vbo_id, ctypes.c_void_p))
+            mesh.vbo_id = None
+
+
+def _reupload_model(model):
+    """Upload cached mesh data to the new GL context and point the materials
+    at the context's default shader and texture"""
+    for i in range(model.mesh_count):
+        rl.upload_mesh(model.meshes[i], False)
+    default_id = rl.rl_get_texture_id_default()
+    for i in range(model.material_count):
+        material = model.materials[i]
+        material.shader.id = rl.rl_get_shader_id_default()
+        material.shader.locs = rl.rl_get_shader_locs_default()
+        for j in range(MAX_MATERIAL_MAPS):
+            if material.maps[j].texture.id:
+                material.maps[j].texture.id = default_id
@@ -0,0 +1,232 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from rayengine.collision import WallIndex
+from rayengine.enemies import ENEMY_RADIUS, EnemyManager
+from rayengine.pathfinding import Pathfinder
+from rayengine.profiler import FrameProfiler
+from rayengine.visibility import first_wall_distance
+
+# ------------------------------------------------------------------------------
+# Headless Game Simulation
+# ------------------------------------------------------------------------------
+# Everything the preview plays (movement, gravity, collision, shooting, enemy
+# timers) runs here at a fixed tick rate, independent of the render frame rate
+# and without a window or GPU. The renderer feeds one FrameInput per frame to
+# World.step() and draws the resulting state.
+TICK_RATE = 60
+TICK = 1.0 / TICK_RATE
+MAX_FRAME_TIME = 0.25
+
+SPAWN = 2
+
+PLAYER_RADIUS = 0.3
+PLAYER_HEIGHT = 1.8
+BASE_SPEED = 3.0
+RUN_MULTIPLIER = 2.0
+JUMP_IMPULSE = 5.0
+GRAVITY = 9.8
+MOUSE_SENSITIVITY = 0.005
+MAX_PITCH = 1.4
+
+SHOOT_DISPLAY_DURATION = 0.15
+
+# Held keys (forward..run) and edge-triggered presses (jump, shoot) of one frame
+FrameInput = namedtuple(
+    "FrameInput",
+    "forward back left right run jump shoot mouse_dx mouse_dy",
+    defaults=(False, False, False, False, False, False, False, 0.0, 0.0),
+)
+NO_INPUT = FrameInput()
+
+
+def ray_intersect_spheres(ray_origin, ray_dir, centers, radius):
+    """Distance along a unit ray to where it enters each sphere (inf for misses);
+    spheres whose center is behind the origin count as misses"""
+    offsets = centers - np.asarray(ray_origin)
+    t_ca = offsets @ np.asarray(ray_dir)
+    d2 = np.einsum("ij,ij->i", offsets, offsets) - t_ca * t_ca
+    hit = (t_ca >= 0) & (d2 <= radius * radius)
+    half_chord = np.sqrt(np.maximum(radius * radius - d2, 0.0))
+    return np.where(hit, np.maximum(t_ca - half_chord, 0.0), np.inf)
+
+
+class World:
+    """Game state of one preview session, advanced in fixed ticks"""
+
+    def __init__(self, grid, cooldown_duration, profiler=None, threaded_pathfinding=False):
+        grid = np.asarray(grid)
+        self.walls = WallIndex(grid)
+        self.cooldown_duration = cooldown_duration
+        # A disabled profiler's marks are no-ops
+        self.profiler = profiler or FrameProfiler()
+
+        # Player spawns on the first spawn cell, or the middle of the map
+        spawns = np.argwhere(grid == SPAWN)
+        if len(spawns):
+            self.spawn_row, self.spawn_col = (int(v) for v in spawns[0])
+        else:
+            self.spawn_row, self.spawn_col = grid.shape[0] // 2, grid.shape[1] // 2
+
+        self.position = [self.spawn_col + 0.5, 0.0, self.spawn_row + 0.5]
+        self.previous_position = list(self.position)
+        self.velocity = [0.0, 0.0, 0.0]
+        self.yaw = 0.0
+        self.pitch = 0.0
+
+        self.enemies = EnemyManager.from_grid(grid)
+        # A worker thread builds fields off the tick, but then enemies react to
+        # a new player cell a varying number of ticks later; replays need it off
+        self.pathfinder = Pathfinder(self.walls.solid, threaded_pathfinding)
+
+        self.time = 0.0
+        self.ticks = 0
+        self.accumulator = 0.0
+        self.last_shot_time = -cooldown_duration
+        self.shot_display_timer = 0.0
+        self.pending_jump = False
+        self.pending_shoot = False
+        self.events = []
+
+    def forward(self):
+        """Unit view direction from yaw and pitch"""
+        return (math.sin(self.yaw) * math.cos(self.pitch),
+                math.sin(self.pitch),
+                math.cos(self.yaw) * math.cos(self.pitch))
+
+    def eye_position(self, alpha=1.0):
+        """Camera position, interpolated between the last two ticks by alpha"""
+        x0, y0, z0 = self.previous_position
+        x1, y1, z1 = self.position
+        return (x0 + (x1 - x0) * alpha,
+                y0 + (y1 - y0) * alpha + PLAYER_HEIGHT * 0.5,
+                z0 + (z1 - z0) * alpha)
+
+    def step(self, dt, inputs):
+        """Advance one rendered frame: apply mouse look, then run as many fixed
+        ticks as dt accumulates; returns the number of ticks run"""
+        self.yaw -= inputs.mouse_dx * MOUSE_SENSITIVITY
+        self.pitch -= inputs.mouse_dy * MOUSE_SENSITIVITY
+        self.pitch = max(min(self.pitch, MAX_PITCH), -MAX_PITCH)
+
+        # Presses are kept until a tick consumes them
+        self.pending_jump = self.pending_jump or inputs.jump
+        self.pending_shoot = self.pending_shoot or inputs.shoot
+
+        self.accumulator += min(dt, MAX_FRAME_TIME)
+        ticks = 0
+        while self.accumulator >= TICK:
+            self.tick(inputs)
+            self.accumulator -= TICK
+            ticks += 1
+        return ticks
+
+    def tick(self, inputs):
+        """Advance the simulation by one fixed tick"""
+        self.previous_position = list(self.position)
+        self.time += TICK
+        self.ticks += 1
+        if self.shot_display_timer > 0:
+            self.shot_display_timer -= TICK
+
+        self.move_player(inputs)
+        self.profiler.mark("movement")
+        self.resolve_collisions()
+        self.profiler.mark("collision")
+        if self.pending_shoot:
+            self.pending_shoot = False
+            self.shoot()
+        self.profiler.mark("shooting")
+        if self.enemies:
+            self.pathfinder.update(self.position[0], self.position[2])
+        self.profiler.mark("pathfinding")
+        self.update_enemies()
+        self.profiler.mark("enemies")
+
+    def move_player(self, inputs):
+        """Walking, running, jumping and gravity"""
+        fx, fy, fz = self.forward()
+        # right = normalize(cross(forward, up))
+        length = math.hypot(fx, fz)
+        rx, rz = -fz / length, fx / length
+
+        mx = my = mz = 0.0
+        if inputs.forward:
+            mx, my, mz = mx + fx, my + fy, mz + fz
+        if inputs.back:
+            mx, my, mz = mx - fx, my - fy, mz - fz
+        if inputs.left:
+            mx, mz = mx - rx, mz - rz
+        if inputs.right:
+            mx, mz = mx + rx, mz + rz
+
+        move_length = math.sqrt(mx * mx + my * my + mz * mz)
+        speed = BASE_SPEED * (RUN_MULTIPLIER if inputs.run else 1.0)
+        if move_length > 0:
+            speed /= move_length
+        self.velocity[0] = mx * speed
+        self.velocity[2] = mz * speed
+
+        if self.pending_jump:
+            self.pending_jump = False
+            if self.position[1] <= 0.05:
+                self.velocity[1] = JUMP_IMPULSE
+        self.velocity[1] -= GRAVITY * TICK
+
+        for axis in range(3):
+            self.position[axis] += self.velocity[axis] * TICK
+        if self.position[1] < 0:
+            self.position[1] = 0.0
+            self.velocity[1] = 0.0
+
+    def resolve_collisions(self):
+        """Push the player out of nearby walls (softer while airborne)"""
+        correction_factor = 0.5 if self.position[1] > 0.05 else 1.0
+        corr_x, corr_z = self.walls.resolve(self.position[0], self.position[2], PLAYER_RADIUS, correction_factor)
+        self.position[0] += corr_x
+        self.position[2] += corr_z
+
+    def shoot(self):
+        """Fire if the weapon cooled down, damaging enemies along the view ray"""
+        if self.time - self.last_shot_time < self.cooldown_duration:
+            return
+        self.last_shot_time = self.time
+        self.shot_display_timer = SHOOT_DISPLAY_DURATION
+        self.events.append("shot")
+
+        ray_origin = (self.position[0], self.position[1] + PLAYER_HEIGHT * 0.5, self.position[2])
+        index = self.hitscan(ray_origin, self.forward())
+        if index is not None:
+            self.enemies.hit(index)
+
+    def hitscan(self, ray_origin, ray_dir):
+        """Index of the nearest enemy on the ray, or None if there is none or a
+        wall stands in front of it"""
+        if not self.enemies:
+            return None
+        distances = ray_intersect_spheres(ray_origin, ray_dir, self.enemies.positions, ENEMY_RADIUS)
+        index = int(np.argmin(distances))
+        distance = distances[index]
+        if distance == np.inf:
+            return None
+
+        # Walk the grid along the ray's ground projection, only as far as the enemy
+        horizontal = math.hypot(ray_dir[0], ray_dir[2])
+        if horizontal > 1e-9:
+            reach = distance * horizontal
+            wall = first_wall_distance(self.walls.solid, ray_origin[0], ray_origin[2],
+                                       ray_dir[0] / horizontal, ray_dir[2] / horizontal, reach)
+            if wall < reach:
+                return None
+        return index
+
+    def update_enemies(self):
+        """Count down the 'shot' state of enemies and move them towards the player"""
+        self.enemies.update(TICK)
+        self.enemies.chase(self.pathfinder.field, self.position[0], self.position[2], TICK)
+
+    def close(self):
+        """Stop background work (the pathfinding thread)"""
+        self.pathfinder.close()
@@ -0,0 +1,163 @@
+import queue
+import threading
+import traceback
+
+import numpy as np
+
+from rayengine.level_mesh import GROUND_HEIGHT, build_region, chunk_bounds, ground_arrays
+
+# ------------------------------------------------------------------------------
+# Chunk Streaming
+# ------------------------------------------------------------------------------
+# Large maps are not meshed up front. Only the chunks within a radius of the
+# player are built, on a worker thread, and handed to the renderer a few per
+# frame; chunks that fall further behind are unloaded. Cells come from any
+# read_region(r0, c0, r1, c1) callable: a slice of the grid in memory or a
+# MapChunkReader over a binary map file.
+STREAM_CHUNK_SIZE = 32
+STREAM_RADIUS = 4
+# Chunks stay loaded this many chunks past the radius, so walking along a chunk
+# border does not load and unload the same row of chunks over and over
+UNLOAD_MARGIN = 1
+STREAM_MIN_CELLS = 512 * 512
+
+
+def grid_region_reader(grid):
+    """read_region over a grid held in memory"""
+    def read_region(r0, c0, r1, c1):
+        return grid[r0:r1, c0:c1]
+    return read_region
+
+
+def chunk_distance(a, b):
+    """Distance between two chunk keys in chunks (Chebyshev)"""
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+
+def chunks_in_radius(center, rows, cols, chunk_size, radius):
+    """Keys of the chunks within radius of the center chunk, nearest first"""
+    chunk_rows = (rows + chunk_size - 1) // chunk_size
+    chunk_cols = (cols + chunk_size - 1) // chunk_size
+    cr, cc = center
+    keys = [(r, c)
+            for r in range(max(cr - radius, 0), min(cr + radius + 1, chunk_rows))
+            for c in range(max(cc - radius, 0), min(cc + radius + 1, chunk_cols))]
+    keys.sort(key=lambda key: (key[0] - cr) ** 2 + (key[1] - cc) ** 2)
+    return keys
+
+
+def build_streamed_chunk(read_region, rows, cols, key, chunk_size):
+    """Triangle arrays per material for one chunk, from its cells and a one-cell
+    border (so wall faces against the neighbouring chunks are hidden)"""
+    r0, c0, r1, c1 = chunk_bounds(key, rows, cols, chunk_size)
+    hr0, hc0 = max(r0 - 1, 0), max(c0 - 1, 0)
+    block = read_region(hr0, hc0, min(r1 + 1, rows), min(c1 + 1, cols))
+    arrays = build_region(block, r0 - hr0, c0 - hc0, r1 - hr0, c1 - hc0)
+    for vertices, normals, texcoords in arrays.values():
+        vertices[:, 0] += hc0
+        vertices[:, 2] += hr0
+    return arrays
+
+
+def chunk_ground(rows, cols, key, chunk_size):
+    """Arrays of a chunk that is all ground, for when its cells can't be meshed"""
+    r0, c0, r1, c1 = chunk_bounds(key, rows, cols, chunk_size)
+    run_rows = np.arange(r0, r1)
+    return {"ground": ground_arrays(run_rows, np.full(len(run_rows), c0), np.full(len(run_rows), c1), GROUND_HEIGHT)}
+
+
+class ChunkStreamer:
+    """Keeps the chunks around the player meshed, building them in the background"""
+
+    def __init__(self, read_region, rows, cols, chunk_size=STREAM_CHUNK_SIZE,
+                 radius=STREAM_RADIUS, threaded=True):
+        self.read_region = read_region
+        self.rows = rows
+        self.cols = cols
+        self.chunk_size = chunk_size
+        self.radius = radius
+        self.center = None
+        self.wanted = set()
+        self.loaded = set()
+        self.pending = set()
+        self.builds = 0
+        self.results = queue.Queue()
+        self.thread = None
+        if threaded:
+            self.requests = queue.Queue()
+            self.thread = threading.Thread(target=self._run, name="chunk-streamer", daemon=True)
+            self.thread.start()
+
+    def update(self, x, z):
+        """Request the chunks around (x, z); returns the loaded keys that are now
+        too far away and should be unloaded"""
+        center = (min(max(int(z), 0), self.rows - 1) // self.chunk_size,
+                  min(max(int(x), 0), self.cols - 1) // self.chunk_size)
+        if center == self.center:
+            return []
+        self.center = center
+        keys = chunks_in_radius(center, self.rows, self.cols, self.chunk_size, self.radius)
+        # Replaced as a whole, so the worker always sees a consistent set
+        self.wanted = set(keys)
+        for key in keys:
+            if key in self.loaded or key in self.pending:
+                continue
+            self.pending.add(key)
+            if self.thread is None:
+                self.results.put((key, self._build(key)))
+            else:
+                self.requests.put(key)
+
+        far = [key for key in self.loaded if chunk_distance(key, center) > self.radius + UNLOAD_MARGIN]
+        self.loaded.difference_update(far)
+        return far
+
+    def poll(self, limit=None):
+        """Chunks finished since the last call as (key, arrays), at most limit of
+        them; from here on they count as loaded"""
+        done = []
+        while limit is None or len(done) < limit:
+            try:
+                key, arrays = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(key)
+            if arrays is None:
+                # Skipped by the worker, but the player may have come back since
+                if key in self.wanted:
+                    self.pending.add(key)
+                    self.requests.put(key)
+                continue
+            if chunk_distance(key, self.center) > self.radius + UNLOAD_MARGIN:
+                continue
+            self.loaded.add(key)
+            done.append((key, arrays))
+        return done
+
+    def _build(self, key):
+        self.builds += 1
+        return build_streamed_chunk(self.read_region, self.rows, self.cols, key, self.chunk_size)
+
+    def _run(self):
+        while True:
+            key = self.requests.get()
+            if key is None:
+                return
+            if key not in self.wanted:
+                self.results.put((key, None))
+                continue
+            try:
+                self.results.put((key, self._build(key)))
+            except Exception as e:
+                # Keep the chunk's floor rather than asking for it again and again
+                print("Error building chunk", key, ":", e)
+                traceback.print_exc()
+                self.results.put((key, chunk_ground(self.rows, self.cols, key, self.chunk_size)))
+
+    def close(self):
+        """Stop the worker thread"""
+        if self.thread is not None:
+            self.wanted = set()  # skip whatever is still queued
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
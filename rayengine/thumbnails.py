@@ -0,0 +1,92 @@
+import os
+import threading
+from collections import OrderedDict
+
+from rayengine.media_store import hash_file
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# ------------------------------------------------------------------------------
+# Persistent Thumbnail Cache
+# ------------------------------------------------------------------------------
+# Resized previews are stored as PNGs named <content hash>_<width>x<height>.png,
+# so a thumbnail is reused for as long as the source content is unchanged.
+# The least recently used thumbnails are evicted when the cache grows past
+# max_bytes (recency survives restarts through the files' mtimes). get() may be
+# called from several threads; decoding and resizing run outside the lock.
+THUMBNAIL_DIR = os.path.join(".cache", "thumbnails")
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class ThumbnailCache:
+    """Size-bounded LRU cache of resized images on disk"""
+
+    def __init__(self, cache_dir=THUMBNAIL_DIR, max_bytes=MAX_CACHE_BYTES, hasher=hash_file):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hasher = hasher
+        self.entries = OrderedDict()  # file name -> size in bytes, oldest first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Index the thumbnails already on disk, least recently used first"""
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                found.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    def get(self, path, size, digest=None):
+        """Image at path resized to size (width, height), from the cache when possible"""
+        if Image is None:
+            raise RuntimeError("Pillow is required for thumbnails")
+        digest = digest or self.hasher(path)
+        name = f"{digest}_{size[0]}x{size[1]}.png"
+        cached_path = os.path.join(self.cache_dir, name)
+
+        with self.lock:
+            cached = name in self.entries
+            if cached:
+                self.entries.move_to_end(name)
+        if cached:
+            try:
+                img = Image.open(cached_path)
+                img.load()
+                os.utime(cached_path)
+                return img
+            except OSError:
+                with self.lock:
+                    self.total_bytes -= self.entries.pop(name, 0)
+
+        img = Image.open(path)
+        img = img.resize(size, Image.Resampling.LANCZOS).convert("RGBA")
+        try:
+            img.save(cached_path)
+            file_size = os.path.getsize(cached_path)
+            with self.lock:
+                self.total_bytes += file_size - self.entries.get(name, 0)
+                self.entries[name] = file_size
+                self.evict()
+        except OSError as e:
+            print("Error caching thumbnail:", e)
+        return img
+
+    def evict(self):
+        """Delete least recently used thumbnails until the cache fits max_bytes
+        (called with the lock held)"""
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name, file_size = self.entries.popitem(last=False)
+            self.total_bytes -= file_size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
@@ -0,0 +1,139 @@
+import math
+import numpy as np
+
+from rayengine.level_mesh import WALL_HEIGHT
+
+# ------------------------------------------------------------------------------
+# Grid-DDA Visibility
+# ------------------------------------------------------------------------------
+# Walls only hide what is behind them while the eye is below their top; from
+# higher up (mid-jump) the pass falls back to the view cone without occlusion.
+RAY_COUNT = 160
+VIEW_DISTANCE = 100.0
+
+
+def cast_rays(solid, x, z, angles, max_distance=VIEW_DISTANCE):
+    """Walk rays through the grid (DDA) and return the (rows, cols) of every cell
+    they enter, stopping each ray at the first wall, the map edge or max_distance"""
+    rows, cols = solid.shape
+    count = len(angles)
+    dir_x = np.sin(angles)[:, None]
+    dir_z = np.cos(angles)[:, None]
+    start_x = int(math.floor(x))
+    start_z = int(math.floor(z))
+
+    # Distances along each ray at which it crosses vertical (x) and horizontal
+    # (z) grid lines; merging both sorted lists gives the DDA cell sequence
+    steps = np.arange(int(max_distance) + 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta_x = np.abs(1.0 / dir_x)
+        delta_z = np.abs(1.0 / dir_z)
+        first_x = np.where(dir_x < 0, x - start_x, start_x + 1 - x) * delta_x
+        first_z = np.where(dir_z < 0, z - start_z, start_z + 1 - z) * delta_z
+        cross_x = np.where(dir_x == 0, np.inf, first_x + steps * delta_x)
+        cross_z = np.where(dir_z == 0, np.inf, first_z + steps * delta_z)
+
+    distance = np.concatenate([cross_x, cross_z], axis=1)
+    order = np.argsort(distance, axis=1, kind="stable")
+    distance = np.take_along_axis(distance, order, axis=1)
+    is_x = order < len(steps)
+
+    cell_x = start_x + np.where(dir_x < 0, -1, 1) * np.cumsum(is_x, axis=1)
+    cell_z = start_z + np.where(dir_z < 0, -1, 1) * np.cumsum(~is_x, axis=1)
+
+    inside = ((cell_x >= 0) & (cell_x < cols) & (cell_z >= 0) & (cell_z < rows)
+              & (distance <= max_distance))
+    blocked = ~inside
+    blocked[inside] = solid[cell_z[inside], cell_x[inside]]
+
+    # Each ray sees every cell up to and including the first blocking one
+    first_blocked = np.where(blocked.any(axis=1), blocked.argmax(axis=1), blocked.shape[1])
+    column = np.arange(blocked.shape[1])
+    seen = inside & (column <= first_blocked[:, None])
+
+    return (np.concatenate([[start_z], cell_z[seen]]),
+            np.concatenate([[start_x], cell_x[seen]]))
+
+
+def first_wall_distance(solid, x, z, dir_x, dir_z, max_distance):
+    """Distance along one ray (unit direction in the x/z plane) to the first wall
+    cell it enters, or inf if it travels max_distance first; leaving the map
+    counts as hitting a wall"""
+    rows, cols = solid.shape
+    start_x = int(math.floor(x))
+    start_z = int(math.floor(z))
+
+    # Same crossing merge as cast_rays, for a single ray and only as far as needed
+    crossings = []
+    for origin, cell, direction in ((x, start_x, dir_x), (z, start_z, dir_z)):
+        if direction == 0:
+            crossings.append(np.empty(0))
+            continue
+        delta = abs(1.0 / direction)
+        first = (origin - cell if direction < 0 else cell + 1 - origin) * delta
+        crossings.append(first + np.arange(int(max_distance * abs(direction)) + 2) * delta)
+
+    distance = np.concatenate(crossings)
+    is_x = np.arange(len(distance)) < len(crossings[0])
+    order = np.argsort(distance, kind="stable")
+    distance = distance[order]
+    is_x = is_x[order]
+    within = distance <= max_distance
+    distance = distance[within]
+    is_x = is_x[within]
+
+    cell_x = start_x + (-1 if dir_x < 0 else 1) * np.cumsum(is_x)
+    cell_z = start_z + (-1 if dir_z < 0 else 1) * np.cumsum(~is_x)
+    inside = (cell_x >= 0) & (cell_x < cols) & (cell_z >= 0) & (cell_z < rows)
+    blocked = ~inside
+    blocked[inside] = solid[cell_z[inside], cell_x[inside]]
+    if not blocked.any():
+        return math.inf
+    return float(distance[blocked.argmax()])
+
+
+class VisibilityPass:
+    """Per-frame set of potentially visible cells, chunks and enemies"""
+
+    def __init__(self, solid, chunk_size, fov, ray_count=RAY_COUNT, max_distance=VIEW_DISTANCE):
+        self.solid = solid
+        self.chunk_size = chunk_size
+        self.fov = fov
+        self.ray_count = ray_count
+        self.max_distance = max_distance
+        self.mask = np.zeros(solid.shape, dtype=bool)
+        self.no_walls = np.zeros(solid.shape, dtype=bool)
+        self.rows = np.empty(0, dtype=np.intp)
+        self.cols = np.empty(0, dtype=np.intp)
+        self.chunks = set()
+
+    def update(self, x, z, yaw, eye_y=0.0):
+        """Recompute visibility for a viewer at (x, z) looking along yaw, with
+        the eye eye_y above the ground"""
+        self.mask[self.rows, self.cols] = False
+
+        angles = yaw + np.linspace(-self.fov / 2, self.fov / 2, self.ray_count)
+        occluders = self.solid if eye_y <= WALL_HEIGHT else self.no_walls
+        rows, cols = cast_rays(occluders, x, z, angles, self.max_distance)
+
+        # Cells right around the viewer are always visible (looking down, strafing)
+        row, col = int(math.floor(z)), int(math.floor(x))
+        near_rows, near_cols = np.mgrid[row - 1:row + 2, col - 1:col + 2]
+        rows = np.concatenate([rows, near_rows.ravel()])
+        cols = np.concatenate([cols, near_cols.ravel()])
+        inside = (rows >= 0) & (rows < self.mask.shape[0]) & (cols >= 0) & (cols < self.mask.shape[1])
+        self.rows, self.cols = rows[inside], cols[inside]
+
+        self.mask[self.rows, self.cols] = True
+        chunk_cols = self.mask.shape[1] // self.chunk_size + 1
+        keys = np.unique((self.rows // self.chunk_size) * chunk_cols + self.cols // self.chunk_size)
+        self.chunks = {(int(k) // chunk_cols, int(k) % chunk_cols) for k in keys}
+
+    def are_visible(self, x, z):
+        """Whether the cells containing the world points (x, z) are potentially visible"""
+        rows = np.floor(z).astype(np.intp)
+        cols = np.floor(x).astype(np.intp)
+        inside = (rows >= 0) & (rows < self.mask.shape[0]) & (cols >= 0) & (cols < self.mask.shape[1])
+        visible = np.zeros(len(rows), dtype=bool)
+        visible[inside] = self.mask[rows[inside], cols[inside]]
+        return visible
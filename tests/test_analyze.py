@@ -0,0 +1,22 @@
+import json
+
+import numpy as np
+
+from rayengine.analyze import find_maps
+from rayengine.mapfile import save_map_file
+
+
+def test_directory_scan_skips_manifests(tmp_path):
+    grid = np.zeros((8, 8), dtype=np.uint8)
+    save_map_file(str(tmp_path / "level.json"), {"sky_color": "#FFFFFF", "grid": grid})
+    save_map_file(str(tmp_path / "level.rmap"), {"grid": grid})
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "manifest.json").write_text(json.dumps({"sources": {}, "files": {}}))
+    (tmp_path / "cooked" / "maps").mkdir(parents=True)
+    (tmp_path / "cooked" / "maps" / "level.json").write_text(json.dumps({"sound": {}, "mesh": {}}))
+    (tmp_path / "notes.rmap").write_text("not a map")
+
+    assert find_maps([str(tmp_path)]) == [str(tmp_path / "level.json"), str(tmp_path / "level.rmap")]
+    # Files named directly are still analyzed, and reported if broken
+    named = str(tmp_path / "media" / "manifest.json")
+    assert find_maps([named]) == [named]
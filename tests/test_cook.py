@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+
+from rayengine.cook import cook_map, load_map_manifest, read_level
+from rayengine.mapfile import save_map_file
+
+TRIANGLE = "v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n"
+
+
+def make_map(tmp_path, **media):
+    """Map file in tmp_path referring to the given media (name -> file content)"""
+    media_dir = tmp_path / "media"
+    media_dir.mkdir()
+    (media_dir / "wall.obj").write_text(TRIANGLE)
+    data = {"grid": np.zeros((40, 40), dtype=np.uint8), "sky_color": "#FFFFFF"}
+    for key, (name, content) in media.items():
+        (media_dir / name).write_text(content)
+        data[key] = name
+    data["grid"][5, 5] = 1
+    map_path = str(tmp_path / "level.json")
+    save_map_file(map_path, data)
+    return map_path, str(media_dir)
+
+
+def test_manifest_names_cooked_files(tmp_path):
+    map_path, media_dir = make_map(tmp_path, handgun_shoot_sound=("shot.wav", "RIFF"))
+    cook_dir = str(tmp_path / "cooked")
+    entries = cook_map(map_path, cook_dir, media_dir, jobs=1)
+    assert {entry["key"]: entry["status"] for entry in entries} == {
+        "handgun_shoot_sound": "cooked", "wall.obj": "cooked", "level": "cooked"}
+
+    manifest = load_map_manifest(cook_dir, map_path)
+    digest, sound = manifest["sound"][os.path.join(media_dir, "shot.wav")]
+    assert sound.endswith(".sound.wav") and open(sound).read() == "RIFF"
+    assert os.path.join(media_dir, "wall.obj") in manifest["mesh"]
+    level = [entry["output"] for entry in entries if entry["key"] == "level"][0]
+    assert read_level(level)
+
+    # Cooking again reuses every output
+    entries = cook_map(map_path, cook_dir, media_dir, jobs=1)
+    assert {entry["status"] for entry in entries} == {"cached"}
+
+
+def test_meshes_with_materials_are_not_cooked(tmp_path):
+    map_path, media_dir = make_map(tmp_path, enemy_model=("enemy.obj", "mtllib enemy.mtl\n" + TRIANGLE))
+    cook_dir = str(tmp_path / "cooked")
+    entries = cook_map(map_path, cook_dir, media_dir, jobs=1)
+    assert [entry["status"] for entry in entries if entry["key"] == "enemy_model"] == ["skipped"]
+    assert os.path.join(media_dir, "enemy.obj") not in load_map_manifest(cook_dir, map_path)["mesh"]
+
+
+def test_uncooked_map_has_no_manifest(tmp_path):
+    assert load_map_manifest(str(tmp_path), str(tmp_path / "level.json")) == {}
+    assert load_map_manifest(str(tmp_path), None) == {}
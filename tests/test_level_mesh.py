@@ -0,0 +1,89 @@
+import numpy as np
+
+from rayengine.level_mesh import (CHUNK_SIZE, WALL, build_chunk, chunk_keys, chunks_touching, wall_arrays,
+                                  wall_triangle_stats)
+
+
+def triangle_count(arrays):
+    return len(arrays[0]) // 3
+
+
+def test_empty_grid():
+    grid = np.zeros((20, 20), dtype=np.uint8)
+    for key in chunk_keys(20, 20):
+        chunk = build_chunk(grid, key)
+        assert triangle_count(chunk["wall"]) == 0
+        assert triangle_count(chunk["ground"]) > 0
+    assert wall_triangle_stats(grid) == {"walls": 0, "cubes": 0, "exposed": 0, "greedy": 0}
+
+
+def test_single_wall():
+    grid = np.zeros((5, 5), dtype=np.uint8)
+    grid[2, 2] = WALL
+    vertices, normals, texcoords = wall_arrays(grid, 0, 0, 5, 5, 1.0)
+    # Four sides and the top; no bottom
+    assert len(vertices) == 5 * 6
+    assert not np.any(normals[:, 1] < 0)
+    assert vertices[:, [0, 2]].min() == 2 and vertices[:, [0, 2]].max() == 3
+    assert wall_triangle_stats(grid) == {"walls": 1, "cubes": 12, "exposed": 10, "greedy": 10}
+
+
+def test_single_wall_winding():
+    grid = np.zeros((3, 3), dtype=np.uint8)
+    grid[1, 1] = WALL
+    vertices, normals, _ = wall_arrays(grid, 0, 0, 3, 3, 1.0)
+    triangles = vertices.reshape(-1, 3, 3)
+    faces = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    assert np.all(np.einsum("ij,ij->i", faces, normals[::3]) > 0)
+
+
+def test_walls_on_chunk_border():
+    # Two walls side by side across the boundary between chunks (0, 0) and (0, 1)
+    grid = np.zeros((CHUNK_SIZE, CHUNK_SIZE * 2), dtype=np.uint8)
+    grid[4, CHUNK_SIZE - 1] = WALL
+    grid[4, CHUNK_SIZE] = WALL
+    left = build_chunk(grid, (0, 0))["wall"]
+    right = build_chunk(grid, (0, 1))["wall"]
+    # Each wall shows its top and three sides; the faces touching each other are hidden
+    assert triangle_count(left) == 8
+    assert triangle_count(right) == 8
+    for vertices, normals, _ in (left, right):
+        on_border = np.all(vertices.reshape(-1, 3, 3)[:, :, 0] == CHUNK_SIZE, axis=1)
+        assert not np.any(on_border & (normals[::3, 1] == 0))
+
+
+def test_wall_on_grid_edge_keeps_outer_face():
+    grid = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+    grid[0, 0] = WALL
+    assert triangle_count(build_chunk(grid, (0, 0))["wall"]) == 10
+
+
+def test_greedy_merge_and_tiled_uvs():
+    grid = np.zeros((6, 6), dtype=np.uint8)
+    grid[1:5, 1:5] = WALL
+    vertices, normals, texcoords = wall_arrays(grid, 0, 0, 6, 6, 1.0)
+    # One quad per side and one for the top
+    assert len(vertices) == 5 * 6
+    # The texture repeats once per cell instead of stretching over the 4-cell quads
+    assert texcoords.max() == 4
+
+
+def test_chunks_touching():
+    size = CHUNK_SIZE
+    assert chunks_touching(5, 5, 64, 64) == {(0, 0)}
+    assert chunks_touching(5, size - 1, 64, 64) == {(0, 0), (0, 1)}
+    assert chunks_touching(size, 5, 64, 64) == {(1, 0), (0, 0)}
+    assert chunks_touching(size, size - 1, 64, 64) == {(1, 0), (0, 0), (1, 1)}
+    # No neighbours past the grid
+    assert chunks_touching(0, 0, 64, 64) == {(0, 0)}
+    assert chunks_touching(63, 63, 64, 64) == {(3, 3)}
+
+
+def test_edit_on_chunk_edge_changes_neighbour_mesh():
+    grid = np.zeros((CHUNK_SIZE, CHUNK_SIZE * 2), dtype=np.uint8)
+    grid[4, CHUNK_SIZE] = WALL
+    before = build_chunk(grid, (0, 1))["wall"]
+    grid[4, CHUNK_SIZE - 1] = WALL
+    keys = chunks_touching(4, CHUNK_SIZE - 1, *grid.shape)
+    assert (0, 1) in keys
+    assert triangle_count(build_chunk(grid, (0, 1))["wall"]) == triangle_count(before) - 2
@@ -0,0 +1,44 @@
+import json
+import os
+
+from rayengine.media_store import MANIFEST_NAME, MediaStore
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+    return str(path)
+
+
+def test_same_name_different_content_resolves_by_content(tmp_path):
+    store = MediaStore(str(tmp_path / "media"))
+    first = write(tmp_path / "a" / "wall.png", "brick")
+    second = write(tmp_path / "b" / "wall.png", "stone")
+    assert store.add(first).endswith("wall.png")
+    stored_second = store.add(second)
+    assert os.path.basename(stored_second).startswith("wall-")
+
+    # The map's reference to the second file finds its own copy, not media/wall.png
+    assert store.resolve(second) == stored_second
+    assert store.resolve(first) == store.path_for("wall.png")
+    # Also once the original file is gone
+    os.remove(second)
+    assert store.resolve(second) == stored_second
+
+
+def test_media_names_resolve_directly(tmp_path):
+    store = MediaStore(str(tmp_path / "media"))
+    stored = store.add(write(tmp_path / "src" / "shot.wav", "bang"))
+    assert store.resolve("shot.wav") == stored
+    assert store.resolve(stored) == stored
+    assert store.resolve("missing.wav") is None
+
+
+def test_computed_hashes_are_saved(tmp_path):
+    media_dir = str(tmp_path / "media")
+    store = MediaStore(media_dir)
+    path = write(tmp_path / "src" / "ground.png", "grass")
+    digest = store.file_hash(path)
+    with open(os.path.join(media_dir, MANIFEST_NAME)) as f:
+        assert json.load(f)["sources"][os.path.abspath(path)]["hash"] == digest
@@ -0,0 +1,85 @@
+import numpy as np
+
+from rayengine.pathfinding import UNREACHABLE, FlowField, FlowFieldBuilder, Pathfinder, bfs_distances
+
+
+def corridor():
+    """Open 5x7 room split by a wall with a gap at the bottom"""
+    solid = np.zeros((5, 7), dtype=bool)
+    solid[:4, 3] = True
+    return solid
+
+
+def test_distances_go_around_walls():
+    distance = bfs_distances(corridor(), 0, 0)
+    assert distance[0, 0] == 0
+    assert distance[0, 3] == UNREACHABLE
+    # Down to the gap, across and back up
+    assert distance[0, 4] == 4 + 4 + 4
+
+
+def test_cut_off_cells_are_unreachable():
+    solid = corridor()
+    solid[4, 3] = True
+    distance = bfs_distances(solid, 0, 0)
+    assert (distance[:, 4:] == UNREACHABLE).all()
+
+
+def test_steps_lead_downhill():
+    field = FlowField.build(corridor(), 0, 0)
+    rows, cols = np.nonzero(field.distance > 0)
+    step_x, step_z = field.steps(rows, cols)
+    assert (field.distance[rows + step_z, cols + step_x] == field.distance[rows, cols] - 1).all()
+    # No step out of the target or out of the map
+    assert field.steps(np.array([0]), np.array([0])) == (0, 0)
+
+
+def test_budgeted_build_matches_full_build():
+    rng = np.random.default_rng(0)
+    solid = rng.random((64, 64)) < 0.3
+    solid[32, 32] = False
+    builder = FlowFieldBuilder(solid, 32, 32)
+    advances = 1
+    while not builder.advance(100):
+        advances += 1
+    assert advances > 1
+    assert (builder.field().distance == bfs_distances(solid, 32, 32)).all()
+
+
+def test_max_distance_stops_the_search():
+    field = FlowField.build(np.zeros((1, 10), dtype=bool), 0, 0, max_distance=4)
+    cols = np.arange(10)
+    assert field.distance_at(np.zeros(10, dtype=np.intp), cols).tolist() == [0, 1, 2, 3, 4] + [UNREACHABLE] * 5
+    # Only the window the search could reach is stored
+    assert field.distance.shape == (1, 5) and field.shape == (1, 10)
+
+
+def test_windowed_field_matches_the_full_one():
+    rng = np.random.default_rng(1)
+    solid = rng.random((200, 200)) < 0.2
+    solid[100, 100] = False
+    full = FlowField.build(solid, 100, 100)
+    window = FlowField.build(solid, 100, 100, max_distance=30)
+    rows, cols = np.mgrid[0:200, 0:200]
+    rows, cols = rows.ravel(), cols.ravel()
+    near = (full.distance[rows, cols] >= 0) & (full.distance[rows, cols] <= 30)
+    assert (window.distance_at(rows, cols) == np.where(near, full.distance[rows, cols], UNREACHABLE)).all()
+    # Cells inside the radius step the same way; cells beyond it stay put
+    inner = near & (full.distance[rows, cols] < 30)
+    full_steps = np.stack(full.steps(rows, cols))
+    window_steps = np.stack(window.steps(rows, cols))
+    assert (full_steps[:, inner] == window_steps[:, inner]).all()
+    assert not window_steps[:, ~near].any()
+
+
+def test_rebuilds_follow_a_fixed_tick_cadence():
+    pathfinder = Pathfinder(np.zeros((8, 8), dtype=bool), rebuild_ticks=5)
+    pathfinder.update(0.5, 0.5)
+    assert pathfinder.field.target == (0, 0)
+    # The player moves on, but the next build waits for the cadence
+    for tick in range(4):
+        pathfinder.update(4.5, 2.5)
+    assert pathfinder.field.target == (0, 0)
+    pathfinder.update(4.5, 2.5)
+    assert pathfinder.field.target == (2, 4)
+    assert pathfinder.builds == 2
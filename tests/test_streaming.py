@@ -0,0 +1,38 @@
+import numpy as np
+
+from rayengine.streaming import ChunkStreamer, grid_region_reader
+
+
+def poll_all(streamer, count):
+    """Wait for count chunks from a threaded streamer"""
+    done = []
+    while len(done) < count:
+        done += streamer.poll()
+    return dict(done)
+
+
+def test_streams_chunks_around_the_player():
+    grid = np.zeros((64, 64), dtype=np.uint8)
+    grid[10, 10] = 1
+    streamer = ChunkStreamer(grid_region_reader(grid), 64, 64, chunk_size=16, radius=1, threaded=False)
+    streamer.update(8.0, 8.0)
+    chunks = dict(streamer.poll())
+    assert set(chunks) == {(0, 0), (0, 1), (1, 0), (1, 1)}
+    assert len(chunks[(0, 0)]["wall"][0]) and not len(chunks[(1, 1)]["wall"][0])
+
+
+def test_failed_chunk_keeps_its_ground(capsys):
+    def read_region(r0, c0, r1, c1):
+        raise OSError("disk on fire")
+
+    streamer = ChunkStreamer(read_region, 20, 20, chunk_size=16, radius=0)
+    try:
+        streamer.update(2.0, 2.0)
+        chunks = poll_all(streamer, 1)
+    finally:
+        streamer.close()
+    vertices, normals, texcoords = chunks[(0, 0)]["ground"]
+    # One quad per row of the 16x16 chunk
+    assert len(vertices) == 16 * 6
+    assert vertices[:, 0].min() == 0 and vertices[:, 0].max() == 16
+    assert "disk on fire" in capsys.readouterr().out
@@ -0,0 +1,31 @@
+import math
+
+import numpy as np
+
+from rayengine.level_mesh import WALL_HEIGHT
+from rayengine.visibility import VisibilityPass
+
+
+def walled_room():
+    """20x20 open map with a full-width wall across row 10"""
+    solid = np.zeros((20, 20), dtype=bool)
+    solid[10, :] = True
+    return solid
+
+
+def test_walls_hide_cells_behind_them():
+    visibility = VisibilityPass(walled_room(), 8, math.radians(60))
+    # Looking along +z from row 5, towards the wall
+    visibility.update(10.5, 5.5, 0.0, eye_y=0.5)
+    assert visibility.mask[10, 10]
+    assert not visibility.mask[15, 10]
+    assert visibility.are_visible(np.array([10.5, 10.5]), np.array([8.5, 15.5])).tolist() == [True, False]
+
+
+def test_no_occlusion_above_the_walls():
+    visibility = VisibilityPass(walled_room(), 8, math.radians(60))
+    visibility.update(10.5, 5.5, 0.0, eye_y=WALL_HEIGHT + 0.1)
+    assert visibility.mask[15, 10]
+    # Still limited to the view cone
+    assert not visibility.mask[0, 10]
+    assert (1, 1) in visibility.chunks